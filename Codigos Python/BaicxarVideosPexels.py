@@ -11,12 +11,18 @@ Versão atualizada para:
 """
 
 import os
+import sys
 import json
 import requests
 import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 
+# Permite reutilizar os módulos compartilhados de tools/ (raiz do projeto)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.download_engine import DOWNLOAD_WORKERS, DownloadTask, create_session, download_all, download_file
+
 # Arquivo de configuração para salvar a API key
 CONFIG_FILE = "config.json"
 # Limiar para considerar um vídeo "grande" (em pixels de largura)
@@ -34,7 +40,7 @@ def save_config(config):
     with open(CONFIG_FILE, "w", encoding="utf-8") as f:
         json.dump(config, f, ensure_ascii=False, indent=4)
 
-def download_media(url, filename, stop_event, timeout_callback=None):
+def download_media(url, filename, stop_event, timeout_callback=None, session=None):
     """
     Faz o download do arquivo (imagem/vídeo) e o salva em 'filename'.
     Se o stop_event for acionado ou se o download ficar sem receber dados por mais de 30 segundos,
@@ -42,24 +48,21 @@ def download_media(url, filename, stop_event, timeout_callback=None):
     """
     try:
         # timeout: 5 segundos para conexão e 30 segundos para leitura
-        response = requests.get(url, stream=True, timeout=(5, 30))
-        response.raise_for_status()
-        with open(filename, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if stop_event.is_set():
-                    return False  # Interrompe se o usuário pediu para parar
-                if chunk:
-                    f.write(chunk)
+        download_file(session or requests.Session(), url, filename, should_stop=stop_event.is_set)
         return True
-    except requests.exceptions.ReadTimeout:
+    except Exception as e:
+        return handle_download_error(e, stop_event, timeout_callback)
+
+def handle_download_error(error, stop_event, timeout_callback=None):
+    """Trata a falha de um download. Retorna False (arquivo não baixado)."""
+    if isinstance(error, requests.exceptions.ReadTimeout):
         # Se a leitura travar por mais de 30 segundos, interpretamos como fim do download.
-        if timeout_callback:
+        if timeout_callback and not stop_event.is_set():
             timeout_callback()
         stop_event.set()
-        return False
-    except Exception as e:
-        print("Erro ao baixar:", e)
-        return False
+    else:
+        print("Erro ao baixar:", error)
+    return False
 
 def buscar_e_baixar(api_key, search_type, orientation, query, download_folder, stop_event, progress_callback, timeout_callback):
     """
@@ -81,15 +84,27 @@ def buscar_e_baixar(api_key, search_type, orientation, query, download_folder, s
     per_page = 80  # máximo permitido pela API
     page = 1
     total_downloaded = 0
+    total_queued = 0
     total_results = None
 
+    # Uma sessão (conexões reaproveitadas) para a busca e todos os downloads
+    session = create_session(DOWNLOAD_WORKERS)
+
+    def on_result(task):
+        nonlocal total_downloaded
+        if task.error is not None:
+            handle_download_error(task.error, stop_event, timeout_callback)
+            return
+        total_downloaded += 1
+        progress_callback(total_downloaded, total_results)
+
     while not stop_event.is_set():
         params = {"query": query, "per_page": per_page, "page": page}
         if orientation in ["landscape", "portrait"]:
             params["orientation"] = orientation
 
         try:
-            response = requests.get(base_url, headers=headers, params=params, timeout=(5, 30))
+            response = session.get(base_url, headers=headers, params=params, timeout=(5, 30))
             response.raise_for_status()
         except Exception as e:
             messagebox.showerror("Erro", f"Falha na requisição: {e}")
@@ -102,6 +117,8 @@ def buscar_e_baixar(api_key, search_type, orientation, query, download_folder, s
         if not results:
             break  # não há mais resultados
 
+        # Monta os downloads da página (numerados na ordem da busca)
+        tasks = []
         for item in results:
             if stop_event.is_set():
                 break
@@ -110,10 +127,9 @@ def buscar_e_baixar(api_key, search_type, orientation, query, download_folder, s
                 if not img_url:
                     continue
                 ext = os.path.splitext(img_url)[-1]
-                file_path = os.path.join(download_folder, f"imagem_{total_downloaded+1}{ext}")
-                if download_media(img_url, file_path, stop_event, timeout_callback):
-                    total_downloaded += 1
-                    progress_callback(total_downloaded, total_results)
+                total_queued += 1
+                file_path = os.path.join(download_folder, f"imagem_{total_queued}{ext}")
+                tasks.append(DownloadTask(img_url, file_path))
             else:
                 video_files = item.get("video_files", [])
                 if not video_files:
@@ -131,16 +147,20 @@ def buscar_e_baixar(api_key, search_type, orientation, query, download_folder, s
                 video_url = selected_video.get("link")
                 if not video_url:
                     continue
-                file_path = os.path.join(download_folder, f"video_{total_downloaded+1}.mp4")
-                if download_media(video_url, file_path, stop_event, timeout_callback):
-                    total_downloaded += 1
-                    progress_callback(total_downloaded, total_results)
+                total_queued += 1
+                file_path = os.path.join(download_folder, f"video_{total_queued}.mp4")
+                tasks.append(DownloadTask(video_url, file_path))
+
+        # Baixa vários arquivos da página ao mesmo tempo
+        download_all(tasks, DOWNLOAD_WORKERS, session, result_callback=on_result,
+                     should_stop=stop_event.is_set)
 
         # Se o número de resultados nesta página for menor que o máximo, chegou à última página
         if len(results) < per_page:
             break
         page += 1
 
+    session.close()
     if stop_event.is_set():
         # Se o stop_event foi ativado, significa que ou o usuário interrompeu
         # ou um timeout ocorreu (o callback já exibiu uma mensagem)
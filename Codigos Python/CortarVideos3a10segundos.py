@@ -1,18 +1,27 @@
 import sys
 import os
 import random
+import shutil
 import time
 import datetime
 import ffmpeg
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QVBoxLayout,
     QHBoxLayout, QWidget, QLabel, QFileDialog, QProgressBar,
-    QInputDialog
+    QInputDialog, QMessageBox
 )
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QFont
 
+# Permite reutilizar os módulos compartilhados de tools/ (raiz do projeto)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools.keyframe_index import load_keyframe_index
+from tools.system_info import default_worker_count
+from tools.encoders import select_encoder
+from tools.render_journal import RenderJournal
+
 
 # ==================================================
 # Função auxiliar para “embaralhar” os vídeos em uma pasta,
@@ -62,8 +71,12 @@ def shuffle_folder(folder):
 
 
 # ==================================================
-# Thread para renderização (concat + fade) usando NVENC
-# e exibindo progresso + estimativa de tempo (ETA).
+# Thread para renderização (concat + fade) usando o
+# melhor encoder disponível (NVENC, QSV, VAAPI ou libx264),
+# com vários vídeos codificados em paralelo e
+# exibindo progresso + estimativa de tempo (ETA).
+# O diário (RenderJournal) registra cada etapa concluída,
+# então uma renderização interrompida continua de onde parou.
 # ==================================================
 class RenderThread(QThread):
     # Emite (progresso_em_% , tempo_restante_em_segundos)
@@ -71,192 +84,337 @@ class RenderThread(QThread):
     finished = pyqtSignal()
     error = pyqtSignal(str)
 
-    def __init__(self, video_files, output_file):
+    def __init__(self, video_files, output_file, encoder=None, smart_render=False,
+                 journal=None, lot=0):
         super().__init__()
         self.video_files = video_files
         self.output_file = output_file
+        # Diário da renderização e número do lote dentro dela
+        self.journal = journal or RenderJournal.for_job(
+            video_files, len(video_files), {'smart_render': smart_render})
+        self.lot = lot
+        # Temporários exclusivos deste lote (nada é gravado na pasta atual)
+        self.temp_dir = self.journal.temp_dir(lot)
         self.is_running = True
         self.start_time = None
+        # Detectado uma única vez por processo (select_encoder usa cache)
+        self.encoder = encoder or select_encoder()
+        # Modo inteligente: copia o vídeo até o último keyframe antes
+        # do fade e reencoda só o final (partes em MPEG-TS para a concat)
+        self.smart_render = smart_render
 
     def stop(self):
         self.is_running = False
 
+    def process_clip(self, i, video_file, apply_fade):
+        """ Renderiza o vídeo i e registra as partes geradas no diário. """
+        parts = self.encode_clip(i, video_file, apply_fade)
+        # Registra mesmo se o Parar chegou durante o encode: as partes estão
+        # completas (encode_clip só devolve [] quando nem começou)
+        if parts:
+            self.journal.record_clip(self.lot, i, video_file, parts)
+        return parts
+
+    def encode_clip(self, i, video_file, apply_fade):
+        """
+        Gera as partes do vídeo i (com fade out de 1s no final, se pedido)
+        e retorna a lista de arquivos, na ordem.
+        """
+        if not self.is_running:
+            return []
+
+        probe = ffmpeg.probe(video_file)
+        duration = float(probe['format']['duration'])
+        has_audio = any(s.get('codec_type') == 'audio' for s in probe['streams'])
+        video_codec = next((s.get('codec_name') for s in probe['streams']
+                            if s.get('codec_type') == 'video'), None)
+        fade_start = max(duration - 1, 0)
+
+        # O modo inteligente só copia H.264 (mesmo codec da parte reencodada)
+        if self.smart_render and video_codec == 'h264':
+            return self.smart_encode_clip(i, video_file, apply_fade,
+                                          fade_start, has_audio)
+
+        extension = 'ts' if self.smart_render else 'mp4'
+        fade_video = os.path.join(self.temp_dir, f"temp_fade_{i}.{extension}")
+        self.encode_video(video_file, fade_video, has_audio,
+                          fade_start if apply_fade else None)
+        return [fade_video]
+
+    def smart_encode_clip(self, i, video_file, apply_fade, fade_start, has_audio):
+        """ Copia o início do vídeo e reencoda só o trecho com o fade. """
+        head_video = os.path.join(self.temp_dir, f"temp_fade_{i}_a.ts")
+        tail_video = os.path.join(self.temp_dir, f"temp_fade_{i}_b.ts")
+
+        # Sem fade (último vídeo): cópia integral
+        if not apply_fade:
+            self.copy_video(video_file, head_video, has_audio)
+            return [head_video]
+
+        # Início do GOP que contém o começo do fade
+        cut_time = load_keyframe_index(video_file).keyframe_before(fade_start)
+
+        parts = []
+        if cut_time > 0:
+            self.copy_video(video_file, head_video, has_audio, duration=cut_time)
+            parts.append(head_video)
+
+        # -ss antes de -i em um keyframe = início exato do trecho final
+        self.encode_video(video_file, tail_video, has_audio,
+                          fade_start - cut_time, seek=cut_time)
+        parts.append(tail_video)
+        return parts
+
+    def copy_video(self, video_file, output_video, has_audio, duration=None):
+        """ Copia o vídeo sem reencode (áudio em AAC, como nas partes reencodadas). """
+        stream = ffmpeg.input(video_file)
+        streams = [stream.video, stream.audio] if has_audio else [stream.video]
+        options = {'vcodec': 'copy', 'acodec': 'aac'}
+        if duration is not None:
+            options['t'] = duration
+        ffmpeg.run(ffmpeg.output(*streams, output_video, **options),
+                   overwrite_output=True,
+                   capture_stdout=True,
+                   capture_stderr=True)
+
+    def encode_video(self, video_file, output_video, has_audio, fade_start=None, seek=None):
+        """ Reencoda o vídeo com o encoder escolhido (e fade out, se pedido). """
+        stream = ffmpeg.input(video_file, ss=seek) if seek else ffmpeg.input(video_file)
+        video = stream.video
+        if fade_start is not None:
+            # Aplica fade out de 1s (no final)
+            video = video.filter('fade',
+                                 type='out',
+                                 start_time=fade_start,
+                                 duration=1)
+
+        # Envio dos quadros para a GPU quando o encoder exige (VAAPI)
+        for upload_filter in self.encoder.upload_filters:
+            name, _, args = upload_filter.partition('=')
+            video = video.filter(name, args) if args else video.filter(name)
+
+        streams = [video, stream.audio] if has_audio else [video]
+        output = ffmpeg.output(
+            *streams,
+            output_video,
+            acodec='aac',
+            **self.encoder.output_args
+        )
+        if self.encoder.global_args:
+            output = output.global_args(*self.encoder.global_args)
+        ffmpeg.run(output,
+                   overwrite_output=True,
+                   capture_stdout=True,
+                   capture_stderr=True)
+
     def run(self):
         try:
             total_files = len(self.video_files)
-            concat_list = []
+            clip_parts = [[] for _ in range(total_files)]
 
             # Armazenamos o tempo inicial para calcular ETA
             self.start_time = time.time()
 
-            # Reencodar cada vídeo com fade (exceto no último),
-            # mas reencodando o último para manter o mesmo formato (NVENC).
+            # Lote já renderizado (e íntegro) em uma execução anterior
+            if self.journal.completed_lot(self.lot, self.output_file):
+                self.progress.emit(100, 0)
+                self.finished.emit()
+                return
+
+            # Reaproveita os vídeos já renderizados antes da interrupção
+            pending = []
             for i, video_file in enumerate(self.video_files):
-                if not self.is_running:
-                    return
-
-                fade_video = f"temp_fade_{i}.mp4"
-
-                probe = ffmpeg.probe(video_file)
-                duration = float(probe['format']['duration'])
-
-                if i < total_files - 1:
-                    # Aplica fade out de 1s (no final)
-                    stream = ffmpeg.input(video_file)
-                    stream = ffmpeg.filter(stream, 'fade',
-                                           type='out',
-                                           start_time=duration - 1,
-                                           duration=1)
-                    # Usa NVENC para acelerar
-                    stream = ffmpeg.output(
-                        stream,
-                        fade_video,
-                        vcodec='h264_nvenc',
-                        preset='fast',
-                        b='5M',
-                        acodec='aac'
-                    )
-                    ffmpeg.run(stream,
-                               overwrite_output=True,
-                               capture_stdout=True,
-                               capture_stderr=True)
+                parts = self.journal.completed_clip(self.lot, i, video_file)
+                if parts is None:
+                    pending.append(i)
                 else:
-                    # Último vídeo (sem fade) mas reencodado em NVENC
-                    stream = ffmpeg.input(video_file)
-                    stream = ffmpeg.output(
-                        stream,
-                        fade_video,
-                        vcodec='h264_nvenc',
-                        preset='fast',
-                        b='5M',
-                        acodec='aac'
-                    )
-                    ffmpeg.run(stream,
-                               overwrite_output=True,
-                               capture_stdout=True,
-                               capture_stderr=True)
-
-                concat_list.append(fade_video)
-
-                # Calcula progresso (até ~50%) ao finalizar cada reencode
-                step_progress = int(((i + 1) * 50) / total_files)
-                time_elapsed = time.time() - self.start_time
-                if step_progress > 0:
-                    time_remaining = (
-                        time_elapsed / step_progress) * (100 - step_progress)
-                else:
-                    time_remaining = 0
-                self.progress.emit(step_progress, time_remaining)
+                    clip_parts[i] = parts
+            already_done = total_files - len(pending)
+            initial_progress = int((already_done * 50) / total_files)
 
-            # Cria arquivo de lista para concat
-            with open('concat_list.txt', 'w', encoding='utf-8') as f:
-                for video in concat_list:
-                    f.write(f"file '{video}'\n")
+            # Reencodar cada vídeo com fade (exceto no último),
+            # mas reencodando o último para manter o mesmo formato.
+            # Vários vídeos são codificados ao mesmo tempo, até o
+            # limite suportado pelo encoder escolhido.
+            with ThreadPoolExecutor(max_workers=self.encoder.max_parallel) as executor:
+                futures = {
+                    executor.submit(self.process_clip, i, self.video_files[i],
+                                    i < total_files - 1): i
+                    for i in pending
+                }
+
+                for done, future in enumerate(as_completed(futures), 1):
+                    # Parada ou erro: descarta os encodes ainda na fila e
+                    # avisa já (o `with` só espera os que estão em andamento)
+                    if not self.is_running:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        return
 
-            # Concatenar todos (agora com copy)
-            stream = ffmpeg.input('concat_list.txt', format='concat', safe=0)
-            stream = ffmpeg.output(
-                stream, self.output_file, acodec='copy', vcodec='copy')
+                    try:
+                        clip_parts[futures[future]] = future.result()
+                    except Exception as e:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        self.error.emit(str(e))
+                        return
+
+                    # Calcula progresso (até ~50%) ao finalizar cada reencode
+                    step_progress = int(((already_done + done) * 50) / total_files)
+                    time_elapsed = time.time() - self.start_time
+                    if step_progress > initial_progress:
+                        time_remaining = (
+                            time_elapsed / (step_progress - initial_progress)) * (100 - step_progress)
+                    else:
+                        time_remaining = 0
+                    self.progress.emit(step_progress, time_remaining)
+
+            concat_list = [part for parts in clip_parts for part in parts]
+
+            # Cria arquivo de lista para concat (na ordem original)
+            concat_file = os.path.join(self.temp_dir, 'concat_list.txt')
+            with open(concat_file, 'w', encoding='utf-8') as f:
+                for video in concat_list:
+                    escaped = video.replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+
+            # Concatenar todos (agora com copy) em um arquivo temporário;
+            # a saída final só aparece quando estiver completa
+            temp_output = os.path.join(self.temp_dir, os.path.basename(self.output_file))
+            stream = ffmpeg.input(concat_file, format='concat', safe=0)
+            options = {'acodec': 'copy', 'vcodec': 'copy'}
+            if self.smart_render:
+                # Áudio AAC vindo de MPEG-TS precisa do cabeçalho do MP4
+                options['bsf:a'] = 'aac_adtstoasc'
+            stream = ffmpeg.output(stream, temp_output, **options)
             ffmpeg.run(stream,
                        overwrite_output=True,
                        capture_stdout=True,
                        capture_stderr=True)
 
+            shutil.move(temp_output, self.output_file)
+
+            # Registra o lote (e limpa os temporários dele)
+            self.journal.record_lot(self.lot, self.output_file)
+
             # Depois da concat final, progresso = 100%
             final_progress = 100
             time_elapsed = time.time() - self.start_time
             time_remaining = 0  # Já finalizamos
             self.progress.emit(final_progress, time_remaining)
 
-            # Limpar arquivos temporários
-            for i in range(total_files):
-                try:
-                    os.remove(f"temp_fade_{i}.mp4")
-                except:
-                    pass
-            try:
-                os.remove('concat_list.txt')
-            except:
-                pass
-
             self.finished.emit()
 
         except Exception as e:
             self.error.emit(str(e))
 
 
+# ==================================================
+# Planejamento dos cortes aleatórios (3 a 10s),
+# alinhados aos keyframes do vídeo.
+# ==================================================
+def plan_random_cuts(index, min_duration=3, max_duration=10):
+    """ Retorna a lista [(numero, inicio, duracao), ...] de todos os cortes. """
+    cuts = []
+    start_time = 0
+    segment_index = 1
+    duration = index.duration
+
+    # Enquanto não atingir o fim do vídeo
+    while start_time < duration:
+        # Define duração aleatória entre 3 e 10s e alinha o fim
+        # do corte a um keyframe (o próximo corte começa nele)
+        cut_duration = random.randint(min_duration, max_duration)
+        end_time = index.snap(start_time + cut_duration,
+                              low=start_time + min_duration,
+                              high=start_time + max_duration)
+        cut_duration = end_time - start_time
+
+        if end_time > duration:
+            end_time = duration
+            cut_duration = end_time - start_time
+
+        if cut_duration < min_duration:
+            break
+
+        cuts.append((segment_index, start_time, cut_duration))
+        start_time = end_time
+        segment_index += 1
+
+    return cuts
+
+
 # ==================================================
 # Thread para cortar vídeos em segmentos aleatórios
 # com "fast seeking" p/ acelerar ainda mais.
+# Os cortes são planejados antes e executados por
+# vários processos do FFmpeg ao mesmo tempo.
 # ==================================================
 class VideoProcessThread(QThread):
     progress = pyqtSignal(int)
     finished = pyqtSignal()
     error = pyqtSignal(str)
 
-    def __init__(self, input_file, output_dir):
+    def __init__(self, input_file, output_dir, workers=None):
         super().__init__()
         self.input_file = input_file
         self.output_dir = output_dir
+        # Quantidade de FFmpeg rodando ao mesmo tempo (1 = sequencial)
+        self.workers = workers or default_worker_count(input_file)
         self.is_running = True
 
     def stop(self):
         self.is_running = False
 
+    def cut_segment(self, segment_index, start_time, cut_duration):
+        if not self.is_running:
+            return
+
+        # O número do arquivo vem do plano, então a ordem de
+        # conclusão não altera a numeração
+        output_file = os.path.join(
+            self.output_dir, f"{segment_index:06d}.mp4")
+
+        # Para acelerar o corte:
+        # -ss antes de -i = fast seek
+        # -t para limitar a duração
+        # -c copy = sem reencode
+        (
+            ffmpeg
+            .input(self.input_file, ss=start_time)  # fast seek
+            .output(output_file, t=cut_duration, c='copy', **{'avoid_negative_ts': '1'})
+            .overwrite_output()
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+
     def run(self):
         try:
             if not self.is_running:
                 return
 
-            # Pega a duração total do vídeo
-            probe = ffmpeg.probe(self.input_file)
-            duration = float(probe['format']['duration'])
-
-            start_time = 0
-            segment_index = 1
-
-            # Enquanto não atingir o fim do vídeo
-            while start_time < duration:
-                if not self.is_running:
-                    self.finished.emit()
-                    return
-
-                # Define duração aleatória entre 3 e 10s
-                cut_duration = random.randint(3, 10)
-                end_time = start_time + cut_duration
-
-                if end_time > duration:
-                    end_time = duration
-                    cut_duration = end_time - start_time
-
-                if cut_duration < 3:
-                    break
-
-                output_file = os.path.join(
-                    self.output_dir, f"{segment_index:06d}.mp4")
-
-                # Para acelerar o corte:
-                # -ss antes de -i = fast seek
-                # -t para limitar a duração
-                # -c copy = sem reencode
-                (
-                    ffmpeg
-                    .input(self.input_file, ss=start_time)  # fast seek
-                    .output(output_file, t=cut_duration, c='copy', **{'avoid_negative_ts': '1'})
-                    .overwrite_output()
-                    .run(capture_stdout=True, capture_stderr=True)
-                )
+            # Índice de keyframes (duração + posição dos keyframes),
+            # reaproveitado do cache quando o vídeo já foi cortado antes
+            index = load_keyframe_index(self.input_file)
+            cuts = plan_random_cuts(index)
+            total_cuts = len(cuts)
 
-                # Atualiza progresso
-                progress = int((start_time / duration) * 100)
-                self.progress.emit(progress)
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = [executor.submit(self.cut_segment, *cut) for cut in cuts]
 
-                if not self.is_running:
-                    self.finished.emit()
-                    return
+                # Os cortes terminam fora de ordem; o progresso conta os concluídos
+                for done, future in enumerate(as_completed(futures), 1):
+                    # Parada ou erro: descarta os cortes ainda na fila e avisa
+                    # já (o `with` só espera os que estão em andamento)
+                    if not self.is_running:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        self.finished.emit()
+                        return
 
-                start_time = end_time
-                segment_index += 1
+                    try:
+                        future.result()
+                    except Exception as e:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        self.error.emit(str(e))
+                        return
+                    self.progress.emit(int((done / total_cuts) * 100))
 
             self.progress.emit(100)
             self.finished.emit()
@@ -382,6 +540,8 @@ class MainWindow(QMainWindow):
         self.chunks_list = []
         self.current_chunk_index = 0  # Qual lote está sendo renderizado agora
         self.chunk_size = 0           # Tamanho do lote (ex. 400)
+        self.smart_render = False     # Reencodar só o fade de cada vídeo
+        self.journal = None           # Diário da renderização em andamento
 
     # ----------------------------------------------
     # 1) Selecionar Vídeo para Corte
@@ -414,6 +574,18 @@ class MainWindow(QMainWindow):
         cut_folder = os.path.join(self.output_dir, f"{base_name}_cuts")
         os.makedirs(cut_folder, exist_ok=True)
 
+        # Quantos cortes rodam ao mesmo tempo (padrão: núcleos/tipo de disco)
+        workers, ok = QInputDialog.getInt(
+            self,
+            "Cortes Simultâneos",
+            "Quantidade de cortes simultâneos:",
+            default_worker_count(self.input_file),  # valor padrão
+            1,    # mínimo
+            64    # máximo
+        )
+        if not ok:
+            return
+
         self.progress_bar.setVisible(True)
         self.stop_btn.setVisible(True)
         self.progress_bar.setValue(0)
@@ -421,7 +593,7 @@ class MainWindow(QMainWindow):
         self.cut_btn.setEnabled(False)
         self.select_btn.setEnabled(False)
 
-        self.thread = VideoProcessThread(self.input_file, cut_folder)
+        self.thread = VideoProcessThread(self.input_file, cut_folder, workers)
         self.thread.progress.connect(self.update_cut_progress)
         self.thread.finished.connect(self.cutting_finished)
         self.thread.error.connect(self.show_error)
@@ -541,6 +713,19 @@ class MainWindow(QMainWindow):
         if not ok:
             return
 
+        # Renderização inteligente: só o último segundo (fade) é reencodado.
+        # Indicado quando todos os vídeos vêm da mesma fonte (ex.: cortes).
+        answer = QMessageBox.question(
+            self,
+            "Renderização Inteligente",
+            "Reencodar apenas o trecho final (fade) de cada vídeo?\n"
+            "Muito mais rápido e sem perda de qualidade, mas todos os "
+            "vídeos precisam ter o mesmo formato (ex.: cortes do mesmo vídeo).",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        self.smart_render = answer == QMessageBox.StandardButton.Yes
+
         # Ordena os arquivos (caso queira manter ordem)
         files.sort()
 
@@ -554,6 +739,10 @@ class MainWindow(QMainWindow):
         self.current_chunk_index = 0
         self.chunk_size = chunk_size
 
+        # Diário da renderização: a mesma seleção retoma o trabalho já feito
+        self.journal = RenderJournal.for_job(
+            files, chunk_size, {'smart_render': self.smart_render})
+
         # Desabilita botões
         self.progress_bar.setVisible(True)
         self.stop_btn.setVisible(True)
@@ -562,13 +751,17 @@ class MainWindow(QMainWindow):
         self.select_btn.setEnabled(False)
 
         # Inicia renderização do primeiro lote
-        self.status_label.setText("Iniciando renderização em lotes...")
+        if self.journal.has_progress():
+            self.status_label.setText("Retomando renderização interrompida...")
+        else:
+            self.status_label.setText("Iniciando renderização em lotes...")
         self.start_render_chunk()
 
     def start_render_chunk(self):
         """ Inicia a renderização do lote atual (self.current_chunk_index). """
         if self.current_chunk_index >= len(self.chunks_list):
             # Já renderizamos todos os lotes
+            self.journal.remove()
             self.status_label.setText(
                 "Renderização de todos os lotes concluída!")
             self.select_btn.setEnabled(True)
@@ -586,7 +779,10 @@ class MainWindow(QMainWindow):
                                    f"render{out_index:02d}.mp4")
 
         # Inicia thread com esse lote
-        self.render_thread = RenderThread(current_files, output_file)
+        self.render_thread = RenderThread(current_files, output_file,
+                                          smart_render=self.smart_render,
+                                          journal=self.journal,
+                                          lot=self.current_chunk_index)
         self.render_thread.progress.connect(self.update_render_progress)
         self.render_thread.finished.connect(self.chunk_finished)
         self.render_thread.error.connect(self.show_error)
@@ -3,10 +3,16 @@ from tkinter import ttk, filedialog, messagebox
 import os
 import random
 import datetime
+import multiprocessing
 from pathlib import Path
 from PIL import Image, ImageTk
 import sys
 
+# Permite reutilizar os módulos compartilhados de tools/ (raiz do projeto)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.image_engine import ConversionOptions, convert_batch
+
 
 def resource_path(relative_path):
     """ Obtém o caminho absoluto para o recurso """
@@ -185,36 +191,36 @@ class FileManagerApp:
             return
 
         try:
-            files_changed = 0
-            new_file_paths = []
-
-            for file_path in self.selected_files:
-                file = Path(file_path)
-                if file.suffix.lower() in self.image_extensions:
-                    try:
-                        # Abre a imagem com PIL
-                        with Image.open(file_path) as img:
-                            # Prepara o novo nome do arquivo
-                            new_name = file.with_suffix('.png')
-                            # Salva como PNG
-                            img.save(new_name, 'PNG')
-                            # Se salvou com sucesso, remove o arquivo original
-                            if new_name.exists():
-                                file.unlink()
-                                files_changed += 1
-                                new_file_paths.append(str(new_name))
-                    except Exception as e:
-                        messagebox.showerror(
-                            "Erro", f"Não foi possível converter {file.name}: {str(e)}")
-                        # Mantém o arquivo original na lista
-                        new_file_paths.append(file_path)
-                        continue
-                else:
-                    # Mantém arquivos não convertíveis na lista
-                    new_file_paths.append(file_path)
-
-            # Atualiza a lista de arquivos selecionados
-            self.selected_files = new_file_paths
+            # Converte em paralelo (um processo por núcleo); o original é
+            # removido quando o PNG é salvo
+            convertible = [
+                (file_path, str(Path(file_path).with_suffix('.png')))
+                for file_path in self.selected_files
+                if Path(file_path).suffix.lower() in self.image_extensions
+            ]
+            self.root.config(cursor="watch")
+            self.root.update_idletasks()
+            results = convert_batch(
+                convertible, ConversionOptions('png', remove_source=True))
+            self.root.config(cursor="")
+
+            converted = {
+                result.input_file: result.output_file
+                for result in results if not result.error
+            }
+            failed = [result for result in results if result.error]
+            files_changed = len(converted)
+
+            if failed:
+                details = "\n".join(
+                    f"{Path(result.input_file).name}: {result.error}" for result in failed[:10])
+                messagebox.showerror(
+                    "Erro", f"Não foi possível converter {len(failed)} arquivo(s):\n{details}")
+
+            # Atualiza a lista de arquivos selecionados (mantém os não convertidos)
+            self.selected_files = [
+                converted.get(file_path, file_path) for file_path in self.selected_files
+            ]
             self.update_files_listbox()
 
             if files_changed > 0:
@@ -295,4 +301,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Necessário para o pool de processos no executável (PyInstaller)
+    multiprocessing.freeze_support()
     main()
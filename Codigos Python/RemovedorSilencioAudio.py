@@ -1,11 +1,15 @@
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 from pydub import AudioSegment
-from pydub.silence import split_on_silence
 import os
+import sys
 import threading
 from datetime import datetime
 
+# Permite reutilizar os módulos compartilhados de tools/ (raiz do projeto)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools.silence_detector import decode_pcm, split_ranges, write_ranges
+
 class AudioProcessorGUI:
     def __init__(self, root):
         self.root = root
@@ -158,38 +162,36 @@ class AudioProcessorGUI:
             
             self.update_status("Carregando arquivo...", 10)
             
-            # Carrega o áudio
-            if input_file.lower().endswith('.mp3'):
-                audio = AudioSegment.from_mp3(input_file)
-            else:
-                audio = AudioSegment.from_wav(input_file)
-            
-            self.update_status("Detectando silêncio...", 30)
-            
-            # Processa o áudio
-            chunks = split_on_silence(
-                audio,
-                min_silence_len=int(self.silence_len.get()),
-                silence_thresh=int(self.silence_thresh.get()),
-                keep_silence=int(self.keep_silence.get())
-            )
-            
-            if not chunks:
-                messagebox.showwarning("Aviso", "Nenhum trecho de áudio detectado! Tente ajustar os parâmetros.")
-                self.update_status("Pronto para processar", 0)
-                return
-            
-            self.update_status("Combinando áudio...", 60)
-            
-            # Combina os chunks
-            combined = chunks[0]
-            for chunk in chunks[1:]:
-                combined += chunk
-            
-            self.update_status("Salvando arquivo...", 80)
-            
-            # Salva o resultado
-            combined.export(output_file, format=ext[1:])
+            ffmpeg_exe = os.path.join(self.FFMPEG_PATH, "ffmpeg.exe")
+            ffprobe_exe = os.path.join(self.FFMPEG_PATH, "ffprobe.exe")
+            
+            # Decodifica o áudio para um arquivo temporário mapeado em memória
+            with decode_pcm(input_file, ffmpeg_path=ffmpeg_exe, ffprobe_path=ffprobe_exe) as audio:
+                self.update_status("Detectando silêncio...", 30)
+                
+                # Processa o áudio (detecção vetorizada, mesmos trechos do split_on_silence)
+                ranges = split_ranges(
+                    audio,
+                    min_silence_len=int(self.silence_len.get()),
+                    silence_thresh=int(self.silence_thresh.get()),
+                    keep_silence=int(self.keep_silence.get())
+                )
+                
+                if not ranges:
+                    messagebox.showwarning("Aviso", "Nenhum trecho de áudio detectado! Tente ajustar os parâmetros.")
+                    self.update_status("Pronto para processar", 0)
+                    return
+                
+                # Grava os trechos mantidos direto da origem, sem juntar em memória
+                write_ranges(
+                    audio,
+                    ranges,
+                    output_file,
+                    ffmpeg_path=ffmpeg_exe,
+                    progress_callback=lambda percent: self.update_status(
+                        "Salvando arquivo...", 60 + percent * 0.4
+                    )
+                )
             
             self.update_status("Concluído com sucesso!", 100)
             messagebox.showinfo("Sucesso", 
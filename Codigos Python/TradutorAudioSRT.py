@@ -1,13 +1,18 @@
+import multiprocessing
 import sys, os
-import textwrap
-import io
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QPushButton, QFileDialog,
     QVBoxLayout, QLabel, QProgressBar, QTextEdit, QComboBox, QLineEdit
 )
 from PyQt5.QtCore import QThread, pyqtSignal
-from pydub import AudioSegment, silence
-import speech_recognition as sr
+from pydub import AudioSegment
+
+# Permite reutilizar os módulos compartilhados de tools/ (raiz do projeto)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools.silence_detector import PcmAudio, detect_nonsilent
+from tools.subtitle_cues import build_subtitles, plan_batches
+from tools.transcription import GoogleBackend, VoskBackend, make_chunks, transcribe
+from tools.transcription_cache import TranscriptionCache
 
 # Configuração para localizar o ffmpeg.exe
 if getattr(sys, 'frozen', False):
@@ -33,30 +38,19 @@ def format_timestamp(ms):
     milliseconds = int(ms % 1000)
     return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
 
-def split_text_into_chunks(text, max_line_length=35):
-    """
-    Divide o texto em blocos de uma única linha com no máximo max_line_length caracteres.
-    Não corta palavras (exceto se uma palavra for maior que o limite).
-    """
-    chunks = textwrap.wrap(
-        text,
-        width=max_line_length,
-        break_long_words=False,
-        break_on_hyphens=False
-    )
-    return chunks
-
 class SubtitleWorker(QThread):
     # Sinais para atualizar a interface
     progress = pyqtSignal(int)     # Emite o progresso em porcentagem
     log = pyqtSignal(str)          # Emite mensagens de log
     finished = pyqtSignal(str)     # Emite o caminho do arquivo SRT gerado (ou string vazia em caso de erro)
 
-    def __init__(self, audio_file, language, parent=None):
+    def __init__(self, audio_file, language, backend=None, parent=None):
         super().__init__(parent)
         self.audio_file = audio_file
         # Código do idioma para reconhecimento (ex: "pt-BR", "en-US", etc.)
         self.language = language
+        # Reconhecedor: Google (online) por padrão ou Vosk (offline)
+        self.backend = backend or GoogleBackend()
         # Define o caminho do arquivo SRT para ser salvo na mesma pasta do áudio, usando o mesmo nome base
         directory = os.path.dirname(self.audio_file)
         base_name = os.path.splitext(os.path.basename(self.audio_file))[0]
@@ -65,7 +59,8 @@ class SubtitleWorker(QThread):
     def run(self):
         # Carrega o arquivo de áudio
         try:
-            audio = AudioSegment.from_file(self.audio_file)
+            # Mono 16 kHz: é o que os reconhecedores usam (e deixa o envio menor)
+            audio = AudioSegment.from_file(self.audio_file).set_channels(1).set_frame_rate(16000)
             self.log.emit("Áudio carregado com sucesso.")
         except Exception as e:
             self.log.emit(f"Erro ao carregar o arquivo de áudio: {e}")
@@ -73,55 +68,39 @@ class SubtitleWorker(QThread):
             return
 
         # Detecta os intervalos de fala (não-silêncio)
-        nonsilent_ranges = silence.detect_nonsilent(
-            audio, min_silence_len=700, silence_thresh=-40)
+        pcm = PcmAudio.from_segment(audio)
+        nonsilent_ranges = detect_nonsilent(pcm, min_silence_len=700, silence_thresh=-40)
         if not nonsilent_ranges:
             nonsilent_ranges = [[0, len(audio)]]
             self.log.emit("Nenhum silêncio detectado; o áudio será processado como um único segmento.")
         else:
             self.log.emit(f"Foram encontrados {len(nonsilent_ranges)} segmentos de fala.")
 
-        recognizer = sr.Recognizer()
-        subtitles = []
-        total_segments = len(nonsilent_ranges)
-        subtitle_counter = 1  # Contador para a numeração dos blocos SRT
-
-        # Processa cada segmento de fala
-        for seg_index, (start_ms, end_ms) in enumerate(nonsilent_ranges, start=1):
-            segment = audio[start_ms:end_ms]
-
-            # Exporta o segmento para um buffer em memória (BytesIO) para agilizar o processamento
-            buffer = io.BytesIO()
-            segment.export(buffer, format="wav")
-            buffer.seek(0)
-
-            # Realiza o reconhecimento de fala usando o áudio do buffer
-            with sr.AudioFile(buffer) as source:
-                audio_data = recognizer.record(source)
-                try:
-                    text = recognizer.recognize_google(audio_data, language=self.language)
-                except Exception as e:
-                    text = "[Erro de reconhecimento ou áudio sem fala]"
-                    self.log.emit(f"Segmento {seg_index}: {e}")
-
-            # Divide o texto reconhecido em blocos de uma única linha com no máximo 35 caracteres
-            chunks = split_text_into_chunks(text, max_line_length=35)
-
-            # Se houver mais de um bloco, divide igualmente o tempo do segmento entre eles
-            num_chunks = len(chunks)
-            segment_duration = end_ms - start_ms
-            for i, chunk in enumerate(chunks):
-                chunk_start = start_ms + int(i * segment_duration / num_chunks)
-                chunk_end = start_ms + int((i + 1) * segment_duration / num_chunks)
-                start_timestamp = format_timestamp(chunk_start)
-                end_timestamp = format_timestamp(chunk_end)
-                subtitle_block = f"{subtitle_counter}\n{start_timestamp} --> {end_timestamp}\n{chunk}\n"
-                subtitles.append(subtitle_block)
-                subtitle_counter += 1
-
-            # Atualiza o progresso (por segmento processado)
-            progress_value = int((seg_index / total_segments) * 100)
-            self.progress.emit(progress_value)
+        # Junta as falas em trechos de até 30 s (menos requisições ao reconhecedor)
+        batches = plan_batches(nonsilent_ranges, audio=pcm)
+        self.log.emit(f"{len(batches)} trechos serão enviados ao reconhecimento.")
+
+        # Reconhece os trechos em paralelo (threads no Google, processos no Vosk)
+        results = transcribe(
+            make_chunks(pcm, batches),
+            self.backend,
+            self.language,
+            total=len(batches),
+            progress_callback=self.progress.emit,
+            # Refazer as legendas do mesmo áudio não envia os trechos de novo
+            cache=TranscriptionCache()
+        )
+        for seg_index, result in enumerate(results, start=1):
+            if result.error:
+                self.log.emit(f"Trecho {seg_index}: {result.error}")
+
+        # Legendas de uma linha (35 caracteres), com o tempo acompanhando as falas
+        cues = build_subtitles(results, nonsilent_ranges, max_line_length=35, max_lines=1)
+        subtitles = [
+            f"{number}\n{format_timestamp(cue['start'] * 1000)} --> "
+            f"{format_timestamp(cue['end'] * 1000)}\n{cue['text']}\n"
+            for number, cue in enumerate(cues, start=1)
+        ]
 
         # Salva as legendas no arquivo SRT
         try:
@@ -172,6 +151,14 @@ class MainWindow(QMainWindow):
         self.language_input.setEnabled(False)
         layout.addWidget(self.language_input)
 
+        # Mecanismo de reconhecimento (o Vosk funciona sem internet)
+        self.engine_label = QLabel("Reconhecimento:")
+        layout.addWidget(self.engine_label)
+        self.engine_combo = QComboBox()
+        self.engine_combo.addItems(["Google (online)", "Vosk (offline)"])
+        layout.addWidget(self.engine_combo)
+        self.vosk_model_path = None
+
         # Barra de progresso
         self.progress_bar = QProgressBar()
         self.progress_bar.setValue(0)
@@ -229,7 +216,20 @@ class MainWindow(QMainWindow):
         else:
             lang_code = mapping.get(selected, "pt-BR")
         self.log_text.append(f"Idioma selecionado: {selected} ({lang_code})")
-        self.worker = SubtitleWorker(audio_file, lang_code)
+
+        backend = GoogleBackend()
+        if self.engine_combo.currentText().startswith("Vosk"):
+            if not self.vosk_model_path:
+                # O modelo define o idioma reconhecido (ex: vosk-model-small-pt-0.3)
+                self.vosk_model_path = QFileDialog.getExistingDirectory(
+                    self, "Selecionar Pasta do Modelo Vosk", "")
+            if not self.vosk_model_path:
+                self.log_text.append("Selecione a pasta do modelo Vosk para o reconhecimento offline.")
+                return
+            backend = VoskBackend(self.vosk_model_path)
+            self.log_text.append(f"Reconhecimento offline com o modelo: {self.vosk_model_path}")
+
+        self.worker = SubtitleWorker(audio_file, lang_code, backend)
         self.worker.progress.connect(self.update_progress)
         self.worker.log.connect(self.append_log)
         self.worker.finished.connect(self.processing_finished)
@@ -249,6 +249,9 @@ class MainWindow(QMainWindow):
         self.worker = None
 
 if __name__ == "__main__":
+    # VoskBackend usa processos: no executável congelado (Windows) os filhos
+    # precisam parar aqui em vez de abrir outra janela
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
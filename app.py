@@ -1,5 +1,7 @@
 from flask import Flask, render_template, jsonify, request
 import webview
+import multiprocessing
+import os
 import threading
 from tools import (
     image_converter,
@@ -9,9 +11,14 @@ from tools import (
     subtitle_generator,
     folder_creator
 )
+from tools.job_runner import CPU, DISK, DONE, NETWORK, PRIORITY_NORMAL, call_job, get_job_runner
+from tools.job_store import DEFAULT_STORE_PATH
 
 app = Flask(__name__)
 
+# A API web roda em outro processo que a interface Qt, com sua própria fila em disco
+WEB_JOBS_PATH = os.path.join(os.path.dirname(DEFAULT_STORE_PATH), "web_jobs.sqlite")
+
 class Api:
     def __init__(self):
         self.window = None
@@ -64,6 +71,73 @@ def reset_progress():
 def get_progress():
     return jsonify(progress_data)
 
+def submit_job(title, function, *args, resource=CPU, **kwargs):
+    """Coloca a tarefa na fila do agendador, com a prioridade pedida no formulário."""
+    priority = int(request.form.get('priority', PRIORITY_NORMAL))
+    return get_job_runner(WEB_JOBS_PATH).submit(
+        title, function, *args, resource=resource, priority=priority, **kwargs
+    )
+
+def run_job(title, function, *args, resource=CPU, message="", **kwargs):
+    """
+    Agenda a tarefa e espera terminar. Com `async=1` no formulário, retorna
+    o id da tarefa na hora (acompanhe em /jobs/<id>).
+    """
+    job = submit_job(title, function, *args, resource=resource, **kwargs)
+    if request.form.get('async'):
+        return jsonify({"success": True, "job_id": job.id})
+
+    job.wait()
+    if job.state == DONE:
+        return jsonify({"success": True, "message": message})
+    return jsonify({"success": False, "error": job.message or "Tarefa cancelada"})
+
+@app.route('/jobs')
+def list_jobs():
+    return jsonify([job.to_dict() for job in get_job_runner(WEB_JOBS_PATH).jobs])
+
+@app.route('/jobs/<int:job_id>')
+def get_job(job_id):
+    job = get_job_runner(WEB_JOBS_PATH).get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Tarefa não encontrada"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    runner = get_job_runner(WEB_JOBS_PATH)
+    job = runner.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Tarefa não encontrada"}), 404
+    runner.cancel(job)
+    return jsonify({"success": True})
+
+@app.route('/jobs/<int:job_id>/priority', methods=['POST'])
+def set_job_priority(job_id):
+    runner = get_job_runner(WEB_JOBS_PATH)
+    job = runner.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Tarefa não encontrada"}), 404
+    try:
+        runner.set_priority(job, int(request.form.get('priority', PRIORITY_NORMAL)))
+    except ValueError:
+        return jsonify({"success": False, "error": "Prioridade inválida"})
+    return jsonify({"success": True})
+
+def download_videos_job(ctx, query, path, limit):
+    """Tarefa do download pela API web, publicando o progresso em /download-progress."""
+    def update_progress(current, total, message):
+        global progress_data
+        progress_data['current'] = current
+        progress_data['total'] = total
+        progress_data['message'] = message
+        ctx.status(message)
+        if total:
+            ctx.progress(current * 100 // total)
+
+    return pexels_downloader.download_videos(query, path, limit, progress_callback=update_progress,
+                                             should_stop=ctx.cancelled)
+
 @app.route('/download-video', methods=['POST'])
 def download_video():
     try:
@@ -83,15 +157,16 @@ def download_video():
             except ValueError:
                 return jsonify({"success": False, "error": "O limite deve ser um número válido"})
 
-        # Função de callback para atualizar o progresso
-        def update_progress(current, total, message):
-            global progress_data
-            progress_data['current'] = current
-            progress_data['total'] = total
-            progress_data['message'] = message
+        # Inicia o download na fila de rede do agendador
+        job = submit_job(f"Pexels: {query}", download_videos_job, query, path, limit, resource=NETWORK)
+        if request.form.get('async'):
+            return jsonify({"success": True, "job_id": job.id})
 
-        # Inicia o download com o callback de progresso
-        result = pexels_downloader.download_videos(query, path, limit, progress_callback=update_progress)
+        job.wait()
+        if job.state != DONE:
+            reset_progress()
+            return jsonify({"success": False, "error": job.message or "Download cancelado"})
+        result = job.result
         
         # Após o download, reseta o progresso
         if result.get('success'):
@@ -111,8 +186,14 @@ def convert_images():
     try:
         source = request.form.get('source')
         target = request.form.get('target')
-        image_converter.convert_images(source, target)
-        return jsonify({"success": True, "message": "Imagens convertidas com sucesso!"})
+        return run_job(
+            f"Converter imagens: {source}",
+            call_job, "tools.image_converter:convert_images", source, target,
+            # Incremental: só converte o que mudou desde a última execução
+            incremental=bool(request.form.get('incremental')),
+            prune=bool(request.form.get('prune')),
+            message="Imagens convertidas com sucesso!"
+        )
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
@@ -121,8 +202,11 @@ def cut_video():
     try:
         path = request.form.get('path')
         duration = int(request.form.get('duration', 10))  # default 10 segundos
-        video_cutter.cut_videos(path, duration)
-        return jsonify({"success": True, "message": "Vídeos cortados com sucesso!"})
+        return run_job(
+            f"Cortar vídeos: {path}",
+            call_job, "tools.video_cutter:cut_videos", path, duration,
+            message="Vídeos cortados com sucesso!"
+        )
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
@@ -130,8 +214,11 @@ def cut_video():
 def remove_silence():
     try:
         file_path = request.form.get('file')
-        silence_remover.remove_silence(file_path)
-        return jsonify({"success": True, "message": "Silêncio removido com sucesso!"})
+        return run_job(
+            f"Remover silêncio: {file_path}",
+            call_job, "tools.silence_remover:remove_silence", file_path,
+            message="Silêncio removido com sucesso!"
+        )
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
@@ -139,8 +226,12 @@ def remove_silence():
 def generate_subtitles():
     try:
         video_path = request.form.get('video')
-        subtitle_generator.generate_srt(video_path)
-        return jsonify({"success": True, "message": "Legendas geradas com sucesso!"})
+        return run_job(
+            f"Legendas: {video_path}",
+            call_job, "tools.subtitle_generator:generate_srt", video_path,
+            resource=NETWORK,
+            message="Legendas geradas com sucesso!"
+        )
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
@@ -148,8 +239,12 @@ def generate_subtitles():
 def create_folders():
     try:
         base_path = request.form.get('path')
-        folder_creator.create_month_folders(base_path)
-        return jsonify({"success": True, "message": "Pastas criadas com sucesso!"})
+        return run_job(
+            f"Criar pastas: {base_path}",
+            call_job, "tools.folder_creator:create_month_folders", base_path,
+            resource=DISK,
+            message="Pastas criadas com sucesso!"
+        )
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
@@ -157,6 +252,12 @@ def start_server():
     app.run(port=5000)
 
 if __name__ == '__main__':
+    # Necessário para os pools de processos no executável (PyInstaller)
+    multiprocessing.freeze_support()
+
+    # Retoma as tarefas que ficaram na fila da última execução
+    get_job_runner(WEB_JOBS_PATH)
+
     # Inicia o servidor Flask em uma thread separada
     t = threading.Thread(target=start_server, daemon=True)
     t.start()
@@ -177,3 +278,6 @@ if __name__ == '__main__':
     
     api.set_window(window)
     webview.start()
+
+    # Janela fechada: interrompe as tarefas (a fila continua gravada)
+    get_job_runner(WEB_JOBS_PATH).shutdown()
@@ -0,0 +1,87 @@
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QApplication
+
+from tools.job_runner import DONE, FAILED, QUEUED, RUNNING, JobRunner
+from tools.job_store import JobStore
+
+JOB_COUNT = 200
+
+
+def noop_job(ctx, value):
+    return value
+
+
+def slow_job(ctx):
+    while not ctx.cancelled():
+        time.sleep(0.01)
+
+
+def test_finished_reaches_late_connections():
+    """Sinais conectados logo depois do submit() (como nas telas) não se perdem."""
+    app = QApplication.instance() or QApplication(sys.argv)
+    runner = JobRunner()
+    received = []
+
+    for i in range(JOB_COUNT):
+        job = runner.submit(f"Tarefa {i}", noop_job, i)
+        job.finished.connect(received.append)
+
+    QTimer.singleShot(10000, app.quit)  # Limite, caso algo trave
+    timer = QTimer()
+    timer.timeout.connect(lambda: len(received) == JOB_COUNT and app.quit())
+    timer.start(10)
+    app.exec()
+    runner.shutdown()
+
+    assert sorted(received) == list(range(JOB_COUNT))
+
+
+def test_restore_fails_interrupted_jobs():
+    """Tarefa que estava executando não roda de novo sozinha; a da fila sim."""
+    app = QApplication.instance() or QApplication(sys.argv)
+    path = os.path.join(tempfile.mkdtemp(), "jobs.sqlite")
+    store = JobStore(path)
+    interrupted = store.add("Interrompida", "test_job_runner:noop_job", [1], {}, "cpu", 5, RUNNING)
+    waiting = store.add("Na fila", "test_job_runner:noop_job", [2], {}, "cpu", 5, QUEUED)
+
+    runner = JobRunner(JobStore(path))
+    runner.restore()
+    QTimer.singleShot(10000, app.quit)
+    timer = QTimer()
+    timer.timeout.connect(lambda: runner.get(waiting).state == DONE and app.quit())
+    timer.start(10)
+    app.exec()
+    runner.shutdown()
+
+    assert runner.get(interrupted).state == FAILED
+    assert runner.get(waiting).state == DONE
+
+
+def test_shutdown_saves_cancelled_jobs():
+    """Tarefa interrompida ao fechar fica gravada como cancelada, não como executando."""
+    app = QApplication.instance() or QApplication(sys.argv)
+    path = os.path.join(tempfile.mkdtemp(), "jobs.sqlite")
+    runner = JobRunner(JobStore(path))
+    job = runner.submit("Lenta", slow_job)
+    QTimer.singleShot(10000, app.quit)
+    timer = QTimer()
+    timer.timeout.connect(lambda: job.state == RUNNING and app.quit())
+    timer.start(10)
+    app.exec()
+    runner.shutdown()
+
+    assert JobStore(path).pending((QUEUED, RUNNING)) == []
+
+
+if __name__ == "__main__":
+    test_finished_reaches_late_connections()
+    test_restore_fails_interrupted_jobs()
+    test_shutdown_saves_cancelled_jobs()
+    print(f"OK: {JOB_COUNT} sinais 'finished' recebidos")
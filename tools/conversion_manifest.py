@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+from dataclasses import asdict
+from typing import Dict, List, Tuple
+
+from tools.image_engine import ConversionOptions, ConversionResult
+
+MANIFEST_NAME = ".conversion_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def file_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    hasher = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _source_key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _params(options: ConversionOptions) -> dict:
+    # Apagar o original não muda o arquivo gerado
+    params = asdict(options)
+    params.pop('remove_source', None)
+    return params
+
+
+class ConversionManifest:
+    """
+    Registro (JSON na pasta de saída) do que já foi convertido: origem,
+    tamanho, data de modificação, hash do conteúdo, parâmetros e arquivo
+    gerado. Permite reconverter só as imagens novas ou alteradas.
+    """
+
+    def __init__(self, output_folder: str):
+        self.output_folder = output_folder
+        self.path = os.path.join(output_folder, MANIFEST_NAME)
+        self.entries: Dict[str, dict] = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError):
+            pass
+
+    def is_current(self, source: str, output_file: str, options: ConversionOptions) -> bool:
+        """A saída existe e veio desta origem, sem alterações, com os mesmos parâmetros."""
+        entry = self.entries.get(_source_key(source))
+        if entry is None or entry['params'] != _params(options) or entry['output'] != output_file:
+            return False
+        if not os.path.exists(output_file):
+            return False
+
+        stat = os.stat(source)
+        if entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return True
+        if entry['size'] != stat.st_size:
+            return False
+
+        # Data mudou mas o tamanho não (cópia, restauração): confere o conteúdo
+        if file_hash(source) != entry['hash']:
+            return False
+        entry['mtime_ns'] = stat.st_mtime_ns
+        return True
+
+    def record(self, result: ConversionResult, options: ConversionOptions):
+        stat = os.stat(result.input_file)
+        self.entries[_source_key(result.input_file)] = {
+            'source': result.input_file,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'hash': file_hash(result.input_file),
+            'params': _params(options),
+            'output': result.output_file,
+        }
+
+    def prune(self) -> List[str]:
+        """Apaga as saídas cujas imagens de origem não existem mais. Retorna os arquivos apagados."""
+        removed = []
+        for key, entry in list(self.entries.items()):
+            if os.path.exists(entry['source']):
+                continue
+            if os.path.exists(entry['output']):
+                os.remove(entry['output'])
+                removed.append(entry['output'])
+            del self.entries[key]
+        return removed
+
+    def save(self):
+        data = {'version': MANIFEST_VERSION, 'entries': self.entries}
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            # Troca atômica: uma execução interrompida não corrompe o registro
+            os.replace(temp_path, self.path)
+        except OSError:
+            pass  # Sem permissão de escrita: apenas não guarda o registro
+
+
+def plan_incremental(files: List[Tuple[str, str]], manifest: ConversionManifest,
+                     options: ConversionOptions) -> Tuple[List[Tuple[str, str]], int]:
+    """Separa os pares (entrada, saída) que precisam ser convertidos. Retorna (pendentes, pulados)."""
+    pending = [(source, output) for source, output in files
+               if not manifest.is_current(source, output, options)]
+    return pending, len(files) - len(pending)
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from tools.file_transfer import COPY, TransferCancelled, transfer_file
+from tools.system_info import is_rotational
+
+# Transferências simultâneas no total
+COPY_WORKERS = 4
+
+# Transferências simultâneas por disco: um HD com várias cópias ao mesmo
+# tempo só fica pulando entre elas; SSD/NVMe rende mais com várias filas
+ROTATIONAL_CONCURRENCY = 1
+SSD_CONCURRENCY = 4
+DEVICE_CONCURRENCY = 2   # quando não dá para saber o tipo do disco
+
+# Intervalo mínimo entre avisos de progresso (segundos)
+PROGRESS_INTERVAL = 0.25
+
+
+@dataclass
+class CopyTask:
+    src: str
+    dst: str
+    size: int = 0
+    strategy: Optional[str] = None   # preenchida quando termina
+    error: Optional[str] = None
+
+
+def _device(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        return None
+
+
+def device_concurrency(path: str) -> int:
+    """Transferências simultâneas para o disco de `path`, conforme o tipo."""
+    rotational = is_rotational(path)
+    if rotational is None:
+        return DEVICE_CONCURRENCY
+    return ROTATIONAL_CONCURRENCY if rotational else SSD_CONCURRENCY
+
+
+def copy_files(tasks: Iterable[CopyTask], mode: str = COPY, workers: int = COPY_WORKERS,
+               per_device: Optional[int] = None,
+               progress_callback: Optional[Callable[[int, int], None]] = None,
+               result_callback: Optional[Callable[[CopyTask], None]] = None,
+               should_stop: Optional[Callable[[], bool]] = None) -> List[CopyTask]:
+    """
+    Transfere os arquivos em paralelo (`workers` ao mesmo tempo), com uma
+    fila por par de discos (origem, destino) e no máximo `per_device`
+    transferências usando o mesmo disco (sem ele: 1 em HD, mais em SSD,
+    veja device_concurrency). `progress_callback(bytes feitos,
+    bytes totais)` é chamado de tempos em tempos; `result_callback` a cada
+    arquivo concluído (com `strategy` ou `error`), um de cada vez. Ao cancelar, as
+    transferências em andamento são abortadas sem deixar arquivos pela
+    metade. Retorna as tarefas concluídas ou com erro.
+    """
+    tasks = list(tasks)
+    total_bytes = sum(task.size for task in tasks)
+
+    # Fila por (disco de origem, disco de destino)
+    queues: Dict[Tuple, List[CopyTask]] = {}
+    limits: Dict[Optional[int], int] = {}
+    for task in tasks:
+        dst_dir = os.path.dirname(task.dst)
+        key = (_device(task.src), _device(dst_dir))
+        queues.setdefault(key, []).append(task)
+        for device, path in zip(key, (task.src, dst_dir)):
+            if device not in limits:
+                limits[device] = per_device or device_concurrency(path)
+    for queue in queues.values():
+        queue.reverse()  # pop() do fim mantém a ordem original
+
+    busy: Counter = Counter()
+    condition = threading.Condition()
+    finished: List[CopyTask] = []
+    done_bytes = 0
+    last_report = 0.0
+
+    def stopped() -> bool:
+        return bool(should_stop and should_stop())
+
+    def take() -> Optional[Tuple[Tuple, CopyTask]]:
+        # Com o lock: primeira fila cujos discos estão com vaga (depois ela
+        # vai para o fim, alternando entre os pares de discos)
+        for key in list(queues):
+            devices = set(key)
+            if all(busy[device] < limits[device] for device in devices):
+                queue = queues.pop(key)
+                task = queue.pop()
+                if queue:
+                    queues[key] = queue
+                for device in devices:
+                    busy[device] += 1
+                return key, task
+        return None
+
+    def progress(count: int):
+        nonlocal done_bytes, last_report
+        with condition:
+            done_bytes += count
+            now = time.monotonic()
+            if not progress_callback or now - last_report < PROGRESS_INTERVAL:
+                return
+            last_report = now
+            done = done_bytes
+        progress_callback(done, total_bytes)
+
+    def worker():
+        while True:
+            with condition:
+                picked = None
+                while queues and not stopped():
+                    picked = take()
+                    if picked is not None:
+                        break
+                    condition.wait(PROGRESS_INTERVAL)
+                if picked is None:
+                    return
+            key, task = picked
+
+            try:
+                task.strategy = transfer_file(task.src, task.dst, mode, progress, stopped)
+            except TransferCancelled:
+                task = None
+            except OSError as e:
+                task.error = str(e)
+            finally:
+                with condition:
+                    for device in set(key):
+                        busy[device] -= 1
+                    condition.notify_all()
+
+            if task is not None:
+                with condition:
+                    finished.append(task)
+                    if result_callback:
+                        result_callback(task)
+
+    workers = max(1, min(workers, len(tasks)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(worker) for _ in range(workers)]
+    for future in futures:
+        future.result()  # Repassa erros inesperados das threads
+
+    if progress_callback and not stopped():
+        progress_callback(done_bytes, total_bytes)
+    return finished
@@ -0,0 +1,125 @@
+import hashlib
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set
+
+# Bytes lidos do começo e do fim de cada arquivo na segunda etapa
+EDGE_BYTES = 64 * 1024
+
+# Leituras simultâneas ao calcular os hashes
+HASH_WORKERS = 8
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def edge_hash(path: str, size: int) -> str:
+    """Hash do primeiro e do último bloco de EDGE_BYTES (o arquivo todo, se for pequeno)."""
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        hasher.update(f.read(EDGE_BYTES))
+        if size > 2 * EDGE_BYTES:
+            f.seek(-EDGE_BYTES, os.SEEK_END)
+        hasher.update(f.read(EDGE_BYTES))
+    return hasher.hexdigest()
+
+
+def full_hash(path: str) -> str:
+    hasher = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _refine(groups: List[List[str]], key: Callable[[str], str], workers: int,
+            should_stop: Optional[Callable[[], bool]],
+            keys: Optional[Dict[str, Optional[str]]] = None) -> List[List[str]]:
+    """
+    Divide cada grupo pelo valor de `key` (calculado em paralelo); descarta
+    os que ficam sozinhos. `keys` traz valores já conhecidos e recebe os
+    calculados.
+    """
+    keys = {} if keys is None else keys
+    paths = [path for group in groups for path in group if keys.get(path) is None]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for path, value in zip(paths, executor.map(_safe(key), paths)):
+            if should_stop and should_stop():
+                executor.shutdown(cancel_futures=True)
+                return []
+            keys[path] = value
+
+    refined = []
+    for group in groups:
+        buckets: Dict[str, List[str]] = defaultdict(list)
+        for path in group:
+            if keys.get(path) is not None:
+                buckets[keys[path]].append(path)
+        refined.extend(bucket for bucket in buckets.values() if len(bucket) > 1)
+    return refined
+
+
+def _safe(function: Callable[[str], str]) -> Callable[[str], Optional[str]]:
+    # Arquivo ilegível (apagado, sem permissão) não é duplicado de ninguém
+    def wrapper(path):
+        try:
+            return function(path)
+        except OSError:
+            return None
+    return wrapper
+
+
+def find_duplicates(paths: List[str], workers: int = HASH_WORKERS,
+                    status_callback: Optional[Callable[[str], None]] = None,
+                    should_stop: Optional[Callable[[], bool]] = None,
+                    index=None) -> Set[str]:
+    """
+    Arquivos com conteúdo igual ao de outro que aparece antes em `paths`
+    (o primeiro de cada grupo é mantido). Em etapas, lendo o mínimo:
+    tamanho; começo e fim do arquivo; hash completo (BLAKE2) só para os que
+    continuam empatados. Com um `HashIndex` (tools.hash_index), os hashes
+    de execuções anteriores são reaproveitados e os novos ficam guardados.
+    """
+    order = {path: index for index, path in enumerate(paths)}
+
+    # 1) Tamanho: arquivo com tamanho único não tem duplicado
+    if status_callback:
+        status_callback("Duplicados: agrupando por tamanho...")
+    by_size: Dict[int, List[str]] = defaultdict(list)
+    for path in paths:
+        try:
+            by_size[os.path.getsize(path)].append(path)
+        except OSError:
+            continue
+    candidates = {size: group for size, group in by_size.items() if len(group) > 1}
+
+    # Vazios são todos iguais; pequenos são lidos inteiros já na etapa 2
+    confirmed = [candidates.pop(0)] if 0 in candidates else []
+    small = [group for size, group in candidates.items() if size <= 2 * EDGE_BYTES]
+    large = [group for size, group in candidates.items() if size > 2 * EDGE_BYTES]
+
+    # 2) Começo e fim do arquivo
+    if status_callback:
+        status_callback(f"Duplicados: comparando {sum(map(len, small + large))} arquivos de mesmo tamanho...")
+    sizes = {path: size for size, group in candidates.items() for path in group}
+    indexed = index.load(sizes) if index is not None else {}
+    edges = {path: file.edge for path, file in indexed.items()}
+    digests = {path: file.digest for path, file in indexed.items()}
+    confirmed += _refine(small, lambda path: edge_hash(path, sizes[path]), workers, should_stop, edges)
+    large = _refine(large, lambda path: edge_hash(path, sizes[path]), workers, should_stop, edges)
+
+    # 3) Hash completo só para quem continua empatado
+    if status_callback:
+        status_callback(f"Duplicados: conferindo {sum(map(len, large))} arquivos por inteiro...")
+    confirmed += _refine(large, full_hash, workers, should_stop, digests)
+
+    if indexed:
+        for path, file in indexed.items():
+            file.edge, file.digest = edges.get(path), digests.get(path)
+        index.save(indexed.values())
+
+    duplicates = set()
+    for group in confirmed:
+        group.sort(key=order.get)
+        duplicates.update(group[1:])
+    return duplicates
@@ -0,0 +1,392 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tools.dedup import full_hash
+
+# Downloads simultâneos (e conexões mantidas abertas no pool da sessão)
+DOWNLOAD_WORKERS = 4
+
+# Bytes lidos por vez da resposta
+CHUNK_SIZE = 256 * 1024
+
+# Conexão e leitura (segundos sem receber dados)
+TIMEOUT = (5, 30)
+
+# Intervalo mínimo entre avisos de progresso (segundos)
+PROGRESS_INTERVAL = 0.25
+
+# Arquivos a partir deste tamanho são baixados em trechos paralelos (se o
+# servidor aceitar Range)
+SPLIT_THRESHOLD = 64 * 1024 * 1024
+SPLIT_PARTS = 4
+
+# Download em andamento e o estado dele (para continuar de onde parou)
+PART_SUFFIX = ".part"
+STATE_SUFFIX = ".part.json"
+
+# Intervalo mínimo entre gravações do estado (segundos)
+STATE_INTERVAL = 1.0
+
+
+class DownloadCancelled(Exception):
+    """Download interrompido por `should_stop` (o .part fica para continuar depois)."""
+
+
+@dataclass
+class DownloadTask:
+    url: str
+    path: str
+    result: Optional[str] = None        # arquivo final (outro, se o conteúdo já existia)
+    error: Optional[Exception] = None
+    size: int = 0                       # tamanho informado pelo servidor
+    done: int = 0                       # bytes recebidos
+
+    @property
+    def duplicate(self) -> bool:
+        return self.result is not None and self.result != self.path
+
+
+def create_session(workers: int = DOWNLOAD_WORKERS) -> requests.Session:
+    """Sessão com um pool de conexões reaproveitadas por todos os downloads."""
+    session = requests.Session()
+    # Cada download pode abrir SPLIT_PARTS conexões (arquivos grandes)
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers * SPLIT_PARTS)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class _RangeIgnored(Exception):
+    """O servidor devolveu o arquivo inteiro (mudou ou não aceita Range): recomeça do zero."""
+
+
+class _PartState:
+    """
+    Estado de um download em andamento, num JSON ao lado do .part: URL,
+    validador (ETag ou Last-Modified), tamanho total e os trechos
+    [início, fim, recebidos] (fim None quando o tamanho é desconhecido).
+    """
+
+    def __init__(self, path: str, url: str):
+        self.part_path = path + PART_SUFFIX
+        self.path = path + STATE_SUFFIX
+        self.url = url
+        self.validator: Optional[str] = None
+        self.size = 0
+        self.segments: List[list] = []
+        self.lock = threading.Lock()
+        self.saved_at = 0.0
+
+    @classmethod
+    def load(cls, path: str, url: str) -> Optional['_PartState']:
+        state = cls(path, url)
+        try:
+            with open(state.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('url') != url or not os.path.exists(state.part_path):
+            return None
+        state.validator = data.get('validator')
+        state.size = data.get('size', 0)
+        state.segments = data.get('segments', [])
+        return state
+
+    @property
+    def received(self) -> int:
+        return sum(segment[2] for segment in self.segments)
+
+    @staticmethod
+    def segment_complete(segment: list) -> bool:
+        start, end, done = segment
+        return end is not None and done >= end - start + 1
+
+    def save(self, force: bool = False):
+        with self.lock:
+            now = time.monotonic()
+            if not force and now - self.saved_at < STATE_INTERVAL:
+                return
+            self.saved_at = now
+            data = {'url': self.url, 'validator': self.validator,
+                    'size': self.size, 'segments': self.segments}
+            # Troca atômica, como no registro de conversões
+            temp_path = self.path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+
+    def remove(self, keep_part: bool = False):
+        for path in (self.path, None if keep_part else self.part_path):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+
+def _start(session: requests.Session, url: str, path: str, split: bool):
+    """Primeira requisição (Range 0-, para saber se o servidor aceita retomar). Cria o .part."""
+    response = session.get(url, headers={'Range': 'bytes=0-'}, stream=True, timeout=TIMEOUT)
+    if response.status_code == 416:
+        # Arquivo vazio: não há o byte 0 para pedir
+        response.close()
+        response = session.get(url, stream=True, timeout=TIMEOUT)
+    response.raise_for_status()
+
+    state = _PartState(path, url)
+    ranges = response.status_code == 206
+    if ranges:
+        state.size = _total_size(response) or 0
+    else:
+        state.size = int(response.headers.get('content-length', 0))
+
+    # ETag fraca não vale para If-Range
+    etag = response.headers.get('etag')
+    state.validator = etag if etag and not etag.startswith('W/') else response.headers.get('last-modified')
+
+    if split and ranges and state.size >= SPLIT_THRESHOLD:
+        length = -(-state.size // SPLIT_PARTS)
+        state.segments = [[start, min(start + length, state.size) - 1, 0]
+                          for start in range(0, state.size, length)]
+    else:
+        state.segments = [[0, state.size - 1 if state.size else None, 0]]
+
+    with open(state.part_path, 'wb') as f:
+        if len(state.segments) > 1:
+            f.truncate(state.size)
+    state.save(force=True)
+    return state, response
+
+
+def _total_size(response) -> Optional[int]:
+    total = response.headers.get('content-range', '').rsplit('/', 1)[-1]
+    return int(total) if total.isdigit() else None
+
+
+def _open_segment(session: requests.Session, state: _PartState, segment: list):
+    start, end, done = segment
+    headers = {'Range': f"bytes={start + done}-{'' if end is None else end}"}
+    if state.validator:
+        headers['If-Range'] = state.validator
+    response = session.get(state.url, headers=headers, stream=True, timeout=TIMEOUT)
+    if response.status_code == 416:
+        response.close()
+        raise _RangeIgnored()
+    response.raise_for_status()
+    # Sem validador, o tamanho é a única forma de saber se o arquivo mudou
+    if response.status_code != 206 or (state.size and _total_size(response) != state.size):
+        response.close()
+        raise _RangeIgnored()
+    return response
+
+
+def _fetch_segment(session: requests.Session, state: _PartState, segment: list, response,
+                   progress: Optional[Callable[[int, int], None]],
+                   should_stop: Callable[[], bool]):
+    """Baixa o que falta de um trecho direto na posição dele dentro do .part."""
+    response = response or _open_segment(session, state, segment)
+    start, end, _ = segment
+    with response, open(state.part_path, 'r+b') as f:
+        f.seek(start + segment[2])
+        if end is None:
+            f.truncate()
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            if should_stop():
+                raise DownloadCancelled()
+            if not chunk:
+                continue
+            if end is not None:
+                chunk = chunk[:end - start + 1 - segment[2]]
+            f.write(chunk)
+            # Grava antes de atualizar o estado: o .part.json nunca passa do que está no disco
+            f.flush()
+            segment[2] += len(chunk)
+            if progress:
+                progress(len(chunk), state.size)
+            state.save()
+            if end is not None and segment[2] >= end - start + 1:
+                break
+    if end is None:
+        segment[1] = start + segment[2] - 1
+
+
+def _fetch_all(session: requests.Session, state: _PartState, response,
+               progress: Optional[Callable[[int, int], None]],
+               should_stop: Optional[Callable[[], bool]]):
+    """Baixa os trechos pendentes, em paralelo quando há mais de um."""
+    failed = threading.Event()
+
+    def stopped() -> bool:
+        return failed.is_set() or bool(should_stop and should_stop())
+
+    def fetch(segment: list, response=None):
+        try:
+            _fetch_segment(session, state, segment, response, progress, stopped)
+        except DownloadCancelled:
+            raise
+        except BaseException:
+            failed.set()  # Um trecho falhou: os outros param também
+            raise
+
+    pending = [segment for segment in state.segments if not state.segment_complete(segment)]
+    try:
+        if response is not None:
+            # A resposta da primeira requisição serve o primeiro trecho
+            if pending and pending[0][0] == 0:
+                first = pending.pop(0)
+            else:
+                response.close()
+                response = None
+        if len(pending) + (response is not None) <= 1:
+            for segment in pending:
+                fetch(segment)
+            if response is not None:
+                fetch(first, response)
+            return
+
+        with ThreadPoolExecutor(max_workers=len(pending) + 1) as executor:
+            futures = [executor.submit(fetch, segment) for segment in pending]
+            if response is not None:
+                futures.append(executor.submit(fetch, first, response))
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        for error in errors:
+            if not isinstance(error, DownloadCancelled):
+                raise error
+        if errors:
+            raise errors[0]
+    finally:
+        state.save(force=True)
+
+
+def download_file(session: requests.Session, url: str, path: str,
+                  progress: Optional[Callable[[int, int], None]] = None,
+                  should_stop: Optional[Callable[[], bool]] = None,
+                  index=None, split: bool = True) -> str:
+    """
+    Baixa `url` para `path`. Os dados vão para `path`.part, com o estado
+    (ETag/Last-Modified, tamanho, trechos recebidos) em `path`.part.json:
+    um download interrompido (erro, cancelamento, queda) continua de onde
+    parou com Range/If-Range, e recomeça do zero se o arquivo mudou no
+    servidor. Arquivos grandes (SPLIT_THRESHOLD) são baixados em
+    SPLIT_PARTS trechos paralelos. O tamanho é conferido antes da troca
+    atômica para o nome final. `progress(bytes do bloco, tamanho total)`.
+    Com um `HashIndex` (tools.hash_index), conteúdo que já está na
+    biblioteca é descartado e volta o caminho existente; senão volta `path`.
+    """
+    state = _PartState.load(path, url)
+    if state is not None:
+        received = state.received
+        if progress and received:
+            progress(received, state.size)
+        try:
+            _fetch_all(session, state, None, progress, should_stop)
+        except _RangeIgnored:
+            if progress and state.received:
+                progress(-state.received, state.size)
+            state.remove()
+            state = None
+
+    if state is None:
+        state, response = _start(session, url, path, split)
+        try:
+            _fetch_all(session, state, response, progress, should_stop)
+        except _RangeIgnored:
+            state.remove()
+            raise IOError(f"O servidor não permitiu continuar o download de {os.path.basename(path)}")
+
+    size = os.path.getsize(state.part_path)
+    if not all(state.segment_complete(segment) for segment in state.segments) or \
+            (state.size and size != state.size):
+        state.remove()
+        raise IOError(f"Download incompleto: {os.path.basename(path)} ({size} de {state.size} bytes)")
+
+    if index is not None:
+        digest = full_hash(state.part_path)
+        existing = index.find_in_library(size, digest)
+        if existing is not None:
+            state.remove()
+            return existing
+
+    os.replace(state.part_path, path)
+    state.remove(keep_part=True)
+    if index is not None:
+        index.add_to_library(path, digest)
+    return path
+
+
+def download_all(tasks: Iterable[DownloadTask], workers: int = DOWNLOAD_WORKERS,
+                 session: Optional[requests.Session] = None,
+                 progress_callback: Optional[Callable[[float, int], None]] = None,
+                 result_callback: Optional[Callable[[DownloadTask], None]] = None,
+                 should_stop: Optional[Callable[[], bool]] = None,
+                 index=None) -> List[DownloadTask]:
+    """
+    Baixa as tarefas com `workers` transferências simultâneas na mesma
+    sessão. `progress_callback(percentual, bytes recebidos)` soma o
+    andamento de cada arquivo; `result_callback` é chamado (um de cada vez)
+    a cada arquivo concluído, com `result` ou `error`. Retorna as tarefas
+    concluídas ou com erro.
+    """
+    tasks = list(tasks)
+    own_session = session is None
+    session = session or create_session(workers)
+    lock = threading.Lock()
+    finished: List[DownloadTask] = []
+    last_report = 0.0
+
+    def stopped() -> bool:
+        return bool(should_stop and should_stop())
+
+    def report(force: bool = False):
+        nonlocal last_report
+        with lock:
+            now = time.monotonic()
+            if not progress_callback or (not force and now - last_report < PROGRESS_INTERVAL):
+                return
+            last_report = now
+            # Arquivo sem tamanho informado só conta quando termina
+            fractions = sum(
+                1.0 if task.result or task.error else min(1.0, task.done / task.size) if task.size else 0.0
+                for task in tasks
+            )
+            done_bytes = sum(task.done for task in tasks)
+        progress_callback(fractions * 100 / len(tasks), done_bytes)
+
+    def run(task: DownloadTask):
+        if stopped():
+            return
+
+        def progress(count: int, total: int):
+            # Chamado pelas threads dos trechos do mesmo arquivo
+            with lock:
+                task.done += count
+                task.size = total
+            report()
+
+        try:
+            task.result = download_file(session, task.url, task.path, progress, stopped, index)
+        except DownloadCancelled:
+            return
+        except Exception as e:
+            task.error = e
+
+        with lock:
+            finished.append(task)
+            if result_callback:
+                result_callback(task)
+        report(force=True)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [executor.submit(run, task) for task in tasks]
+        for future in futures:
+            future.result()  # Repassa erros inesperados das threads
+    finally:
+        if own_session:
+            session.close()
+    return finished
@@ -0,0 +1,129 @@
+import os
+import subprocess
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+# Dispositivo padrão do VAAPI (Intel/AMD no Linux)
+VAAPI_DEVICE = '/dev/dri/renderD128'
+
+# Taxa de bits usada nas renderizações
+DEFAULT_BITRATE = '5M'
+
+
+@dataclass
+class VideoEncoder:
+    name: str                                   # nome do encoder no FFmpeg
+    output_args: Dict[str, str]                 # opções de saída (vcodec, preset, b, ...)
+    global_args: List[str] = field(default_factory=list)
+    upload_filters: List[str] = field(default_factory=list)  # ex.: envio para a GPU (VAAPI)
+    max_parallel: int = 1                       # quantos encodes simultâneos aguenta
+    hardware: bool = False
+
+
+def _x264_parallel() -> int:
+    # O libx264 já usa várias threads; poucos encodes em paralelo bastam
+    return max(2, (os.cpu_count() or 1) // 4)
+
+
+def _candidates(x264_preset: str) -> List[VideoEncoder]:
+    """Encoders em ordem de preferência (hardware primeiro, CPU por último)."""
+    return [
+        VideoEncoder(
+            name='h264_nvenc',
+            output_args={'vcodec': 'h264_nvenc', 'preset': 'fast', 'b': DEFAULT_BITRATE},
+            max_parallel=3,  # placas GeForce limitam as sessões simultâneas
+            hardware=True
+        ),
+        VideoEncoder(
+            name='h264_qsv',
+            output_args={'vcodec': 'h264_qsv', 'preset': 'faster', 'b': DEFAULT_BITRATE},
+            max_parallel=2,
+            hardware=True
+        ),
+        VideoEncoder(
+            name='h264_vaapi',
+            output_args={'vcodec': 'h264_vaapi', 'b': DEFAULT_BITRATE},
+            global_args=['-vaapi_device', VAAPI_DEVICE],
+            upload_filters=['format=nv12', 'hwupload'],
+            max_parallel=2,
+            hardware=True
+        ),
+        VideoEncoder(
+            name='libx264',
+            output_args={
+                'vcodec': 'libx264',
+                'preset': x264_preset,
+                'b': DEFAULT_BITRATE,
+                'pix_fmt': 'yuv420p'
+            },
+            max_parallel=_x264_parallel()
+        ),
+    ]
+
+
+@lru_cache(maxsize=None)
+def available_encoder_names(ffmpeg_path: str = 'ffmpeg') -> frozenset:
+    """Lista os encoders compilados no FFmpeg (`ffmpeg -encoders`)."""
+    try:
+        result = subprocess.run(
+            [ffmpeg_path, '-hide_banner', '-encoders'],
+            capture_output=True,
+            text=True
+        )
+    except FileNotFoundError:
+        return frozenset()
+
+    names = set()
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        # Linhas no formato: " V....D libx264  descrição"
+        if len(parts) >= 2 and parts[0].startswith('V'):
+            names.add(parts[1])
+    return frozenset(names)
+
+
+def _test_encode(encoder: VideoEncoder, ffmpeg_path: str) -> bool:
+    """Codifica alguns quadros de teste para confirmar que o hardware existe de fato."""
+    command = [ffmpeg_path, '-hide_banner', '-v', 'error'] + encoder.global_args
+    command += ['-f', 'lavfi', '-i', 'color=c=black:s=256x144:d=0.2']
+    if encoder.upload_filters:
+        command += ['-vf', ",".join(encoder.upload_filters)]
+    command += ['-c:v', encoder.name, '-f', 'null', '-']
+    try:
+        result = subprocess.run(command, capture_output=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return result.returncode == 0
+
+
+@lru_cache(maxsize=None)
+def select_encoder(ffmpeg_path: str = 'ffmpeg', x264_preset: str = 'veryfast',
+                   preferred: Optional[str] = None) -> VideoEncoder:
+    """
+    Escolhe o melhor encoder H.264 disponível nesta máquina. A detecção roda
+    uma única vez por processo; sem GPU, cai para o libx264.
+    """
+    compiled = available_encoder_names(ffmpeg_path)
+    candidates = _candidates(x264_preset)
+    if preferred:
+        candidates.sort(key=lambda encoder: encoder.name != preferred)
+
+    for encoder in candidates:
+        if encoder.name not in compiled:
+            continue
+        if not encoder.hardware or _test_encode(encoder, ffmpeg_path):
+            return encoder
+
+    # Último recurso: deixa o FFmpeg usar o libx264 mesmo sem confirmação
+    return next(encoder for encoder in candidates if encoder.name == 'libx264')
+
+
+def encoder_cli_args(encoder: VideoEncoder) -> List[str]:
+    """Converte as opções de saída do encoder em argumentos de linha de comando."""
+    args = []
+    for key, value in encoder.output_args.items():
+        # Taxa de bits só para o vídeo (o áudio tem a sua própria)
+        key = 'b:v' if key == 'b' else key
+        args += [f'-{key}', str(value)]
+    return args
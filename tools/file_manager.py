@@ -1,19 +1,220 @@
 import os
-import shutil
 from datetime import datetime
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QPushButton, QFileDialog, QProgressBar,
-    QFrame, QListWidget, QMessageBox, QLineEdit,
-    QCheckBox, QSpinBox
+    QFrame, QListView, QMessageBox, QLineEdit,
+    QCheckBox, QSpinBox, QComboBox
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex
+from typing import List, Optional, Tuple
+from tools.dedup import find_duplicates
+from tools.file_scanner import ScannedFile, scan_directory
+from tools.copy_engine import COPY_WORKERS, CopyTask, copy_files
+from tools.file_transfer import COPY, TRANSFER_MODES, TransferStats, format_size
+from tools.hash_index import HashIndex, IndexedFile
+from tools.job_runner import DISK, JobCancelled, JobContext, get_job_runner
+
+# Linhas criadas na lista por vez (as demais só quando a rolagem chega nelas)
+FETCH_BATCH_SIZE = 500
+
+
+def scan_job(ctx: JobContext, input_dir: str, extensions: List[str], min_size: int) -> int:
+    """Tarefa: escaneia a pasta, emitindo 'files' a cada lote encontrado. Retorna o total."""
+    ctx.status("Escaneando arquivos...")
+    total = 0
+    for batch in scan_directory(input_dir, extensions, min_size, should_stop=ctx.cancelled):
+        total += len(batch)
+        ctx.emit('files', batch)
+        ctx.status(f"Escaneando arquivos... {total} encontrados")
+    if ctx.cancelled():
+        raise JobCancelled()
+    return total
+
+
+class FileListModel(QAbstractListModel):
+    """
+    Lista dos arquivos escaneados. Guarda só as tuplas (ScannedFile) e
+    cria as linhas aos poucos (canFetchMore/fetchMore), conforme a
+    rolagem, para não travar com centenas de milhares de arquivos.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.files: List[ScannedFile] = []
+        self.loaded = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if index.isValid() and role == Qt.ItemDataRole.DisplayRole:
+            return self.files[index.row()].path
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded < len(self.files)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(FETCH_BATCH_SIZE, len(self.files) - self.loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    def append(self, files: List[ScannedFile]):
+        self.files.extend(files)
+        # Primeira tela: mostra já, sem esperar a rolagem
+        if self.loaded < FETCH_BATCH_SIZE:
+            self.fetchMore()
+
+    def clear(self):
+        self.beginResetModel()
+        self.files = []
+        self.loaded = 0
+        self.endResetModel()
+
+
+def organize_job(ctx: JobContext, input_dir: str, extensions: List[str], min_size: int,
+                 output_base: str, remove_duplicates: bool = False, organize_by_date: bool = False,
+                 organize_by_type: bool = False, transfer_mode: str = COPY,
+                 workers: int = COPY_WORKERS) -> Tuple[str, str]:
+    """
+    Tarefa: copia (ou move/liga, conforme `transfer_mode`) os arquivos de
+    `input_dir` que passam nos filtros para `output_base`, organizados
+    conforme as opções, com até `workers` transferências simultâneas.
+    Recebe os filtros e não a lista escaneada (que pode ter centenas de
+    milhares de caminhos e iria inteira para a fila em disco): a pasta é
+    escaneada de novo aqui. Retorna a pasta e o resumo da transferência
+    (estratégias usadas, vazão e duplicados ignorados).
+    """
+    ctx.status("Escaneando arquivos...")
+    files = [
+        file.path
+        for batch in scan_directory(input_dir, extensions, min_size, should_stop=ctx.cancelled)
+        for file in batch
+    ]
+    if ctx.cancelled():
+        raise JobCancelled()
+
+    if not remove_duplicates:
+        return _organize(ctx, input_dir, files, output_base, None, organize_by_date,
+                         organize_by_type, transfer_mode, workers)
+    # Uma conexão com o índice de hashes para a tarefa toda
+    with HashIndex() as index:
+        return _organize(ctx, input_dir, files, output_base, index, organize_by_date,
+                         organize_by_type, transfer_mode, workers)
+
+
+def _organize(ctx: JobContext, input_dir: str, files: List[str], output_base: str,
+              index: Optional[HashIndex], organize_by_date: bool, organize_by_type: bool,
+              transfer_mode: str, workers: int) -> Tuple[str, str]:
+    os.makedirs(output_base, exist_ok=True)
+
+    # Duplicados (mesmo conteúdo de um arquivo anterior da lista) não são
+    # copiados; o índice só evita reler arquivos que não mudaram
+    duplicates = set()
+    copied = []
+    if index is not None:
+        duplicates = find_duplicates(
+            [os.path.join(input_dir, rel_path) for rel_path in files],
+            status_callback=ctx.status,
+            should_stop=ctx.cancelled,
+            index=index
+        )
+
+    # Monta a lista de transferências (destino repetido: vale o último, como
+    # quando a cópia sobrescrevia)
+    skipped = []
+    tasks = {}
+    for rel_path in files:
+        if ctx.cancelled():
+            raise JobCancelled()
+        input_path = os.path.join(input_dir, rel_path)
+        ctx.status(f"Processando {rel_path}...")
+
+        # Verifica se é duplicado
+        if input_path in duplicates:
+            skipped.append(rel_path)
+            continue
+
+        # Determina pasta de destino
+        if organize_by_date:
+            # Organiza por ano/mês
+            timestamp = os.path.getmtime(input_path)
+            date = datetime.fromtimestamp(timestamp)
+            rel_dir = os.path.join(
+                str(date.year),
+                f"{date.month:02d}"
+            )
+        elif organize_by_type:
+            # Organiza por extensão
+            ext = os.path.splitext(rel_path)[1][1:].lower()
+            rel_dir = ext if ext else "sem_extensao"
+        else:
+            # Mantém estrutura original
+            rel_dir = os.path.dirname(rel_path)
+
+        # Cria pasta de destino
+        output_dir = os.path.join(output_base, rel_dir)
+        os.makedirs(output_dir, exist_ok=True)
+
+        output_path = os.path.join(output_dir, os.path.basename(rel_path))
+        tasks.pop(output_path, None)
+        tasks[output_path] = CopyTask(input_path, output_path, os.path.getsize(input_path))
+
+    # Copia os arquivos em paralelo (pelo caminho mais barato que o disco permitir)
+    stats = TransferStats()
+    failed = []
+
+    def on_progress(done: int, total: int):
+        ctx.progress(done * 100 // total if total else 100)
+        rate = done / max(stats.elapsed, 1e-6)
+        remaining = (total - done) / rate if rate else 0
+        ctx.status(
+            f"Copiando: {format_size(done)} de {format_size(total)} "
+            f"({format_size(rate)}/s, faltam ~{remaining:.0f} s)"
+        )
+
+    def on_result(task: CopyTask):
+        if task.error:
+            failed.append(f"{task.src}: {task.error}")
+            return
+        stats.add(task.strategy, task.size)
+        if index is not None:
+            copied.append(IndexedFile.from_path(task.dst, library=True))
+
+    try:
+        copy_files(tasks.values(), transfer_mode, workers,
+                   progress_callback=on_progress, result_callback=on_result,
+                   should_stop=ctx.cancelled)
+    finally:
+        # Cópias entram na biblioteca (mesmo se a tarefa for cancelada); o
+        # hash delas só é calculado quando for preciso
+        if copied:
+            index.save(copied)
+
+    if ctx.cancelled():
+        raise JobCancelled()
+    if failed:
+        raise RuntimeError(f"{len(failed)} arquivo(s) falharam:\n" + "\n".join(failed[:10]))
+
+    summary = stats.summary()
+    if skipped:
+        summary += f"\n{len(skipped)} duplicado(s) ignorado(s): " + ", ".join(skipped[:10])
+        if len(skipped) > 10:
+            summary += f" e mais {len(skipped) - 10}"
+    return output_base, summary
+
 
 class FileManager(QWidget):
     def __init__(self):
         super().__init__()
         self.input_dir = None
+        self.scan_filters = ([], 0)  # extensões e tamanho mínimo do último escaneamento
         self.output_dir = None
+        self.processor = None
         self.setup_ui()
             
     def setup_ui(self):
@@ -169,6 +370,51 @@ class FileManager(QWidget):
         """)
         config_layout.addWidget(self.remove_duplicates)
 
+        # Modo de transferência
+        transfer_layout = QHBoxLayout()
+        transfer_label = QLabel("Transferência:")
+        transfer_label.setStyleSheet("color: white;")
+        transfer_layout.addWidget(transfer_label)
+
+        self.transfer_combo = QComboBox()
+        for mode, label in TRANSFER_MODES.items():
+            self.transfer_combo.addItem(label, mode)
+        self.transfer_combo.setStyleSheet("""
+            QComboBox {
+                background-color: #3d3d3d;
+                color: white;
+                border: none;
+                padding: 5px;
+                border-radius: 4px;
+            }
+            QComboBox::drop-down {
+                border: none;
+            }
+        """)
+        transfer_layout.addWidget(self.transfer_combo)
+        config_layout.addLayout(transfer_layout)
+
+        # Cópias simultâneas
+        workers_layout = QHBoxLayout()
+        workers_label = QLabel("Cópias simultâneas:")
+        workers_label.setStyleSheet("color: white;")
+        workers_layout.addWidget(workers_label)
+
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 16)
+        self.workers_spin.setValue(COPY_WORKERS)
+        self.workers_spin.setStyleSheet("""
+            QSpinBox {
+                background-color: #3d3d3d;
+                color: white;
+                border: none;
+                padding: 5px;
+                border-radius: 4px;
+            }
+        """)
+        workers_layout.addWidget(self.workers_spin)
+        config_layout.addLayout(workers_layout)
+
         # Tamanho mínimo
         size_layout = QHBoxLayout()
         size_label = QLabel("Tamanho mínimo (KB):")
@@ -193,19 +439,23 @@ class FileManager(QWidget):
         layout.addWidget(config_frame)
 
         # Lista de arquivos encontrados
-        self.file_list = QListWidget()
+        self.file_model = FileListModel(self)
+        self.file_list = QListView()
+        self.file_list.setModel(self.file_model)
+        # Todas as linhas têm a mesma altura: a lista não mede item por item
+        self.file_list.setUniformItemSizes(True)
         self.file_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background-color: #3d3d3d;
                 color: white;
                 border: none;
                 border-radius: 4px;
                 padding: 5px;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 5px;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #4a90e2;
             }
         """)
@@ -310,140 +560,108 @@ class FileManager(QWidget):
         if not self.input_dir:
             return
 
-        try:
-            self.file_list.clear()
-            self.status_label.setText("Escaneando arquivos...")
-            self.scan_btn.setEnabled(False)
-            
-            # Obtém filtros
-            extensions = [ext.strip().lower() for ext in self.filter_edit.text().split(",") if ext.strip()]
-            min_size = self.size_spin.value() * 1024  # Converte para bytes
-            
-            # Lista todos os arquivos
-            files = []
-            for root, _, filenames in os.walk(self.input_dir):
-                for filename in filenames:
-                    file_path = os.path.join(root, filename)
-                    
-                    # Verifica extensão
-                    if extensions:
-                        ext = os.path.splitext(filename)[1][1:].lower()
-                        if ext not in extensions:
-                            continue
-                    
-                    # Verifica tamanho
-                    if min_size > 0:
-                        size = os.path.getsize(file_path)
-                        if size < min_size:
-                            continue
-                    
-                    files.append(file_path)
-            
-            # Mostra arquivos encontrados
-            for file in files:
-                self.file_list.addItem(os.path.relpath(file, self.input_dir))
-            
-            # Atualiza interface
-            self.scan_btn.setEnabled(True)
-            self.process_btn.setEnabled(len(files) > 0)
-            self.status_label.setText(f"Encontrados {len(files)} arquivos")
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao escanear arquivos: {str(e)}")
-            self.scan_btn.setEnabled(True)
+        self.file_model.clear()
+        self.status_label.setText("Escaneando arquivos...")
+        self.scan_btn.setEnabled(False)
+        self.process_btn.setEnabled(False)
+
+        # Obtém filtros
+        extensions = [ext.strip().lower() for ext in self.filter_edit.text().split(",") if ext.strip()]
+        min_size = self.size_spin.value() * 1024  # Converte para bytes
+        self.scan_filters = (extensions, min_size)
+
+        self.processor = get_job_runner().submit(
+            f"Escanear {os.path.basename(self.input_dir) or self.input_dir}",
+            scan_job,
+            self.input_dir,
+            extensions,
+            min_size,
+            resource=DISK
+        )
+        self.processor.status_changed.connect(self.status_label.setText)
+        self.processor.event.connect(self.on_scan_event)
+        self.processor.finished.connect(self.scan_finished)
+        self.processor.error.connect(
+            lambda message: self.show_error(f"Erro ao escanear arquivos: {message}")
+        )
+        self.processor.cancelled.connect(self.processing_cancelled)
+
+    def on_scan_event(self, kind: str, value):
+        if kind == 'files':
+            # Mostra os arquivos conforme são encontrados
+            self.file_model.append(value)
+
+    def scan_finished(self, total: int):
+        # Atualiza interface
+        self.scan_btn.setEnabled(True)
+        self.process_btn.setEnabled(total > 0)
+        self.status_label.setText(f"Encontrados {total} arquivos")
 
     def start_processing(self):
         """Processa os arquivos conforme as configurações."""
-        if not self.input_dir:
+        files = [file.path for file in self.file_model.files]
+        if not self.input_dir or not files:
             return
             
         # Se não tiver pasta de destino, usa a pasta de entrada
         if not self.output_dir:
             self.output_dir = self.input_dir
 
-        try:
-            # Configura a interface
-            self.process_btn.setEnabled(False)
-            self.scan_btn.setEnabled(False)
-            self.progress_bar.setMaximum(self.file_list.count())
-            self.progress_bar.setValue(0)
-            self.progress_bar.show()
-            
-            # Cria pasta para os arquivos processados
-            output_base = os.path.join(
-                self.output_dir,
-                f"organizados_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            )
-            os.makedirs(output_base, exist_ok=True)
-            
-            # Lista de arquivos já copiados (para evitar duplicados)
-            copied_files = set()
-            
-            # Processa cada arquivo
-            for i in range(self.file_list.count()):
-                rel_path = self.file_list.item(i).text()
-                input_path = os.path.join(self.input_dir, rel_path)
-                
-                self.status_label.setText(f"Processando {rel_path}...")
-                self.progress_bar.setValue(i + 1)
-                
-                # Verifica se é duplicado
-                if self.remove_duplicates:
-                    file_hash = self._get_file_hash(input_path)
-                    if file_hash in copied_files:
-                        continue
-                    copied_files.add(file_hash)
-                
-                # Determina pasta de destino
-                if self.organize_by_date:
-                    # Organiza por ano/mês
-                    timestamp = os.path.getmtime(input_path)
-                    date = datetime.fromtimestamp(timestamp)
-                    rel_dir = os.path.join(
-                        str(date.year),
-                        f"{date.month:02d}"
-                    )
-                elif self.organize_by_type:
-                    # Organiza por extensão
-                    ext = os.path.splitext(rel_path)[1][1:].lower()
-                    rel_dir = ext if ext else "sem_extensao"
-                else:
-                    # Mantém estrutura original
-                    rel_dir = os.path.dirname(rel_path)
-                
-                # Cria pasta de destino
-                output_dir = os.path.join(output_base, rel_dir)
-                os.makedirs(output_dir, exist_ok=True)
-                
-                # Copia arquivo
-                output_path = os.path.join(output_dir, os.path.basename(rel_path))
-                shutil.copy2(input_path, output_path)
-            
-            # Finaliza
-            self.process_btn.setEnabled(True)
-            self.scan_btn.setEnabled(True)
-            self.status_label.setText("Processamento concluído!")
-            self.status_label.setStyleSheet("color: #2ecc71; font-weight: bold;")
-            self.progress_bar.hide()
-            
-            QMessageBox.information(
-                self,
-                "Sucesso",
-                f"Processamento concluído!\nOs arquivos foram salvos em:\n{output_base}"
-            )
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao processar arquivos: {str(e)}")
-            self.process_btn.setEnabled(True)
-            self.scan_btn.setEnabled(True)
-    
-    def _get_file_hash(self, file_path, chunk_size=8192):
-        """Calcula hash do arquivo para detectar duplicados."""
-        import hashlib
-        hasher = hashlib.md5()
-        with open(file_path, 'rb') as f:
-            chunk = f.read(chunk_size)
-            while chunk:
-                hasher.update(chunk)
-                chunk = f.read(chunk_size)
-        return hasher.hexdigest()
+        # Configura a interface
+        self.process_btn.setEnabled(False)
+        self.scan_btn.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+
+        # Pasta para os arquivos processados
+        output_base = os.path.join(
+            self.output_dir,
+            f"organizados_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        )
+
+        self.processor = get_job_runner().submit(
+            f"Organizar {len(files)} arquivo(s)",
+            organize_job,
+            self.input_dir,
+            *self.scan_filters,
+            output_base,
+            self.remove_duplicates.isChecked(),
+            self.organize_by_date.isChecked(),
+            self.organize_by_type.isChecked(),
+            self.transfer_combo.currentData(),
+            self.workers_spin.value(),
+            resource=DISK
+        )
+        self.processor.progress.connect(self.progress_bar.setValue)
+        self.processor.status_changed.connect(self.status_label.setText)
+        self.processor.finished.connect(self.processing_finished)
+        self.processor.error.connect(
+            lambda message: self.show_error(f"Erro ao processar arquivos: {message}")
+        )
+        self.processor.cancelled.connect(self.processing_cancelled)
+
+    def reset_ui(self):
+        self.process_btn.setEnabled(bool(self.file_model.files))
+        self.scan_btn.setEnabled(True)
+        self.progress_bar.hide()
+
+    def processing_finished(self, result: Tuple[str, str]):
+        output_base, summary = result
+        self.reset_ui()
+        self.status_label.setText(f"Processamento concluído! {summary}")
+        self.status_label.setStyleSheet("color: #2ecc71; font-weight: bold;")
+
+        QMessageBox.information(
+            self,
+            "Sucesso",
+            f"Processamento concluído!\nOs arquivos foram salvos em:\n{output_base}\n\n{summary}"
+        )
+
+    def processing_cancelled(self):
+        self.reset_ui()
+        self.status_label.setText("Processamento cancelado.")
+
+    def show_error(self, message: str):
+        self.reset_ui()
+        self.status_label.setText("Erro no processamento")
+        QMessageBox.critical(self, "Erro", message)
@@ -0,0 +1,58 @@
+import os
+from typing import Callable, Iterator, List, NamedTuple, Optional
+
+# Arquivos entregues por vez ao escanear (a interface mostra cada lote)
+SCAN_BATCH_SIZE = 1000
+
+
+class ScannedFile(NamedTuple):
+    path: str       # relativo à pasta escaneada
+    size: int
+    mtime: float
+
+
+def scan_directory(root: str, extensions: Optional[List[str]] = None, min_size: int = 0,
+                   batch_size: int = SCAN_BATCH_SIZE,
+                   should_stop: Optional[Callable[[], bool]] = None) -> Iterator[List[ScannedFile]]:
+    """
+    Percorre `root` com os.scandir e entrega os arquivos em lotes, já com
+    tamanho e data (DirEntry.stat(), que no Windows vem da própria listagem
+    da pasta). `extensions` sem ponto e em minúsculas. Pastas sem permissão
+    são ignoradas.
+    """
+    extensions = set(extensions or ())
+    # Caminho relativo por fatia da string (os.path.relpath é lento demais aqui)
+    prefix = len(os.path.join(root, ''))
+    batch = []
+    stack = [root]
+
+    while stack:
+        if should_stop and should_stop():
+            return
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        if not entry.is_file():
+                            continue
+                        if extensions and os.path.splitext(entry.name)[1][1:].lower() not in extensions:
+                            continue
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    if stat.st_size < min_size:
+                        continue
+
+                    batch.append(ScannedFile(entry.path[prefix:], stat.st_size, stat.st_mtime))
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+        except OSError:
+            continue
+
+    if batch:
+        yield batch
@@ -0,0 +1,230 @@
+import errno
+import os
+import shutil
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+# Modos de transferência do organizador
+COPY = 'copy'   # cópia independente (reflink quando o sistema de arquivos permite)
+LINK = 'link'   # hardlink no mesmo disco: os dois nomes são o mesmo arquivo
+MOVE = 'move'   # move (só renomeia quando origem e destino estão no mesmo disco)
+
+TRANSFER_MODES = {
+    COPY: "Copiar",
+    LINK: "Hardlink (mesmo disco)",
+    MOVE: "Mover",
+}
+
+# Estratégias, da mais barata para a mais cara
+RENAME = 'rename'
+HARDLINK = 'hardlink'
+REFLINK = 'reflink'
+COPY_FILE_RANGE = 'copy_file_range'
+SENDFILE = 'sendfile'
+USERSPACE = 'userspace'
+
+STRATEGY_LABELS = {
+    RENAME: "renomeado",
+    HARDLINK: "hardlink",
+    REFLINK: "reflink",
+    COPY_FILE_RANGE: "copy_file_range",
+    SENDFILE: "sendfile",
+    USERSPACE: "cópia comum",
+}
+
+# ioctl do Linux que clona o arquivo sem copiar dados (btrfs, XFS, bcachefs)
+FICLONE = 0x40049409
+
+# Bloco da cópia em espaço de usuário (último recurso)
+BUFFER_SIZE = 1024 * 1024
+
+# Bytes por chamada das cópias no kernel (entre elas: progresso e cancelamento)
+CHUNK_SIZE = 64 * 1024 * 1024
+
+# Erros que só significam "este mecanismo não serve aqui": tenta o próximo
+_UNSUPPORTED = {
+    errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP,
+    getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP), errno.EBADF, errno.EPERM,
+}
+
+_LINUX = sys.platform.startswith('linux')
+
+
+def _same_device(src: str, dst: str) -> bool:
+    try:
+        return os.stat(src).st_dev == os.stat(os.path.dirname(os.path.abspath(dst))).st_dev
+    except OSError:
+        return False
+
+
+class TransferCancelled(Exception):
+    """Transferência interrompida por `should_stop` (o destino não é criado)."""
+
+
+def _reflink(fsrc, fdst, size: int, report: Callable[[int], None]):
+    import fcntl
+    fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    report(size)
+
+
+def _copy_file_range(fsrc, fdst, size: int, report: Callable[[int], None]):
+    remaining = size
+    while remaining > 0:
+        copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), min(remaining, CHUNK_SIZE))
+        if copied == 0:
+            break
+        remaining -= copied
+        report(copied)
+
+
+def _sendfile(fsrc, fdst, size: int, report: Callable[[int], None]):
+    offset = 0
+    while offset < size:
+        sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, min(size - offset, CHUNK_SIZE))
+        if sent == 0:
+            break
+        offset += sent
+        report(sent)
+
+
+def _userspace(fsrc, fdst, size: int, report: Callable[[int], None]):
+    for chunk in iter(lambda: fsrc.read(BUFFER_SIZE), b''):
+        fdst.write(chunk)
+        report(len(chunk))
+
+
+def copy_data(src: str, dst: str, same_device: bool = False,
+              progress: Optional[Callable[[int], None]] = None,
+              should_stop: Optional[Callable[[], bool]] = None) -> str:
+    """
+    Copia o conteúdo de `src` para `dst` pelo mecanismo mais barato
+    disponível: reflink (mesmo disco), copy_file_range e sendfile (dentro do
+    kernel) e, por último, leitura/escrita comum. `progress` recebe os bytes
+    de cada bloco copiado. Retorna a estratégia usada.
+    """
+    strategies = []
+    if _LINUX and same_device:
+        strategies.append((REFLINK, _reflink))
+    if hasattr(os, 'copy_file_range'):
+        strategies.append((COPY_FILE_RANGE, _copy_file_range))
+    if _LINUX and hasattr(os, 'sendfile'):
+        strategies.append((SENDFILE, _sendfile))
+    strategies.append((USERSPACE, _userspace))
+
+    reported = 0
+
+    def report(count: int):
+        nonlocal reported
+        reported += count
+        if progress:
+            progress(count)
+        if should_stop and should_stop():
+            raise TransferCancelled()
+
+    size = os.path.getsize(src)
+    with open(src, 'rb') as fsrc:
+        for strategy, copy in strategies:
+            with open(dst, 'wb') as fdst:
+                try:
+                    copy(fsrc, fdst, size, report)
+                    return strategy
+                except OSError as e:
+                    if strategy == USERSPACE or e.errno not in _UNSUPPORTED:
+                        raise
+            # Recomeça do zero com o próximo mecanismo
+            fsrc.seek(0)
+            if progress and reported:
+                progress(-reported)
+            reported = 0
+
+
+def transfer_file(src: str, dst: str, mode: str = COPY,
+                  progress: Optional[Callable[[int], None]] = None,
+                  should_stop: Optional[Callable[[], bool]] = None) -> str:
+    """
+    Leva `src` para `dst` conforme o modo (COPY, LINK ou MOVE), preservando
+    as datas e permissões como o shutil.copy2. No mesmo disco, mover é só
+    renomear e LINK cria um hardlink; o resto cai em copy_data. O conteúdo
+    vai para um temporário ao lado do destino e só então é renomeado: uma
+    transferência interrompida (erro ou TransferCancelled) não deixa
+    arquivo pela metade. Retorna a estratégia usada.
+    """
+    same_device = _same_device(src, dst)
+
+    if mode == MOVE and same_device:
+        os.replace(src, dst)
+        if progress:
+            progress(os.path.getsize(dst))
+        return RENAME
+
+    temp_path = dst + ".tmp"
+    try:
+        strategy = None
+        if mode == LINK and same_device:
+            try:
+                if os.path.lexists(temp_path):
+                    os.remove(temp_path)
+                os.link(src, temp_path)
+                strategy = HARDLINK
+                if progress:
+                    progress(os.path.getsize(src))
+            except OSError:
+                pass  # Sistema de arquivos sem hardlink (FAT, exFAT...): copia
+
+        if strategy is None:
+            strategy = copy_data(src, temp_path, same_device, progress, should_stop)
+            shutil.copystat(src, temp_path)
+        os.replace(temp_path, dst)
+    except BaseException:
+        if os.path.lexists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    # Mover entre discos: só apaga a origem depois que o destino está completo
+    if mode == MOVE:
+        os.remove(src)
+    return strategy
+
+
+def format_size(size: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+@dataclass
+class TransferStats:
+    """Estratégias usadas e vazão medida numa execução."""
+    strategies: Counter = field(default_factory=Counter)
+    files: int = 0
+    bytes: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    def add(self, strategy: str, size: int):
+        self.strategies[strategy] += 1
+        self.files += 1
+        self.bytes += size
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Bytes por segundo."""
+        return self.bytes / max(self.elapsed, 1e-6)
+
+    def summary(self) -> str:
+        used = ", ".join(
+            f"{STRATEGY_LABELS[strategy]}: {count}"
+            for strategy, count in self.strategies.most_common()
+        )
+        return (
+            f"{self.files} arquivo(s), {format_size(self.bytes)} em {self.elapsed:.1f} s "
+            f"({format_size(self.throughput)}/s) — {used or 'nada transferido'}"
+        )
@@ -6,11 +6,32 @@ from PyQt6.QtWidgets import (
     QFrame, QTextEdit, QMessageBox, QComboBox
 )
 from PyQt6.QtCore import Qt
+from typing import List
+from tools.job_runner import DISK, JobContext, get_job_runner
+
+
+def create_folders_job(ctx: JobContext, output_dir: str, lines: List[str]) -> List[str]:
+    """Tarefa: cria as pastas (uma por linha) dentro de `output_dir`."""
+    created = []
+    for i, line in enumerate(lines):
+        # Remove espaços extras e barras
+        path = line.strip().strip("/")
+        if path:
+            # Cria o caminho completo
+            full_path = os.path.join(output_dir, path)
+            os.makedirs(full_path, exist_ok=True)
+            created.append(path)
+
+        # Atualiza progresso
+        ctx.progress((i + 1) * 100 // len(lines))
+    return created
+
 
 class FolderCreator(QWidget):
     def __init__(self):
         super().__init__()
         self.output_dir = None
+        self.processor = None
         self.setup_ui()
             
     def setup_ui(self):
@@ -281,55 +302,53 @@ pasta2/
         if not self.output_dir:
             return
 
-        try:
-            # Configura a interface
-            self.create_btn.setEnabled(False)
-            self.select_output_btn.setEnabled(False)
-            self.progress_bar.show()
-            self.status_label.setText("Criando estrutura...")
-            
-            # Processa o texto
-            lines = [
-                line.strip() for line in self.structure_edit.toPlainText().split("\n")
-                if line.strip() and not line.strip().startswith("#")
-            ]
-            
-            # Configura a barra de progresso
-            self.progress_bar.setMaximum(len(lines))
-            self.progress_bar.setValue(0)
-            
-            # Cria as pastas
-            created = []
-            for i, line in enumerate(lines):
-                # Remove espaços extras e barras
-                path = line.strip().strip("/")
-                if path:
-                    # Cria o caminho completo
-                    full_path = os.path.join(self.output_dir, path)
-                    os.makedirs(full_path, exist_ok=True)
-                    created.append(path)
-                
-                # Atualiza progresso
-                self.progress_bar.setValue(i + 1)
-            
-            # Finaliza
-            self.create_btn.setEnabled(True)
-            self.select_output_btn.setEnabled(True)
-            self.status_label.setText("Estrutura criada!")
-            self.status_label.setStyleSheet("color: #2ecc71; font-weight: bold;")
-            self.progress_bar.hide()
-            
-            # Mostra resumo
-            message = "Estrutura criada com sucesso!\n\nPastas criadas:\n"
-            message += "\n".join(f"- {path}" for path in created)
-            
-            QMessageBox.information(
-                self,
-                "Sucesso",
-                message
-            )
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao criar estrutura: {str(e)}")
-            self.create_btn.setEnabled(True)
-            self.select_output_btn.setEnabled(True)
+        # Processa o texto
+        lines = [
+            line.strip() for line in self.structure_edit.toPlainText().split("\n")
+            if line.strip() and not line.strip().startswith("#")
+        ]
+        if not lines:
+            return
+
+        # Configura a interface
+        self.create_btn.setEnabled(False)
+        self.select_output_btn.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.status_label.setText("Criando estrutura...")
+
+        self.processor = get_job_runner().submit(
+            f"Criar {len(lines)} pasta(s)",
+            create_folders_job,
+            self.output_dir,
+            lines,
+            resource=DISK
+        )
+        self.processor.progress.connect(self.progress_bar.setValue)
+        self.processor.finished.connect(self.structure_created)
+        self.processor.error.connect(self.show_error)
+        self.processor.cancelled.connect(self.reset_ui)
+
+    def reset_ui(self):
+        self.create_btn.setEnabled(True)
+        self.select_output_btn.setEnabled(True)
+        self.progress_bar.hide()
+
+    def structure_created(self, created: List[str]):
+        self.reset_ui()
+        self.status_label.setText("Estrutura criada!")
+        self.status_label.setStyleSheet("color: #2ecc71; font-weight: bold;")
+
+        # Mostra resumo
+        message = "Estrutura criada com sucesso!\n\nPastas criadas:\n"
+        message += "\n".join(f"- {path}" for path in created)
+
+        QMessageBox.information(
+            self,
+            "Sucesso",
+            message
+        )
+
+    def show_error(self, message: str):
+        self.reset_ui()
+        QMessageBox.critical(self, "Erro", f"Erro ao criar estrutura: {message}")
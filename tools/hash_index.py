@@ -0,0 +1,162 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from tools.dedup import full_hash
+
+# Local padrão do índice (compartilhado pelo organizador, downloads e conversões)
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".webdark_studio", "file_hashes.sqlite")
+
+
+@dataclass
+class IndexedFile:
+    path: str
+    device: int
+    inode: int
+    size: int
+    mtime_ns: int
+    edge: Optional[str] = None     # hash do começo e fim (dedup.edge_hash)
+    digest: Optional[str] = None   # hash do conteúdo todo (dedup.full_hash)
+    library: bool = False          # arquivo da biblioteca (copiado/baixado por nós)
+
+    @classmethod
+    def from_path(cls, path: str, stat: Optional[os.stat_result] = None,
+                  library: bool = False) -> 'IndexedFile':
+        stat = stat or os.stat(path)
+        return cls(path, stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns, library=library)
+
+    @property
+    def indexable(self) -> bool:
+        # FAT/exFAT, alguns compartilhamentos de rede: sem inode confiável
+        return self.inode != 0
+
+
+def _same_path(a: str, b: str) -> bool:
+    return os.path.normcase(os.path.abspath(a)) == os.path.normcase(os.path.abspath(b))
+
+
+class HashIndex:
+    """
+    Índice persistente (SQLite) dos hashes dos arquivos, pela identidade do
+    arquivo (dispositivo, inode) e validado por caminho, tamanho e data: só
+    arquivos novos ou alterados são lidos de novo. Arquivos sem inode
+    (st_ino 0) ficam fora do índice. Também responde se um conteúdo já
+    está na biblioteca (arquivos organizados ou baixados antes).
+
+    Cada instância mantém uma conexão (compartilhada entre as threads da
+    tarefa): crie uma por tarefa e feche com close() ou `with`.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.RLock()
+        with self._connect() as db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    device INTEGER,
+                    inode INTEGER,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    path TEXT,
+                    edge TEXT,
+                    digest TEXT,
+                    library INTEGER,
+                    PRIMARY KEY (device, inode)
+                )
+            """)
+            db.execute("CREATE INDEX IF NOT EXISTS files_library_size ON files (library, size)")
+
+    def __enter__(self) -> 'HashIndex':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    @contextmanager
+    def _connect(self):
+        # Uma transação na conexão da instância (uma thread por vez)
+        with self._lock, self._db:
+            yield self._db
+
+    def load(self, paths: Iterable[str]) -> Dict[str, IndexedFile]:
+        """
+        Estado atual dos arquivos, com os hashes guardados quando o arquivo
+        não mudou desde então. Arquivos que não existem ficam de fora.
+        """
+        files = {}
+        with self._connect() as db:
+            for path in paths:
+                try:
+                    file = IndexedFile.from_path(path)
+                except OSError:
+                    continue
+                files[path] = file
+                if not file.indexable:
+                    continue
+                row = db.execute(
+                    "SELECT size, mtime_ns, edge, digest, library, path FROM files WHERE device = ? AND inode = ?",
+                    (file.device, file.inode)
+                ).fetchone()
+                # Inode reaproveitado (ou instável) por outro arquivo: o caminho não bate
+                if (row is not None and row[0] == file.size and row[1] == file.mtime_ns
+                        and _same_path(row[5], path)):
+                    file.edge, file.digest, file.library = row[2], row[3], bool(row[4])
+        return files
+
+    def save(self, files: Iterable[IndexedFile]):
+        with self._connect() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(file.device, file.inode, file.size, file.mtime_ns, file.path,
+                  file.edge, file.digest, int(file.library)) for file in files if file.indexable]
+            )
+
+    def digest(self, path: str) -> str:
+        """Hash do conteúdo do arquivo, lendo-o só se não estiver no índice."""
+        file = self.load([path]).get(path) or IndexedFile.from_path(path)
+        if file.digest is None:
+            file.digest = full_hash(path)
+            self.save([file])
+        return file.digest
+
+    def add_to_library(self, path: str, digest: Optional[str] = None):
+        """Registra um arquivo da biblioteca (hash opcional: calculado quando alguém perguntar)."""
+        file = self.load([path]).get(path) or IndexedFile.from_path(path)
+        file.library = True
+        file.digest = digest or file.digest
+        self.save([file])
+
+    def find_in_library(self, size: int, digest_of: Union[str, Callable[[], str]]) -> Optional[str]:
+        """
+        Caminho de um arquivo da biblioteca com o mesmo conteúdo, ou None.
+        `digest_of` é o hash ou uma função que o calcula: só é chamada se
+        existir na biblioteca algum arquivo do mesmo tamanho.
+        """
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT path FROM files WHERE library = 1 AND size = ?", (size,)
+            ).fetchall()
+        candidates: List[str] = [row[0] for row in rows]
+        if not candidates:
+            return None
+
+        digest = digest_of() if callable(digest_of) else digest_of
+        for path, file in self.load(candidates).items():
+            if file.size != size:
+                continue
+            if file.digest is None:
+                file.digest = full_hash(path)
+                file.library = True
+                self.save([file])
+            if file.digest == digest:
+                return path
+        return None
@@ -7,13 +7,99 @@ from PyQt6.QtWidgets import (
     QCheckBox, QListWidget
 )
 from PyQt6.QtCore import Qt
-from PIL import Image
+from typing import List, Optional, Tuple
+from tools.image_engine import ConversionOptions, ConversionResult, convert_batch, list_images, output_path
+from tools.conversion_manifest import ConversionManifest, plan_incremental
+from tools.job_runner import JobContext, get_job_runner
+
+
+# Pasta de saída fixa do modo incremental (as execuções seguintes reaproveitam)
+INCREMENTAL_FOLDER = "convertidas"
+
+
+def run_conversion(input_files: List[str], output_folder: str, options: ConversionOptions,
+                   incremental: bool = False, prune: bool = False,
+                   progress_callback=None, should_stop=None) -> Tuple[List[ConversionResult], int, List[str]]:
+    """
+    Converte as imagens para `output_folder`. No modo incremental, um
+    registro na pasta de saída faz pular as imagens já convertidas e sem
+    alterações; com `prune`, apaga as saídas cujas originais sumiram.
+    Retorna (resultados, pulados, apagados).
+    """
+    files = [(file, output_path(file, output_folder, options.format)) for file in input_files]
+    if not incremental:
+        return convert_batch(files, options, progress_callback=progress_callback,
+                             should_stop=should_stop), 0, []
+
+    manifest = ConversionManifest(output_folder)
+    files, skipped = plan_incremental(files, manifest, options)
+
+    def record(result: ConversionResult):
+        if not result.error:
+            manifest.record(result, options)
+
+    try:
+        results = convert_batch(files, options, progress_callback=progress_callback,
+                                result_callback=record, should_stop=should_stop)
+        removed = manifest.prune() if prune else []
+    finally:
+        # Guarda também o que terminou antes de um cancelamento
+        manifest.save()
+    return results, skipped, removed
+
+
+def conversion_job(ctx: JobContext, input_files: List[str], output_folder: str, format: str,
+                   quality: int, width: Optional[int] = None, height: Optional[int] = None,
+                   keep_aspect: bool = True, incremental: bool = False,
+                   prune: bool = False) -> Tuple[str, List[ConversionResult], int]:
+    """
+    Tarefa: converte as imagens em paralelo (um processo por núcleo) para
+    `output_folder`. Retorna a pasta, os arquivos que falharam e quantos
+    foram pulados por já estarem convertidos.
+    """
+    def on_progress(done: int, total: int):
+        ctx.progress(done * 100 // total)
+        ctx.status(f"Convertidas {done} de {total} imagens...")
+
+    ctx.status("Verificando imagens já convertidas..." if incremental else "Convertendo...")
+    results, skipped, _ = run_conversion(
+        input_files,
+        output_folder,
+        ConversionOptions(format, quality, width, height, keep_aspect),
+        incremental,
+        prune,
+        progress_callback=on_progress,
+        should_stop=ctx.cancelled
+    )
+    return output_folder, [result for result in results if result.error], skipped
+
+
+def convert_images(source: str, target: str, format: str = "png", quality: int = 85,
+                   incremental: bool = False, prune: bool = False) -> List[str]:
+    """
+    Converte todas as imagens da pasta `source` para `target`, sem interface
+    (usado pela API web). Falhas de arquivos isolados não param o lote, mas
+    são informadas no fim. Com `incremental`, só converte o que mudou.
+    """
+    os.makedirs(target, exist_ok=True)
+    files = list_images(source)
+    results, _, _ = run_conversion(files, target, ConversionOptions(format, quality), incremental, prune)
+
+    failed = [result for result in results if result.error]
+    if failed:
+        raise RuntimeError(
+            f"{len(failed)} de {len(files)} imagens não foram convertidas "
+            f"({os.path.basename(failed[0].input_file)}: {failed[0].error})"
+        )
+    return [result.output_file for result in results]
+
 
 class ImageConverter(QWidget):
     def __init__(self):
         super().__init__()
         self.input_files = []
         self.output_dir = None
+        self.processor = None
         self.setup_ui()
             
     def setup_ui(self):
@@ -243,6 +329,45 @@ class ImageConverter(QWidget):
         self.resize_options.hide()
         config_layout.addWidget(self.resize_options)
 
+        # Modo incremental: mesma pasta de saída, só converte o que mudou
+        self.incremental_check = QCheckBox("Incremental (pular imagens já convertidas)")
+        self.incremental_check.setStyleSheet("""
+            QCheckBox {
+                color: white;
+            }
+            QCheckBox::indicator {
+                width: 16px;
+                height: 16px;
+                background-color: #3d3d3d;
+                border-radius: 3px;
+            }
+            QCheckBox::indicator:checked {
+                background-color: #4a90e2;
+            }
+        """)
+        self.incremental_check.stateChanged.connect(
+            lambda state: self.prune_check.setEnabled(state == Qt.CheckState.Checked.value)
+        )
+        config_layout.addWidget(self.incremental_check)
+
+        self.prune_check = QCheckBox("Apagar convertidas cujas originais foram removidas")
+        self.prune_check.setStyleSheet("""
+            QCheckBox {
+                color: white;
+            }
+            QCheckBox::indicator {
+                width: 16px;
+                height: 16px;
+                background-color: #3d3d3d;
+                border-radius: 3px;
+            }
+            QCheckBox::indicator:checked {
+                background-color: #4a90e2;
+            }
+        """)
+        self.prune_check.setEnabled(False)
+        config_layout.addWidget(self.prune_check)
+
         layout.addWidget(config_frame)
 
         # Botões de ação
@@ -333,79 +458,88 @@ class ImageConverter(QWidget):
         if not self.input_files:
             return
 
+        incremental = self.incremental_check.isChecked()
         try:
             # Cria pasta para as imagens convertidas
-            output_folder = os.path.join(
-                self.output_dir,
-                f"convertidas_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            )
+            if incremental:
+                output_folder = os.path.join(self.output_dir, INCREMENTAL_FOLDER)
+            else:
+                output_folder = os.path.join(
+                    self.output_dir,
+                    f"convertidas_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                )
             os.makedirs(output_folder, exist_ok=True)
-            
-            # Configura a interface
-            self.process_btn.setEnabled(False)
-            self.select_images_btn.setEnabled(False)
-            self.progress_bar.setMaximum(len(self.input_files))
-            self.progress_bar.setValue(0)
-            self.progress_bar.show()
-            
-            # Configurações
-            format = self.format_combo.currentText().lower()
-            quality = self.quality_spin.value()
-            resize = self.resize_check.isChecked()
-            width = self.width_spin.value() if resize else None
-            height = self.height_spin.value() if resize else None
-            keep_aspect = self.keep_aspect.isChecked()
-            
-            # Processa cada imagem
-            for i, input_file in enumerate(self.input_files):
-                self.status_label.setText(f"Processando {os.path.basename(input_file)}...")
-                self.progress_bar.setValue(i + 1)
-                
-                # Abre a imagem
-                with Image.open(input_file) as img:
-                    # Converte para RGB se necessário (alguns formatos não suportam RGBA)
-                    if format == "jpeg" and img.mode in ("RGBA", "P"):
-                        img = img.convert("RGB")
-                    
-                    # Redimensiona se necessário
-                    if resize:
-                        if keep_aspect:
-                            # Calcula nova altura mantendo proporção
-                            ratio = min(width/img.width, height/img.height)
-                            new_width = int(img.width * ratio)
-                            new_height = int(img.height * ratio)
-                        else:
-                            new_width = width
-                            new_height = height
-                        
-                        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                    
-                    # Nome do arquivo de saída
-                    output_file = os.path.join(
-                        output_folder,
-                        f"{os.path.splitext(os.path.basename(input_file))[0]}.{format}"
-                    )
-                    
-                    # Salva a imagem
-                    if format in ("jpeg", "webp"):
-                        img.save(output_file, quality=quality, optimize=True)
-                    else:
-                        img.save(output_file, optimize=True)
-            
-            # Finaliza
-            self.process_btn.setEnabled(True)
-            self.select_images_btn.setEnabled(True)
+        except OSError as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao criar pasta de destino: {str(e)}")
+            return
+
+        # Configura a interface
+        self.process_btn.setEnabled(False)
+        self.select_images_btn.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.status_label.setStyleSheet("color: #4a90e2;")
+
+        # Configurações
+        resize = self.resize_check.isChecked()
+        self.processor = get_job_runner().submit(
+            f"Converter {len(self.input_files)} imagem(ns)",
+            conversion_job,
+            list(self.input_files),
+            output_folder,
+            self.format_combo.currentText().lower(),
+            self.quality_spin.value(),
+            self.width_spin.value() if resize else None,
+            self.height_spin.value() if resize else None,
+            self.keep_aspect.isChecked(),
+            incremental,
+            incremental and self.prune_check.isChecked()
+        )
+        self.processor.progress.connect(self.progress_bar.setValue)
+        self.processor.status_changed.connect(self.status_label.setText)
+        self.processor.finished.connect(self.processing_finished)
+        self.processor.error.connect(self.show_error)
+        self.processor.cancelled.connect(self.processing_cancelled)
+
+    def reset_ui(self):
+        self.process_btn.setEnabled(True)
+        self.select_images_btn.setEnabled(True)
+        self.progress_bar.hide()
+
+    def processing_finished(self, result):
+        output_folder, failed, skipped = result
+        self.reset_ui()
+        if skipped:
+            self.status_label.setText(
+                f"Processamento concluído! {skipped} imagem(ns) já convertidas foram puladas."
+            )
+        else:
             self.status_label.setText("Processamento concluído!")
-            self.status_label.setStyleSheet("color: #2ecc71; font-weight: bold;")
-            self.progress_bar.hide()
-            
-            QMessageBox.information(
+        self.status_label.setStyleSheet("color: #2ecc71; font-weight: bold;")
+
+        if failed:
+            # As demais imagens foram convertidas normalmente
+            details = "\n".join(
+                f"{os.path.basename(item.input_file)}: {item.error}" for item in failed[:10]
+            )
+            QMessageBox.warning(
                 self,
-                "Sucesso",
-                f"Processamento concluído!\nAs imagens foram salvas em:\n{output_folder}"
+                "Aviso",
+                f"{len(failed)} imagem(ns) não foram convertidas:\n{details}"
             )
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro inesperado: {str(e)}")
-            self.process_btn.setEnabled(True)
-            self.select_images_btn.setEnabled(True)
+
+        QMessageBox.information(
+            self,
+            "Sucesso",
+            f"Processamento concluído!\nAs imagens foram salvas em:\n{output_folder}"
+        )
+
+    def processing_cancelled(self):
+        self.reset_ui()
+        self.status_label.setText("Processamento cancelado.")
+
+    def show_error(self, message: str):
+        self.reset_ui()
+        self.status_label.setText("Erro no processamento")
+        self.status_label.setStyleSheet("color: #e74c3c;")
+        QMessageBox.critical(self, "Erro", f"Erro inesperado: {message}")
@@ -0,0 +1,528 @@
+import importlib
+import itertools
+import os
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List, Optional
+
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+)
+from PyQt6.QtCore import Qt, QCoreApplication, QObject, QRunnable, QThread, QThreadPool, QTimer, pyqtSignal
+
+from tools.job_store import DEFAULT_STORE_PATH, JobStore
+
+# Recursos disputados pelas tarefas, cada um com seu limite de execuções simultâneas
+CPU = "cpu"          # codificações (ffmpeg), reconhecimento local, imagens
+DISK = "disk"        # cópias e organização de arquivos
+NETWORK = "network"  # downloads e reconhecimento online
+
+RESOURCE_LIMITS = {
+    # Cada codificação já usa vários núcleos
+    CPU: max(1, min(2, (os.cpu_count() or 1) // 4)),
+    DISK: 2,
+    NETWORK: 4,
+}
+
+# Prioridades (maior roda primeiro; empate: a mais antiga)
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 5
+PRIORITY_HIGH = 10
+
+PRIORITY_LABELS = {PRIORITY_LOW: "Baixa", PRIORITY_NORMAL: "Normal", PRIORITY_HIGH: "Alta"}
+
+# Estados de uma tarefa
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINAL_STATES = (DONE, FAILED, CANCELLED)
+
+STATE_LABELS = {
+    QUEUED: "Na fila",
+    RUNNING: "Executando",
+    DONE: "Concluída",
+    FAILED: "Erro",
+    CANCELLED: "Cancelada",
+}
+
+
+class JobCancelled(Exception):
+    """Levantada pela própria tarefa quando percebe que foi cancelada."""
+
+
+class JobContext:
+    """
+    O que a função da tarefa recebe para informar o andamento. Pode ser
+    chamada de qualquer thread: tudo chega à interface por sinais.
+    """
+
+    def __init__(self, job: 'Job'):
+        self._job = job
+
+    def progress(self, value: int):
+        self._job._set_progress(value)
+
+    def status(self, text: str):
+        self._job.status_changed.emit(text)
+
+    def emit(self, kind: str, value=None):
+        """Resultado parcial (ex.: um segmento pronto) para a ferramenta que criou a tarefa."""
+        self._job.event.emit(kind, value)
+
+    def cancelled(self) -> bool:
+        return self._job.cancel_requested
+
+
+def _target_name(function: Callable) -> Optional[str]:
+    """"módulo:função" para refazer a tarefa após reiniciar (None se for função local)."""
+    qualname = getattr(function, '__qualname__', '')
+    if not qualname or '<' in qualname:
+        return None
+    return f"{function.__module__}:{qualname}"
+
+
+def _resolve(target: str) -> Callable:
+    module, _, name = target.partition(":")
+    function = importlib.import_module(module)
+    for attribute in name.split("."):
+        function = getattr(function, attribute)
+    return function
+
+
+def call_job(ctx: JobContext, target: str, *args, **kwargs):
+    """Tarefa que chama uma função comum ("módulo:função"), sem acompanhar o progresso."""
+    return _resolve(target)(*args, **kwargs)
+
+
+class Job(QObject):
+    progress = pyqtSignal(int)
+    status_changed = pyqtSignal(str)
+    event = pyqtSignal(str, object)   # tipo, valor
+    finished = pyqtSignal(object)     # valor retornado pela função
+    error = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    state_changed = pyqtSignal()
+
+    def __init__(self, id: int, title: str, function: Callable, args=(), kwargs=None,
+                 resource: str = CPU, priority: int = PRIORITY_NORMAL, runner: 'JobRunner' = None):
+        super().__init__()
+        self.id = id
+        self.title = title
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.resource = resource
+        self.priority = priority
+        self.state = QUEUED
+        self.value = 0
+        self.message = ""
+        self.result = None
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = False
+        self._runner = runner
+        self._runnable = None
+        self._done = threading.Event()
+        self._ready = False   # só é despachada depois que quem chamou submit() conectou os sinais
+
+    def cancel(self):
+        self.cancel_requested = True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Bloqueia até a tarefa terminar (usado pela API web, fora do Qt)."""
+        return self._done.wait(timeout)
+
+    def eta(self) -> Optional[float]:
+        """Segundos restantes estimados pelo ritmo do progresso até agora."""
+        if self.state != RUNNING or not self.started_at or self.value <= 0:
+            return None
+        elapsed = time.monotonic() - self.started_at
+        return elapsed * (100 - self.value) / self.value
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'title': self.title,
+            'state': self.state,
+            'progress': self.value,
+            'message': self.message,
+            'resource': self.resource,
+            'priority': self.priority,
+            'eta': self.eta(),
+        }
+
+    def _set_progress(self, value: int):
+        self.value = max(0, min(100, int(value)))
+        self.progress.emit(self.value)
+
+    def _set_state(self, state: str, message: str = ""):
+        self.state = state
+        self.message = message
+        if state == RUNNING:
+            self.started_at = time.monotonic()
+        elif state in FINAL_STATES:
+            self.finished_at = time.monotonic()
+        if self._runner is not None:
+            self._runner._save(self)
+        if state in FINAL_STATES and self._runnable is None:
+            self._done.set()  # Nunca chegou a rodar (cancelada na fila)
+        self.state_changed.emit()
+
+    def _run(self):
+        if self.cancel_requested:
+            self._set_state(CANCELLED)
+            self.cancelled.emit()
+            return
+
+        self._set_state(RUNNING)
+        try:
+            result = self.function(JobContext(self), *self.args, **self.kwargs)
+        except JobCancelled:
+            result = None
+        except Exception as e:
+            traceback.print_exc()
+            self._set_state(FAILED, str(e))
+            self.error.emit(str(e))
+            return
+
+        if self.cancel_requested:
+            self._set_state(CANCELLED)
+            self.cancelled.emit()
+        else:
+            self.result = result
+            self._set_progress(100)
+            self._set_state(DONE)
+            self.finished.emit(result)
+
+
+class _JobRunnable(QRunnable):
+    def __init__(self, runner: 'JobRunner', job: Job):
+        super().__init__()
+        self.runner = runner
+        self.job = job
+        # A tarefa guarda a referência; o Qt não deve apagar o objeto sozinho
+        self.setAutoDelete(False)
+
+    def run(self):
+        try:
+            self.job._run()
+        finally:
+            self.runner._job_done(self.job)
+            # Só libera quem espera (wait) depois que a thread largou a tarefa
+            self.job._done.set()
+
+
+class JobRunner(QObject):
+    """
+    Agendador central das tarefas pesadas (interface Qt e API web). As
+    tarefas esperam numa fila por prioridade e cada recurso (CPU, disco,
+    rede) tem seu próprio limite de execuções simultâneas: um download não
+    espera uma renderização terminar. A fila fica em disco (JobStore): as
+    tarefas que ainda esperavam voltam para a fila ao reabrir o programa.
+    """
+    job_added = pyqtSignal(object)
+
+    def __init__(self, store: Optional[JobStore] = None, limits: Optional[Dict[str, int]] = None):
+        super().__init__()
+        self.store = store
+        self.limits = dict(RESOURCE_LIMITS, **(limits or {}))
+        self.pool = QThreadPool()
+        # Threads suficientes para todos os recursos ao mesmo tempo
+        self.pool.setMaxThreadCount(sum(self.limits.values()))
+        self.jobs: List[Job] = []
+        self.queue: List[Job] = []
+        self.running = {resource: 0 for resource in self.limits}
+        self.closing = False
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+
+    def submit(self, title: str, function: Callable, *args, resource: str = CPU,
+               priority: int = PRIORITY_NORMAL, **kwargs) -> Job:
+        """
+        Agenda `function(ctx, *args, **kwargs)`. Conecte os sinais da tarefa
+        devolvida antes de voltar ao loop de eventos. Só funções de módulo
+        com argumentos simples (JSON) são retomadas após reiniciar.
+        """
+        if self.store is not None:
+            job_id = self.store.add(title, _target_name(function), args, kwargs, resource, priority, QUEUED)
+        else:
+            job_id = next(self._ids)
+        return self._enqueue(Job(job_id, title, function, args, kwargs, resource, priority, self))
+
+    def _enqueue(self, job: Job) -> Job:
+        with self._lock:
+            self.jobs.append(job)
+            self.queue.append(job)
+        self.job_added.emit(job)
+
+        app = QCoreApplication.instance()
+        if app is not None and app.thread() == QThread.currentThread():
+            # Na thread da interface, a tarefa só começa na volta ao loop de
+            # eventos: uma tarefa rápida não emite antes dos sinais conectados
+            QTimer.singleShot(0, lambda: self._release(job))
+        else:
+            # Sem loop de eventos aqui (API web): ninguém conecta sinais
+            self._release(job)
+        return job
+
+    def _release(self, job: Job):
+        job._ready = True
+        self._dispatch()
+
+    def _dispatch(self):
+        """Inicia as tarefas da fila que cabem no limite do seu recurso."""
+        with self._lock:
+            if self.closing:
+                return
+            for job in sorted(self.queue, key=lambda job: (-job.priority, job.id)):
+                if job._ready and self.running[job.resource] < self.limits[job.resource]:
+                    self.queue.remove(job)
+                    self.running[job.resource] += 1
+                    job._runnable = _JobRunnable(self, job)
+                    self.pool.start(job._runnable)
+
+    def _job_done(self, job: Job):
+        with self._lock:
+            self.running[job.resource] -= 1
+        self._dispatch()
+
+    def _save(self, job: Job):
+        # Também ao fechar: quem termina ou é cancelado não fica como "executando"
+        if self.store is not None:
+            self.store.update(job.id, job.state, job.message, job.priority)
+
+    def get(self, job_id: int) -> Optional[Job]:
+        return next((job for job in self.jobs if job.id == job_id), None)
+
+    def cancel(self, job: Job):
+        job.cancel()
+        with self._lock:
+            queued = job in self.queue
+            if queued:
+                self.queue.remove(job)
+        # Ainda na fila: sai sem nunca rodar
+        if queued:
+            job._set_state(CANCELLED)
+            job.cancelled.emit()
+
+    def set_priority(self, job: Job, priority: int):
+        with self._lock:
+            job.priority = priority
+        self._save(job)
+        job.state_changed.emit()
+
+    def restore(self):
+        """
+        Recoloca na fila as tarefas que esperavam na última execução. As que
+        foram interrompidas no meio ficam como erro: refazê-las sozinhas
+        repetiria o que já foi feito (pastas criadas, arquivos copiados).
+        """
+        if self.store is None:
+            return
+        self.store.delete(FINAL_STATES)
+        for row in self.store.pending((QUEUED, RUNNING)):
+            try:
+                function = _resolve(row['target']) if row['target'] else None
+            except (ImportError, AttributeError):
+                function = None
+            job = Job(row['id'], row['title'], function, tuple(row['args']), row['kwargs'],
+                      row['resource'], row['priority'], self)
+            if row['state'] == RUNNING:
+                message = "Tarefa interrompida ao fechar o programa"
+            elif function is None or row['resource'] not in self.limits:
+                message = "Tarefa interrompida; não pode ser retomada"
+            else:
+                self._enqueue(job)
+                continue
+            job._set_state(FAILED, message)
+            self.jobs.append(job)
+            self.job_added.emit(job)
+
+    def clear_finished(self):
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job.state not in FINAL_STATES]
+        if self.store is not None:
+            self.store.delete(FINAL_STATES)
+
+    def shutdown(self, timeout_ms: int = 5000):
+        """
+        Interrompe as tarefas em execução e espera terminarem (ficam
+        gravadas como canceladas). As que ainda esperavam continuam
+        gravadas e voltam para a fila na próxima abertura.
+        """
+        with self._lock:
+            self.closing = True
+        for job in list(self.jobs):
+            job.cancel()
+        self.pool.waitForDone(timeout_ms)
+
+
+_runners: Dict[str, JobRunner] = {}
+
+
+def get_job_runner(store_path: str = DEFAULT_STORE_PATH) -> JobRunner:
+    """
+    Agendador compartilhado por todas as ferramentas do WebDark Studio, um
+    por fila em disco (a interface Qt e a API web têm filas separadas). Na
+    primeira chamada, retoma a fila gravada em `store_path`.
+    """
+    if store_path not in _runners:
+        runner = _runners[store_path] = JobRunner(JobStore(store_path))
+        runner.restore()
+    return _runners[store_path]
+
+
+def _format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    return f"{minutes}m{seconds:02d}s"
+
+
+class JobQueueView(QWidget):
+    """Lista das tarefas (na fila, executando e concluídas) com cancelamento e prioridade."""
+
+    COLUMNS = ["Tarefa", "Estado", "Prioridade", "Progresso", "Tempo restante"]
+
+    def __init__(self, runner: Optional[JobRunner] = None):
+        super().__init__()
+        self.runner = runner or get_job_runner()
+        self.rows = {}  # id da tarefa -> linha
+        self.setup_ui()
+
+        self.runner.job_added.connect(self.add_job)
+        for job in self.runner.jobs:
+            self.add_job(job)
+
+        # Atualiza o tempo restante mesmo sem novos sinais
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        header = QHBoxLayout()
+        title = QLabel("Fila de Tarefas")
+        title.setStyleSheet("color: white; font-size: 14px; font-weight: bold;")
+        header.addWidget(title)
+        header.addStretch()
+
+        button_style = """
+            QPushButton {
+                background-color: #3d3d3d;
+                color: white;
+                border: none;
+                padding: 5px 10px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #4d4d4d;
+            }
+        """
+        self.raise_btn = QPushButton("Aumentar Prioridade")
+        self.raise_btn.setStyleSheet(button_style)
+        self.raise_btn.clicked.connect(lambda: self.change_priority(1))
+        header.addWidget(self.raise_btn)
+
+        self.lower_btn = QPushButton("Reduzir Prioridade")
+        self.lower_btn.setStyleSheet(button_style)
+        self.lower_btn.clicked.connect(lambda: self.change_priority(-1))
+        header.addWidget(self.lower_btn)
+
+        self.cancel_btn = QPushButton("Cancelar")
+        self.cancel_btn.setStyleSheet(button_style)
+        self.cancel_btn.clicked.connect(self.cancel_selected)
+        header.addWidget(self.cancel_btn)
+
+        self.clear_btn = QPushButton("Limpar Concluídas")
+        self.clear_btn.setStyleSheet(button_style)
+        self.clear_btn.clicked.connect(self.clear_finished)
+        header.addWidget(self.clear_btn)
+        layout.addLayout(header)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setStyleSheet("""
+            QTableWidget {
+                background-color: #2d2d2d;
+                color: white;
+                border: none;
+                border-radius: 5px;
+            }
+            QHeaderView::section {
+                background-color: #3d3d3d;
+                color: white;
+                border: none;
+                padding: 4px;
+            }
+        """)
+        layout.addWidget(self.table)
+
+    def add_job(self, job: Job):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self.rows[job.id] = job
+        for column in range(len(self.COLUMNS)):
+            self.table.setItem(row, column, QTableWidgetItem())
+        self.table.item(row, 0).setData(Qt.ItemDataRole.UserRole, job.id)
+
+        job.progress.connect(self.refresh)
+        job.state_changed.connect(self.refresh)
+        self.refresh()
+
+    def refresh(self):
+        for row in range(self.table.rowCount()):
+            job = self.rows.get(self.table.item(row, 0).data(Qt.ItemDataRole.UserRole))
+            if job is None:
+                continue
+            state = STATE_LABELS[job.state]
+            if job.message:
+                state = f"{state}: {job.message}"
+            self.table.item(row, 0).setText(job.title)
+            self.table.item(row, 1).setText(state)
+            self.table.item(row, 2).setText(PRIORITY_LABELS.get(job.priority, str(job.priority)))
+            self.table.item(row, 3).setText(f"{job.value}%")
+            self.table.item(row, 4).setText(_format_eta(job.eta()))
+
+    def selected_jobs(self) -> List[Job]:
+        rows = {index.row() for index in self.table.selectionModel().selectedRows()}
+        return [
+            self.rows[self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)]
+            for row in sorted(rows)
+        ]
+
+    def cancel_selected(self):
+        for job in self.selected_jobs():
+            self.runner.cancel(job)
+
+    def change_priority(self, step: int):
+        """Sobe/desce um nível de prioridade as tarefas selecionadas que ainda estão na fila."""
+        levels = sorted(PRIORITY_LABELS)
+        for job in self.selected_jobs():
+            if job.state != QUEUED:
+                continue
+            index = levels.index(job.priority) if job.priority in levels else levels.index(PRIORITY_NORMAL)
+            index = max(0, min(len(levels) - 1, index + step))
+            self.runner.set_priority(job, levels[index])
+
+    def clear_finished(self):
+        self.runner.clear_finished()
+        for row in reversed(range(self.table.rowCount())):
+            job_id = self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+            if self.rows[job_id].state in FINAL_STATES:
+                self.table.removeRow(row)
+                del self.rows[job_id]
@@ -0,0 +1,87 @@
+import json
+import os
+import sqlite3
+import time
+from typing import List, Optional
+
+# Local padrão da fila persistente de tarefas
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser("~"), ".webdark_studio", "jobs.sqlite")
+
+
+class JobStore:
+    """
+    Fila de tarefas em disco (SQLite): as tarefas que esperavam na fila
+    quando o programa fecha voltam para ela na próxima abertura.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT,
+                    target TEXT,
+                    args TEXT,
+                    kwargs TEXT,
+                    resource TEXT,
+                    priority INTEGER,
+                    state TEXT,
+                    message TEXT,
+                    created_at REAL
+                )
+            """)
+
+    def _connect(self):
+        # Uma conexão por operação, como no diário de renderização
+        return sqlite3.connect(self.path, timeout=30)
+
+    def add(self, title: str, target: Optional[str], args: tuple, kwargs: dict,
+            resource: str, priority: int, state: str) -> int:
+        """
+        Grava a tarefa e retorna o id. `target` ("módulo:função") é None
+        quando a tarefa não pode ser refeita depois (função local ou
+        argumentos que não cabem em JSON).
+        """
+        try:
+            args_json, kwargs_json = json.dumps(list(args)), json.dumps(kwargs)
+        except (TypeError, ValueError):
+            target, args_json, kwargs_json = None, None, None
+
+        with self._connect() as db:
+            cursor = db.execute(
+                "INSERT INTO jobs (title, target, args, kwargs, resource, priority, state, message, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, '', ?)",
+                (title, target, args_json, kwargs_json, resource, priority, state, time.time())
+            )
+            return cursor.lastrowid
+
+    def update(self, job_id: int, state: str, message: str, priority: int):
+        with self._connect() as db:
+            db.execute(
+                "UPDATE jobs SET state = ?, message = ?, priority = ? WHERE id = ?",
+                (state, message, priority, job_id)
+            )
+
+    def pending(self, states: tuple) -> List[dict]:
+        """Tarefas nos estados `states`, na ordem em que foram criadas."""
+        placeholders = ", ".join("?" * len(states))
+        with self._connect() as db:
+            db.row_factory = sqlite3.Row
+            rows = db.execute(
+                f"SELECT * FROM jobs WHERE state IN ({placeholders}) ORDER BY id", states
+            ).fetchall()
+
+        jobs = []
+        for row in rows:
+            job = dict(row)
+            job['args'] = json.loads(job['args']) if job['args'] else []
+            job['kwargs'] = json.loads(job['kwargs']) if job['kwargs'] else {}
+            jobs.append(job)
+        return jobs
+
+    def delete(self, states: tuple):
+        placeholders = ", ".join("?" * len(states))
+        with self._connect() as db:
+            db.execute(f"DELETE FROM jobs WHERE state IN ({placeholders})", states)
@@ -0,0 +1,160 @@
+import bisect
+import hashlib
+import json
+import os
+import subprocess
+from dataclasses import dataclass, asdict
+from typing import List, Optional
+
+# Versão do formato do cache (mude se a estrutura do JSON mudar)
+CACHE_VERSION = 2
+
+# Pasta do cache (nada é gravado nas pastas dos vídeos)
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".webdark_studio", "keyframes")
+
+
+@dataclass
+class KeyframeIndex:
+    path: str
+    size: int
+    mtime_ns: int
+    duration: float
+    keyframes: List[float]  # tempos (segundos, a partir do início do arquivo) dos keyframes, em ordem
+
+    def keyframe_before(self, time: float) -> float:
+        """Retorna o último keyframe em ou antes de `time`."""
+        i = bisect.bisect_right(self.keyframes, time)
+        return self.keyframes[i - 1] if i > 0 else 0.0
+
+    def keyframe_after(self, time: float) -> float:
+        """Retorna o primeiro keyframe em ou depois de `time` (ou o fim do vídeo)."""
+        i = bisect.bisect_left(self.keyframes, time)
+        return self.keyframes[i] if i < len(self.keyframes) else self.duration
+
+    def snap(self, time: float, low: Optional[float] = None, high: Optional[float] = None) -> float:
+        """
+        Ajusta `time` para o keyframe mais próximo. Se `low`/`high` forem
+        informados, só aceita keyframes dentro do intervalo; sem nenhum
+        keyframe no intervalo, devolve o próprio `time`.
+        """
+        candidates = [self.keyframe_before(time), self.keyframe_after(time)]
+        if low is not None:
+            candidates = [t for t in candidates if t >= low]
+        if high is not None:
+            candidates = [t for t in candidates if t <= high]
+        if not candidates:
+            return time
+        return min(candidates, key=lambda t: abs(t - time))
+
+    def segment_times(self, segment_duration: float) -> List[float]:
+        """Pontos de corte a cada `segment_duration` segundos, alinhados aos keyframes."""
+        times = []
+        target = segment_duration
+        while target < self.duration:
+            time = self.snap(target, low=(times[-1] if times else 0.0) + 0.001)
+            if 0 < time < self.duration:
+                times.append(time)
+            target += segment_duration
+        return times
+
+
+def _file_key(path: str):
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+def _cache_path(path: str) -> str:
+    """Arquivo de cache do vídeo na pasta do usuário (nome pelo hash do caminho)."""
+    digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, f"{digest}.json")
+
+
+def _read_cache(path: str) -> Optional[KeyframeIndex]:
+    abs_path, size, mtime_ns = _file_key(path)
+    try:
+        with open(_cache_path(path), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    # Só vale se o vídeo não mudou desde que o índice foi gerado
+    if (data.get('version') == CACHE_VERSION and data.get('path') == abs_path
+            and data.get('size') == size and data.get('mtime_ns') == mtime_ns):
+        return KeyframeIndex(
+            path=abs_path,
+            size=size,
+            mtime_ns=mtime_ns,
+            duration=data['duration'],
+            keyframes=data['keyframes']
+        )
+    return None
+
+
+def _write_cache(index: KeyframeIndex):
+    data = asdict(index)
+    data['version'] = CACHE_VERSION
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(_cache_path(index.path), 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+    except OSError:
+        pass  # Sem cache: o índice é refeito na próxima vez
+
+
+def probe_keyframes(path: str, ffprobe_path: str = 'ffprobe') -> KeyframeIndex:
+    """
+    Lê os pacotes do primeiro stream de vídeo com o ffprobe (sem decodificar)
+    e monta o índice de keyframes. Os tempos ficam relativos ao início do
+    arquivo (`start_time`), como contam o -ss e o muxer de segmentos: em
+    MPEG-TS ou MP4 editado o primeiro pacote não está no zero.
+    """
+    abs_path, size, mtime_ns = _file_key(path)
+    command = [
+        ffprobe_path,
+        '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,flags:format=start_time,duration',
+        '-of', 'compact=p=1:nk=0',
+        path
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe falhou ao indexar {path}: {result.stderr.strip()}")
+
+    keyframes = []
+    duration = 0.0
+    start_time = 0.0
+    for line in result.stdout.splitlines():
+        # Ex.: "packet|pts_time=1.001000|flags=K__" ou "format|start_time=1.4|duration=60"
+        section, _, rest = line.partition("|")
+        fields = dict(field.partition("=")[::2] for field in rest.split("|"))
+        if section == 'packet':
+            # flags: "K_" indica keyframe
+            if 'K' in fields.get('flags', '') and fields.get('pts_time', 'N/A') != 'N/A':
+                keyframes.append(float(fields['pts_time']))
+        elif section == 'format':
+            if fields.get('duration', 'N/A') != 'N/A':
+                duration = float(fields['duration'])
+            if fields.get('start_time', 'N/A') != 'N/A':
+                start_time = float(fields['start_time'])
+
+    keyframes = sorted(max(time - start_time, 0.0) for time in keyframes)
+    return KeyframeIndex(
+        path=abs_path,
+        size=size,
+        mtime_ns=mtime_ns,
+        duration=duration,
+        keyframes=keyframes
+    )
+
+
+def load_keyframe_index(path: str, ffprobe_path: str = 'ffprobe') -> KeyframeIndex:
+    """
+    Retorna o índice de keyframes do vídeo, usando o cache quando o arquivo
+    não mudou (mesmo caminho, tamanho e data de modificação).
+    """
+    index = _read_cache(path)
+    if index is None:
+        index = probe_keyframes(path, ffprobe_path)
+        _write_cache(index)
+    return index
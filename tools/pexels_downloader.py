@@ -1,5 +1,6 @@
 import os
 import json
+import time
 from typing import Optional, List, Dict
 from dataclasses import dataclass
 from PyQt6.QtWidgets import (
@@ -8,10 +9,13 @@ from PyQt6.QtWidgets import (
     QPushButton, QProgressBar, QMessageBox,
     QFileDialog, QFrame
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import Qt
 import requests
 from dotenv import load_dotenv
+from tools.download_engine import DOWNLOAD_WORKERS, DownloadTask, create_session, download_all
+from tools.file_transfer import format_size
+from tools.hash_index import HashIndex
+from tools.job_runner import NETWORK, JobCancelled, JobContext, get_job_runner
 
 # Carrega variáveis de ambiente (para API key)
 load_dotenv()
@@ -24,65 +28,154 @@ class DownloadItem:
     width: int
     height: int
 
-class DownloaderThread(QThread):
-    status = pyqtSignal(str)  # Novo sinal para status detalhado
-    progress = pyqtSignal(int, int)  # (current, total)
-    finished = pyqtSignal()
-    error = pyqtSignal(str)
-    item_completed = pyqtSignal(str)  # filename
+def search_media(api_key: str, query: str, media_type: str,
+                 orientation: str = "") -> List[DownloadItem]:
+    """Busca fotos (`media_type='photos'`) ou vídeos no Pexels."""
+    # Define a URL base da API
+    if media_type == "photos":
+        url = "https://api.pexels.com/v1/search"
+    else:
+        url = "https://api.pexels.com/videos/search"
+
+    # Parâmetros da busca
+    params = {
+        "query": query,
+        "per_page": 80  # Máximo permitido pela API
+    }
+    if orientation:
+        params["orientation"] = orientation
+
+    headers = {"Authorization": api_key}
+
+    print(f"Fazendo requisição para: {url}")
+    print(f"Parâmetros: {params}")
+    response = requests.get(url, headers=headers, params=params, timeout=(5, 30))
+    response.raise_for_status()
+    data = response.json()
+    print(f"Resposta recebida. Status: {response.status_code}")
+
+    items = []
+    if media_type == "photos":
+        photos = data.get("photos", [])
+        print(f"Encontradas {len(photos)} fotos")
+        for photo in photos:
+            items.append(DownloadItem(
+                url=photo["src"]["original"],
+                filename=f"photo_{photo['id']}.jpg",
+                media_type="image",
+                width=photo["width"],
+                height=photo["height"]
+            ))
+    else:
+        videos = data.get("videos", [])
+        print(f"Encontrados {len(videos)} vídeos")
+        for video in videos:
+            # Pega o vídeo com maior resolução
+            video_files = sorted(
+                video["video_files"],
+                key=lambda x: x.get("width", 0) * x.get("height", 0),
+                reverse=True
+            )
+            if video_files:
+                best_video = video_files[0]
+                items.append(DownloadItem(
+                    url=best_video["link"],
+                    filename=f"video_{video['id']}.mp4",
+                    media_type="video",
+                    width=best_video.get("width", 0),
+                    height=best_video.get("height", 0)
+                ))
+
+    return items
+
+
+def download_items(items: List[DownloadItem], output_folder: str, workers: int = DOWNLOAD_WORKERS,
+                   progress_callback=None, result_callback=None,
+                   should_stop=None) -> List[DownloadTask]:
+    """
+    Baixa os itens em paralelo numa sessão HTTP compartilhada. Conteúdo que
+    já está na biblioteca (tools.hash_index) é descartado: a tarefa volta
+    com `duplicate` e o caminho do arquivo existente.
+    """
+    tasks = [DownloadTask(item.url, os.path.join(output_folder, item.filename)) for item in items]
+    with create_session(workers) as session, HashIndex() as index:
+        return download_all(tasks, workers, session, progress_callback, result_callback,
+                            should_stop, index)
+
+
+def download_videos(query: str, path: str, limit: Optional[int] = None, progress_callback=None,
+                    orientation: str = "", api_key: Optional[str] = None,
+                    should_stop=None) -> Dict:
+    """
+    Busca e baixa vídeos (usado pela interface web). `progress_callback`
+    recebe (baixados, total, mensagem). Retorna {'success', 'downloaded',
+    'path'} ou {'success': False, 'error'}.
+    """
+    api_key = api_key or os.getenv('PEXELS_API_KEY', '')
+    if not api_key:
+        return {"success": False, "error": "Chave da API do Pexels não configurada (PEXELS_API_KEY)"}
+
+    os.makedirs(path, exist_ok=True)
+    items = search_media(api_key, query, "videos", orientation)[:limit]
+    if not items:
+        return {"success": False, "error": "Nenhum vídeo encontrado."}
+
+    completed = []
+
+    def on_result(task: DownloadTask):
+        completed.append(task)
+        if progress_callback:
+            name = os.path.basename(task.path)
+            message = f"Erro ao baixar {name}" if task.error else f"Baixado: {name}"
+            progress_callback(len(completed), len(items), message)
+
+    tasks = download_items(items, path, result_callback=on_result, should_stop=should_stop)
+    errors = [f"{os.path.basename(task.path)}: {task.error}" for task in tasks if task.error]
+    downloaded = len(tasks) - len(errors)
+    if not downloaded:
+        return {"success": False, "error": errors[0] if errors else "Download cancelado"}
+    return {"success": True, "downloaded": downloaded, "path": path, "errors": errors}
+
+
+def download_job(ctx: JobContext, query: str, media_type: str, orientation: str,
+                 output_folder: str) -> int:
+    """
+    Tarefa: busca e baixa as mídias. Emite 'found' (quantidade), 'item'
+    (arquivo baixado), 'item_duplicate' (arquivo que já tinha o conteúdo)
+    e 'item_error' (mensagem). Retorna os itens baixados. A chave da API é
+    lida do ambiente (PEXELS_API_KEY) aqui, para não ir para a fila em disco.
+    """
+    api_key = os.getenv('PEXELS_API_KEY', '')
+    if not api_key:
+        raise RuntimeError("Chave da API do Pexels não configurada")
+    ctx.status("Conectando à API do Pexels...")
+    items = search_media(api_key, query, media_type, orientation)
+    ctx.emit('found', len(items))
+    if not items:
+        return 0
+
+    print(f"\nIniciando download de {len(items)} itens...")
+    started = time.monotonic()
+
+    def on_progress(percent: float, done_bytes: int):
+        ctx.progress(int(percent))
+        rate = done_bytes / max(time.monotonic() - started, 1e-6)
+        ctx.status(f"Baixando: {format_size(done_bytes)} ({format_size(rate)}/s)")
+
+    def on_result(task: DownloadTask):
+        if task.error:
+            ctx.emit('item_error', f"Erro ao baixar {os.path.basename(task.path)}: {task.error}")
+        elif task.duplicate:
+            ctx.emit('item_duplicate', task.result)
+        else:
+            ctx.emit('item', task.result)
+
+    tasks = download_items(items, output_folder, progress_callback=on_progress,
+                           result_callback=on_result, should_stop=ctx.cancelled)
+    if ctx.cancelled():
+        raise JobCancelled()
+    return sum(1 for task in tasks if task.error is None)
 
-    def __init__(self, items: List[DownloadItem], output_folder: str):
-        super().__init__()
-        self.items = items
-        self.output_folder = output_folder
-        self.is_running = True
-
-    def stop(self):
-        self.is_running = False
-
-    def run(self):
-        total = len(self.items)
-        print(f"\nIniciando download de {total} itens...")
-        for i, item in enumerate(self.items, 1):
-            print(f"\nBaixando item {i}/{total}: {item.filename}")
-            if not self.is_running:
-                break
-
-            try:
-                self.status.emit(f"Conectando a {item.filename}...")
-                response = requests.get(item.url, stream=True, timeout=(5, 30))
-                response.raise_for_status()
-                
-                # Obtém o tamanho total do arquivo
-                total_size = int(response.headers.get('content-length', 0))
-                print(f"Tamanho do arquivo: {total_size/1024/1024:.2f} MB")
-                
-                self.status.emit(f"Baixando {item.filename}...")
-                
-                # Cria o nome do arquivo
-                filename = os.path.join(self.output_folder, item.filename)
-                
-                # Download do arquivo em chunks
-                downloaded_size = 0
-                with open(filename, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if not self.is_running:
-                            break
-                        if chunk:
-                            downloaded_size += len(chunk)
-                            f.write(chunk)
-                            if total_size > 0:
-                                progress = (downloaded_size / total_size) * 100
-                                self.status.emit(f"Baixando {item.filename}: {progress:.1f}%")
-                
-                self.item_completed.emit(filename)
-                self.progress.emit(i, total)
-                
-            except Exception as e:
-                self.error.emit(f"Erro ao baixar {item.filename}: {str(e)}")
-
-        if self.is_running:
-            self.finished.emit()
 
 class PexelsDownloader(QWidget):
     def __init__(self):
@@ -94,7 +187,6 @@ class PexelsDownloader(QWidget):
     def update_status(self, message: str):
         self.status_label.setText(message)
         self.status_label.setStyleSheet("color: #4a90e2;")
-        QApplication.processEvents()
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -283,6 +375,7 @@ class PexelsDownloader(QWidget):
             f.write(f'PEXELS_API_KEY={api_key}')
         
         self.api_key = api_key
+        os.environ['PEXELS_API_KEY'] = api_key  # Lida pela tarefa de download
         QMessageBox.information(self, "Sucesso", "Chave API salva com sucesso!")
 
     def select_output_folder(self):
@@ -301,87 +394,6 @@ class PexelsDownloader(QWidget):
     def get_selected_orientation(self) -> str:
         return self.orientation_group.checkedButton().property("value")
 
-    def search_media(self) -> Optional[List[DownloadItem]]:
-        print("Iniciando busca de mídia...")
-        if not self.api_key:
-            QMessageBox.warning(self, "Erro", "Por favor, configure sua chave API do Pexels primeiro.")
-            return None
-        
-        # Atualiza status
-        self.status_label.setText("Conectando à API do Pexels...")
-        self.status_label.setStyleSheet("color: #4a90e2;")
-        QApplication.processEvents()
-
-        query = self.search_input.text().strip()
-        if not query:
-            QMessageBox.warning(self, "Erro", "Por favor, insira um termo de busca.")
-            return None
-
-        media_type = self.get_selected_type()
-        orientation = self.get_selected_orientation()
-
-        # Define a URL base da API
-        if media_type == "photos":
-            url = "https://api.pexels.com/v1/search"
-        else:
-            url = "https://api.pexels.com/videos/search"
-
-        # Parâmetros da busca
-        params = {
-            "query": query,
-            "per_page": 80  # Máximo permitido pela API
-        }
-        if orientation:
-            params["orientation"] = orientation
-
-        headers = {"Authorization": self.api_key}
-
-        try:
-            print(f"Fazendo requisição para: {url}")
-            print(f"Parâmetros: {params}")
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-            print(f"Resposta recebida. Status: {response.status_code}")
-
-            items = []
-            if media_type == "photos":
-                photos = data.get("photos", [])
-                print(f"Encontradas {len(photos)} fotos")
-                for photo in photos:
-                    items.append(DownloadItem(
-                        url=photo["src"]["original"],
-                        filename=f"photo_{photo['id']}.jpg",
-                        media_type="image",
-                        width=photo["width"],
-                        height=photo["height"]
-                    ))
-            else:
-                videos = data.get("videos", [])
-                print(f"Encontrados {len(videos)} vídeos")
-                for video in videos:
-                    # Pega o vídeo com maior resolução
-                    video_files = sorted(
-                        video["video_files"],
-                        key=lambda x: x.get("width", 0) * x.get("height", 0),
-                        reverse=True
-                    )
-                    if video_files:
-                        best_video = video_files[0]
-                        items.append(DownloadItem(
-                            url=best_video["link"],
-                            filename=f"video_{video['id']}.mp4",
-                            media_type="video",
-                            width=best_video.get("width", 0),
-                            height=best_video.get("height", 0)
-                        ))
-
-            return items
-
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao buscar mídia: {str(e)}")
-            return None
-
     def start_download(self):
         print("\nIniciando processo de download...")
         # Verifica se a pasta de destino foi selecionada
@@ -389,68 +401,86 @@ class PexelsDownloader(QWidget):
             QMessageBox.warning(self, "Erro", "Por favor, selecione uma pasta de destino primeiro.")
             return
 
-        # Verifica se tem um termo de busca
-        if not self.search_input.text().strip():
-            QMessageBox.warning(self, "Erro", "Por favor, digite um termo para buscar.")
+        if not self.api_key:
+            QMessageBox.warning(self, "Erro", "Por favor, configure sua chave API do Pexels primeiro.")
             return
 
-        # Atualiza o status
-        self.status_label.setText("Buscando mídia no Pexels...")
-        self.status_label.setStyleSheet("color: #4a90e2;")
-        
-        # Força atualização da interface
-        QApplication.processEvents()
-
-        # Busca os itens
-        items = self.search_media()
-        if not items:
-            self.status_label.setText("Nenhum resultado encontrado.")
-            self.status_label.setStyleSheet("color: #e74c3c;")
+        # Verifica se tem um termo de busca
+        query = self.search_input.text().strip()
+        if not query:
+            QMessageBox.warning(self, "Erro", "Por favor, digite um termo para buscar.")
             return
-        
-        # Mostra quantos itens foram encontrados
-        self.status_label.setText(f"Encontrados {len(items)} itens para download.")
-        self.status_label.setStyleSheet("color: #2ecc71;")
 
-        # Desabilita os controles durante o download
+        # Desabilita os controles durante a busca e o download
         self.download_btn.setEnabled(False)
         self.select_folder_btn.setEnabled(False)
         self.progress_bar.show()
         self.progress_bar.setValue(0)
-
-        # Inicia o download em thread separada
-        self.downloader = DownloaderThread(items, self.output_folder)
+        self.update_status("Buscando mídia no Pexels...")
+
+        # Busca e download rodam na fila de tarefas, fora da interface
+        self.downloader = get_job_runner().submit(
+            f"Pexels: {query}",
+            download_job,
+            query,
+            self.get_selected_type(),
+            self.get_selected_orientation(),
+            self.output_folder,
+            resource=NETWORK
+        )
         self.downloader.progress.connect(self.update_progress)
-        self.downloader.error.connect(self.show_error)
+        self.downloader.status_changed.connect(self.update_status)
+        self.downloader.event.connect(self.on_job_event)
         self.downloader.finished.connect(self.download_finished)
-        self.downloader.item_completed.connect(self.item_downloaded)
-        self.downloader.status.connect(self.update_status)
-        self.downloader.start()
-
-    def update_progress(self, current: int, total: int):
-        progress = int((current / total) * 100)
+        self.downloader.error.connect(self.search_failed)
+        self.downloader.cancelled.connect(self.download_cancelled)
+
+    def on_job_event(self, kind: str, value):
+        if kind == 'found':
+            self.status_label.setText(f"Encontrados {value} itens para download.")
+            self.status_label.setStyleSheet("color: #2ecc71;")
+        elif kind == 'item':
+            self.item_downloaded(value)
+        elif kind == 'item_duplicate':
+            self.status_label.setText(f"Já existe na biblioteca: {value}")
+            self.status_label.setStyleSheet("color: #f39c12;")
+        elif kind == 'item_error':
+            self.show_error(value)
+
+    def update_progress(self, progress: int):
         self.progress_bar.setValue(progress)
-        self.status_label.setText(f"Baixando... {current}/{total} ({progress}%)")
-        self.status_label.setStyleSheet("color: #4a90e2;")
-        # Força atualização da interface
-        QApplication.processEvents()
 
     def show_error(self, message: str):
         self.status_label.setText(message)
         self.status_label.setStyleSheet("color: #e74c3c;")
         QMessageBox.warning(self, "Erro", message)
 
+    def reset_ui(self):
+        self.download_btn.setEnabled(True)
+        self.select_folder_btn.setEnabled(True)
+        self.progress_bar.hide()
+
+    def search_failed(self, message: str):
+        self.reset_ui()
+        self.status_label.setText("Erro ao buscar mídia.")
+        self.status_label.setStyleSheet("color: #e74c3c;")
+        QMessageBox.critical(self, "Erro", f"Erro ao buscar mídia: {message}")
+
+    def download_cancelled(self):
+        self.reset_ui()
+        self.status_label.setText("Download cancelado.")
+
     def item_downloaded(self, filename: str):
         self.status_label.setText(f"Baixado: {os.path.basename(filename)}")
         self.status_label.setStyleSheet("color: #2ecc71;")
-        # Força atualização da interface
-        QApplication.processEvents()
 
-    def download_finished(self):
-        self.download_btn.setEnabled(True)
-        self.select_folder_btn.setEnabled(True)
+    def download_finished(self, downloaded: int):
+        self.reset_ui()
+        if not downloaded:
+            self.status_label.setText("Nenhum resultado encontrado.")
+            self.status_label.setStyleSheet("color: #e74c3c;")
+            return
         self.status_label.setText("Download concluído!")
         self.status_label.setStyleSheet("color: #2ecc71; font-weight: bold;")
         QMessageBox.information(self, "Sucesso", "Download concluído com sucesso!")
-        self.progress_bar.hide()
         print("\nDownload finalizado com sucesso!")
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+from typing import List, Optional
+
+# Pasta (ao lado dos vídeos) onde ficam os diários e temporários de cada renderização
+JOBS_DIR_NAME = ".render_jobs"
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Hash (BLAKE2b) do conteúdo do arquivo."""
+    hasher = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _source_key(path: str):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class RenderJournal:
+    """
+    Diário persistente (SQLite) de uma renderização em lotes. Guarda os
+    intermediários de cada vídeo e a saída de cada lote com o hash do
+    conteúdo, para que uma renderização interrompida continue de onde parou.
+    """
+
+    def __init__(self, job_dir: str):
+        self.job_dir = job_dir
+        self.db_path = os.path.join(job_dir, "journal.sqlite")
+        os.makedirs(job_dir, exist_ok=True)
+        with self._connect() as db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS clips (
+                    lot INTEGER,
+                    clip INTEGER,
+                    source TEXT,
+                    source_size INTEGER,
+                    source_mtime_ns INTEGER,
+                    parts TEXT,
+                    digests TEXT,
+                    PRIMARY KEY (lot, clip)
+                )
+            """)
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS lots (
+                    lot INTEGER PRIMARY KEY,
+                    output TEXT,
+                    digest TEXT
+                )
+            """)
+
+    @classmethod
+    def for_job(cls, files: List[str], chunk_size: int, options: Optional[dict] = None) -> 'RenderJournal':
+        """
+        Abre (ou cria) o diário da renderização. A mesma seleção de vídeos,
+        tamanho de lote e opções sempre cai no mesmo diário.
+        """
+        description = {
+            'files': [[os.path.abspath(f), *_source_key(f)] for f in files],
+            'chunk_size': chunk_size,
+            'options': options or {}
+        }
+        job_id = hashlib.sha1(
+            json.dumps(description, sort_keys=True).encode('utf-8')
+        ).hexdigest()[:16]
+        base_dir = os.path.dirname(os.path.abspath(files[0]))
+        return cls(os.path.join(base_dir, JOBS_DIR_NAME, job_id))
+
+    def _connect(self):
+        # Uma conexão por operação: o diário é usado por mais de uma thread
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def temp_dir(self, lot: int) -> str:
+        """Pasta de temporários exclusiva do lote desta renderização."""
+        path = os.path.join(self.job_dir, f"lote_{lot:02d}")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def has_progress(self) -> bool:
+        with self._connect() as db:
+            clips = db.execute("SELECT COUNT(*) FROM clips").fetchone()[0]
+            lots = db.execute("SELECT COUNT(*) FROM lots").fetchone()[0]
+        return clips + lots > 0
+
+    def completed_clip(self, lot: int, clip: int, source: str) -> Optional[List[str]]:
+        """
+        Partes já renderizadas do vídeo, se o vídeo de origem não mudou e os
+        arquivos intermediários continuam íntegros. Caso contrário, None.
+        """
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT source, source_size, source_mtime_ns, parts, digests "
+                "FROM clips WHERE lot = ? AND clip = ?",
+                (lot, clip)
+            ).fetchone()
+        if row is None:
+            return None
+
+        saved_source, size, mtime_ns, parts, digests = row
+        if saved_source != os.path.abspath(source) or (size, mtime_ns) != _source_key(source):
+            return None
+
+        parts = json.loads(parts)
+        for part, digest in zip(parts, json.loads(digests)):
+            if not os.path.exists(part) or file_digest(part) != digest:
+                return None
+        return parts
+
+    def record_clip(self, lot: int, clip: int, source: str, parts: List[str]):
+        size, mtime_ns = _source_key(source)
+        digests = [file_digest(part) for part in parts]
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO clips VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (lot, clip, os.path.abspath(source), size, mtime_ns,
+                 json.dumps(parts), json.dumps(digests))
+            )
+
+    def completed_lot(self, lot: int, output: str) -> bool:
+        """Indica se a saída do lote já foi gerada e continua íntegra."""
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT output, digest FROM lots WHERE lot = ?", (lot,)
+            ).fetchone()
+        if row is None or row[0] != os.path.abspath(output) or not os.path.exists(output):
+            return False
+        return file_digest(output) == row[1]
+
+    def record_lot(self, lot: int, output: str):
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO lots VALUES (?, ?, ?)",
+                (lot, os.path.abspath(output), file_digest(output))
+            )
+        # Os intermediários do lote não são mais necessários
+        shutil.rmtree(os.path.join(self.job_dir, f"lote_{lot:02d}"), ignore_errors=True)
+
+    def remove(self):
+        """Apaga o diário e os temporários (renderização concluída)."""
+        shutil.rmtree(self.job_dir, ignore_errors=True)
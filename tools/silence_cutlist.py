@@ -0,0 +1,311 @@
+import json
+import os
+import re
+import subprocess
+import tempfile
+from dataclasses import dataclass, asdict
+from typing import Callable, List, Optional, Tuple
+
+from tools.encoders import select_encoder, encoder_cli_args
+
+# Versão do formato do cache (mude se a estrutura do JSON mudar)
+CACHE_VERSION = 1
+
+DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+SILENCE_START_RE = re.compile(r"silence_start:\s*(-?\d+(?:\.\d+)?)")
+SILENCE_END_RE = re.compile(r"silence_end:\s*(-?\d+(?:\.\d+)?)")
+OUT_TIME_RE = re.compile(r"out_time_(?:us|ms)=(\d+)")
+
+
+@dataclass
+class CutList:
+    source: str
+    size: int
+    mtime_ns: int
+    threshold_db: float
+    min_duration: float
+    duration: float
+    intervals: List[Tuple[float, float]]  # trechos com som (início, fim) em segundos
+
+    @property
+    def kept_duration(self) -> float:
+        return sum(end - start for start, end in self.intervals)
+
+
+def _cache_path(path: str) -> str:
+    directory, filename = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f".{filename}.cutlist.json")
+
+
+def _params_key(threshold_db: float, min_duration: float) -> str:
+    return f"{threshold_db:.2f}:{min_duration:.3f}"
+
+
+def load_cached_cutlist(path: str, threshold_db: float, min_duration: float) -> Optional[CutList]:
+    """Lista de cortes já calculada para o arquivo e parâmetros, se ainda válida."""
+    stat = os.stat(path)
+    try:
+        with open(_cache_path(path), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if (data.get('version') != CACHE_VERSION or data.get('size') != stat.st_size
+            or data.get('mtime_ns') != stat.st_mtime_ns):
+        return None
+    entry = data.get('cutlists', {}).get(_params_key(threshold_db, min_duration))
+    if entry is None:
+        return None
+    entry['intervals'] = [tuple(interval) for interval in entry['intervals']]
+    return CutList(**entry)
+
+
+def save_cutlist(cutlist: CutList):
+    """Guarda a lista de cortes ao lado do arquivo (uma entrada por parâmetros)."""
+    cache_path = _cache_path(cutlist.source)
+    data = {'version': CACHE_VERSION, 'size': cutlist.size,
+            'mtime_ns': cutlist.mtime_ns, 'cutlists': {}}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved.get('size') == cutlist.size and saved.get('mtime_ns') == cutlist.mtime_ns:
+            data['cutlists'] = saved.get('cutlists', {})
+    except (OSError, ValueError):
+        pass
+
+    data['cutlists'][_params_key(cutlist.threshold_db, cutlist.min_duration)] = asdict(cutlist)
+    try:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+    except OSError:
+        pass  # Sem permissão de escrita: apenas não guarda o cache
+
+
+def detect_cutlist(input_file: str, threshold_db: float, min_duration: float,
+                   progress_callback: Optional[Callable[[int], None]] = None,
+                   interval_callback: Optional[Callable[[float, float], None]] = None,
+                   should_stop: Optional[Callable[[], bool]] = None) -> Optional[CutList]:
+    """
+    Analisa o áudio com o filtro silencedetect do FFmpeg, lendo a saída
+    enquanto o arquivo é processado. Cada trecho com som é emitido assim
+    que o silêncio seguinte começa. Retorna None se for interrompido.
+    """
+    stat = os.stat(input_file)
+    command = [
+        'ffmpeg',
+        '-hide_banner',
+        '-nostats',
+        '-progress', 'pipe:2',
+        '-i', input_file,
+        '-vn',
+        '-af', f'silencedetect=noise={threshold_db}dB:d={min_duration}',
+        '-f', 'null',
+        '-'
+    ]
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors='replace'
+    )
+
+    duration = 0.0
+    position = 0.0  # último out_time do -progress (duração quando o FFmpeg não informa)
+    voice_start = 0.0
+    intervals = []
+    log_tail = []
+    try:
+        for line in process.stderr:
+            if should_stop and should_stop():
+                process.terminate()
+                return None
+
+            log_tail = (log_tail + [line])[-20:]
+
+            match = DURATION_RE.search(line)
+            if match and not duration:
+                hours, minutes, seconds = match.groups()
+                duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+                continue
+
+            match = SILENCE_START_RE.search(line)
+            if match:
+                silence_start = max(float(match.group(1)), 0.0)
+                # O trecho com som termina onde o silêncio começa
+                if silence_start > voice_start:
+                    intervals.append((voice_start, silence_start))
+                    if interval_callback:
+                        interval_callback(voice_start, silence_start)
+                continue
+
+            match = SILENCE_END_RE.search(line)
+            if match:
+                voice_start = float(match.group(1))
+                continue
+
+            match = OUT_TIME_RE.search(line)
+            if match:
+                position = max(position, int(match.group(1)) / 1_000_000)
+                if progress_callback and duration:
+                    progress_callback(min(int((position / duration) * 100), 100))
+    finally:
+        process.stderr.close()
+        returncode = process.wait()
+
+    if returncode != 0:
+        raise RuntimeError(f"FFmpeg falhou ao analisar o áudio: {''.join(log_tail).strip()}")
+
+    # "Duration: N/A" (pipes, alguns TS/WebM): vale até onde o áudio foi lido
+    duration = duration or position
+
+    # Trecho final com som (o arquivo não termina em silêncio)
+    if duration and voice_start < duration:
+        intervals.append((voice_start, duration))
+        if interval_callback:
+            interval_callback(voice_start, duration)
+
+    return CutList(
+        source=os.path.abspath(input_file),
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        threshold_db=threshold_db,
+        min_duration=min_duration,
+        duration=duration,
+        intervals=intervals
+    )
+
+
+def analyze(input_file: str, threshold_db: float, min_duration: float, **kwargs) -> Optional[CutList]:
+    """Lista de cortes do arquivo: do cache, se existir, ou analisando o áudio."""
+    cutlist = load_cached_cutlist(input_file, threshold_db, min_duration)
+    if cutlist is None:
+        cutlist = detect_cutlist(input_file, threshold_db, min_duration, **kwargs)
+        if cutlist is not None:
+            save_cutlist(cutlist)
+    return cutlist
+
+
+def has_video_stream(input_file: str, ffprobe_path: str = 'ffprobe') -> bool:
+    result = subprocess.run(
+        [ffprobe_path, '-v', 'error', '-select_streams', 'v',
+         '-show_entries', 'stream=codec_type', '-of', 'csv=p=0', input_file],
+        capture_output=True,
+        text=True
+    )
+    return 'video' in result.stdout
+
+
+def _merge_intervals(intervals: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Trechos em ordem e sem sobreposição."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        elif end > start:
+            merged.append((start, end))
+    return merged
+
+
+def _search_expression(variable: str, starts: List[float], leaves: List[str]) -> str:
+    """
+    Expressão do FFmpeg que escolhe a folha do trecho que contém `variable`
+    por busca binária nos inícios (em ordem). O `if` só avalia o lado
+    escolhido: cada quadro custa O(log n), não uma comparação por trecho.
+    """
+    def build(low: int, high: int) -> str:
+        if high - low == 1:
+            return leaves[low]
+        middle = (low + high) // 2
+        return f"if(lt({variable},{starts[middle]:.6f}),{build(low, middle)},{build(middle, high)})"
+    return build(0, len(leaves))
+
+
+def build_filter_script(intervals: List[Tuple[float, float]], has_video: bool,
+                        upload_filters: Optional[List[str]] = None) -> str:
+    """
+    Filtro que mantém só os trechos com som, em áudio e vídeo ao mesmo tempo.
+    Os timestamps são deslocados pelo silêncio removido antes de cada
+    trecho (em vez de contar quadros), então ficam contínuos, sincronizados
+    e corretos também em vídeos com taxa de quadros variável.
+    """
+    intervals = _merge_intervals(intervals)
+    starts = [start for start, _ in intervals]
+
+    # Deslocamento de cada trecho: onde ele começa menos o que já foi mantido
+    shifts = []
+    kept = 0.0
+    for start, end in intervals:
+        shifts.append(f"{start - kept:.6f}")
+        kept += end - start
+
+    def keep(variable: str) -> str:
+        leaves = [f"between({variable},{start:.6f},{end:.6f})" for start, end in intervals]
+        return _search_expression(variable, starts, leaves)
+
+    shift = _search_expression('T', starts, shifts)
+    chains = []
+    if has_video:
+        video_filters = [f"select='{keep('t')}'", f"setpts='(T-{shift})/TB'"]
+        video_filters += upload_filters or []
+        chains.append(f"[0:v]{','.join(video_filters)}[v]")
+    # Quadros de áudio que atravessam um corte: o aresample apara/completa
+    chains.append(f"[0:a]aselect='{keep('t')}',asetpts='(T-{shift})/TB',aresample=async=1[a]")
+    return ";\n".join(chains)
+
+
+def apply_cutlist(input_file: str, output_file: str, cutlist: CutList,
+                  progress_callback: Optional[Callable[[int], None]] = None,
+                  should_stop: Optional[Callable[[], bool]] = None) -> bool:
+    """
+    Remove os silêncios em uma única codificação, cortando áudio e vídeo
+    juntos. Retorna False se for interrompido.
+    """
+    if not cutlist.intervals:
+        raise ValueError("Nenhum trecho com som foi encontrado.")
+
+    has_video = has_video_stream(input_file)
+    encoder = select_encoder()
+
+    # O filtro pode ficar enorme (um trecho por pausa), então vai em arquivo
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as f:
+        f.write(build_filter_script(
+            cutlist.intervals, has_video,
+            encoder.upload_filters if has_video else None
+        ))
+        script_path = f.name
+
+    command = ['ffmpeg', '-hide_banner', '-v', 'error', '-nostats', '-progress', 'pipe:1', '-y']
+    if has_video:
+        command += encoder.global_args
+    command += ['-i', input_file, '-filter_complex_script', script_path]
+    if has_video:
+        command += ['-map', '[v]'] + encoder_cli_args(encoder)
+    command += ['-map', '[a]', '-c:a', 'aac', output_file]
+
+    try:
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr_file, text=True)
+            try:
+                for line in process.stdout:
+                    if should_stop and should_stop():
+                        process.terminate()
+                        break
+                    match = OUT_TIME_RE.search(line)
+                    if match and progress_callback and cutlist.kept_duration:
+                        position = int(match.group(1)) / 1_000_000
+                        progress_callback(min(int((position / cutlist.kept_duration) * 100), 100))
+            finally:
+                process.stdout.close()
+                returncode = process.wait()
+
+            if should_stop and should_stop():
+                return False
+            if returncode != 0:
+                stderr_file.seek(0)
+                message = stderr_file.read().decode('utf-8', errors='replace').strip()
+                raise RuntimeError(f"FFmpeg falhou ao remover o silêncio: {message}")
+    finally:
+        os.remove(script_path)
+
+    return True
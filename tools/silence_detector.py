@@ -0,0 +1,372 @@
+import atexit
+import json
+import os
+import subprocess
+import tempfile
+import warnings
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+# Quantos milissegundos de áudio são somados por vez (limita a memória usada)
+BLOCK_MS = 10_000
+
+# Janela (ms) usada para achar o ponto mais silencioso de uma fala longa
+QUIET_WINDOW_MS = 50
+
+_SAMPLE_DTYPES = {1: np.int8, 2: '<i2', 4: '<i4'}
+
+
+@dataclass
+class PcmAudio:
+    """
+    Áudio PCM (inteiros com sinal, canais intercalados) como array NumPy de
+    formato (quadros, canais). Pode ser uma visão dos bytes de um AudioSegment
+    ou um arquivo mapeado em memória.
+    """
+    samples: np.ndarray
+    frame_rate: int
+    sample_width: int
+    path: Optional[str] = None  # arquivo temporário (quando mapeado em memória)
+    # Bits da origem quando menores que a amostra (24 bits decodificados em 32)
+    bits_per_sample: Optional[int] = None
+
+    @classmethod
+    def from_bytes(cls, data: bytes, frame_rate: int, channels: int, sample_width: int) -> 'PcmAudio':
+        if sample_width == 3:
+            # 24 bits não tem dtype próprio: monta int32 a partir dos 3 bytes
+            raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+            samples = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+            samples = np.where(samples >= 1 << 23, samples - (1 << 24), samples)
+        else:
+            samples = np.frombuffer(data, dtype=_SAMPLE_DTYPES[sample_width])
+        return cls(samples.reshape(-1, channels), frame_rate, sample_width)
+
+    @classmethod
+    def from_segment(cls, segment) -> 'PcmAudio':
+        """Visão (sem cópia) dos dados de um AudioSegment do pydub."""
+        return cls.from_bytes(segment.raw_data, segment.frame_rate, segment.channels, segment.sample_width)
+
+    @property
+    def channels(self) -> int:
+        return self.samples.shape[1]
+
+    @property
+    def frame_count(self) -> int:
+        return self.samples.shape[0]
+
+    @property
+    def max_possible_amplitude(self) -> float:
+        return (2 ** (self.sample_width * 8)) / 2
+
+    def __len__(self) -> int:
+        """Duração em milissegundos (mesma conta do pydub)."""
+        return round(1000 * (self.frame_count / self.frame_rate))
+
+    def frame_index(self, ms):
+        """Quadro correspondente a `ms` (aceita arrays)."""
+        return (np.asarray(ms) * (self.frame_rate / 1000.0)).astype(np.int64)
+
+    def close(self):
+        """
+        Libera o mapeamento e apaga o arquivo temporário, se houver. Uma visão
+        vazia do memmap ainda manteria o arquivo aberto (e no Windows ele não
+        poderia ser apagado): a referência ao array é descartada por inteiro.
+        """
+        if self.path:
+            path, self.path = self.path, None
+            self.samples = np.zeros((0, self.channels), dtype=self.samples.dtype)
+            try:
+                os.remove(path)
+            except OSError as e:
+                # Alguém ainda guarda uma visão do áudio: apaga ao sair
+                warnings.warn(f"Não foi possível apagar o áudio temporário {path}: {e}")
+                atexit.register(_remove_quietly, path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# Formato bruto e codec do FFmpeg para cada largura de amostra decodificada
+_DECODE_FORMATS = {2: ('s16le', 'pcm_s16le'), 4: ('s32le', 'pcm_s32le')}
+
+
+def _source_bits(stream: dict) -> int:
+    """
+    Bits por amostra da origem: 16, 24 ou 32. Formatos com perdas (MP3,
+    AAC) decodificam em ponto flutuante sem profundidade própria: 16 bits.
+    """
+    sample_fmt = stream.get('sample_fmt', '').rstrip('p')
+    if sample_fmt in ('u8', 's16'):
+        return 16
+    bits = 0
+    for key in ('bits_per_raw_sample', 'bits_per_sample'):
+        try:
+            bits = bits or int(stream.get(key, 0))
+        except ValueError:
+            pass  # "N/A"
+    if not bits and sample_fmt in ('s32', 's64'):
+        return 32
+    if bits <= 16:
+        return 16
+    return 24 if bits == 24 else 32
+
+
+def decode_pcm(path: str, frame_rate: Optional[int] = None, channels: Optional[int] = None,
+               ffmpeg_path: str = 'ffmpeg', ffprobe_path: str = 'ffprobe',
+               sample_width: Optional[int] = None) -> PcmAudio:
+    """
+    Decodifica o arquivo com o FFmpeg para PCM em um arquivo temporário e o
+    mapeia em memória: nada do áudio fica inteiro na RAM. Origens de 24 e
+    32 bits são decodificadas em 32 bits (sem perder resolução) e as demais
+    em 16; `sample_width=2` força 16 bits (como pedem os reconhecedores).
+    """
+    bits = 16
+    if frame_rate is None or channels is None or sample_width is None:
+        result = subprocess.run(
+            [ffprobe_path, '-v', 'error', '-select_streams', 'a:0', '-show_entries',
+             'stream=sample_rate,channels,sample_fmt,bits_per_sample,bits_per_raw_sample',
+             '-of', 'json', path],
+            capture_output=True,
+            text=True
+        )
+        streams = json.loads(result.stdout or '{}').get('streams') if result.returncode == 0 else None
+        if not streams:
+            raise RuntimeError(f"Nenhum áudio encontrado em {path}: {result.stderr.strip()}")
+        frame_rate = frame_rate or int(streams[0]['sample_rate'])
+        channels = channels or int(streams[0]['channels'])
+        bits = _source_bits(streams[0])
+    sample_width = sample_width or (4 if bits > 16 else 2)
+    raw_format, codec = _DECODE_FORMATS[sample_width]
+    dtype = _SAMPLE_DTYPES[sample_width]
+
+    fd, raw_path = tempfile.mkstemp(suffix='.pcm')
+    os.close(fd)
+    result = subprocess.run(
+        [ffmpeg_path, '-hide_banner', '-v', 'error', '-y', '-i', path, '-vn',
+         '-f', raw_format, '-acodec', codec, '-ar', str(frame_rate), '-ac', str(channels), raw_path],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        os.remove(raw_path)
+        raise RuntimeError(f"FFmpeg falhou ao decodificar {path}: {result.stderr.strip()}")
+
+    if os.path.getsize(raw_path) == 0:
+        samples = np.zeros((0, channels), dtype=dtype)
+    else:
+        samples = np.memmap(raw_path, dtype=dtype, mode='r').reshape(-1, channels)
+    return PcmAudio(samples, frame_rate, sample_width, raw_path, min(bits, sample_width * 8))
+
+
+def _energy_prefix(audio: PcmAudio) -> np.ndarray:
+    """
+    Soma acumulada dos quadrados das amostras em cada milissegundo inteiro:
+    `prefix[i]` é a energia dos quadros antes do milissegundo `i`. Calculada
+    em blocos, então só um bloco de amostras é convertido por vez.
+    """
+    length = len(audio)
+    bounds = np.minimum(audio.frame_index(np.arange(length + 1)), audio.frame_count)
+    # Até 16 bits a soma inteira é exata; acima disso poderia estourar o int64
+    dtype = np.int64 if audio.sample_width <= 2 else np.float64
+
+    prefix = np.empty(length + 1, dtype=dtype)
+    total = dtype(0)
+    for first in range(0, length + 1, BLOCK_MS):
+        last = min(first + BLOCK_MS, length)
+        start, end = bounds[first], bounds[last]
+        block = audio.samples[start:end].astype(dtype)
+        energy = np.concatenate(([0], np.cumsum((block * block).sum(axis=1), dtype=dtype)))
+        prefix[first:last + 1] = total + energy[bounds[first:last + 1] - start]
+        total = prefix[last]
+    return prefix
+
+
+def detect_silence(audio: PcmAudio, min_silence_len: int = 1000, silence_thresh: float = -16,
+                   seek_step: int = 1) -> List[List[int]]:
+    """
+    Trechos silenciosos [início, fim] em milissegundos. Mesmo resultado de
+    `pydub.silence.detect_silence`, mas com o RMS de todas as janelas
+    calculado de uma vez a partir da energia acumulada.
+    """
+    seg_len = len(audio)
+    if seg_len < min_silence_len:
+        return []
+
+    threshold = (10 ** (float(silence_thresh) / 20)) * audio.max_possible_amplitude
+
+    last_slice_start = seg_len - min_silence_len
+    starts = np.arange(0, last_slice_start + 1, seek_step)
+    if last_slice_start % seek_step:
+        starts = np.append(starts, last_slice_start)
+    ends = starts + min_silence_len
+
+    prefix = _energy_prefix(audio)
+    energy = (prefix[ends] - prefix[starts]).astype(np.float64)
+    count = (audio.frame_index(ends) - audio.frame_index(starts)) * audio.channels
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rms = np.where(count > 0, np.floor(np.sqrt(energy / np.maximum(count, 1))), 0)
+
+    silence_starts = starts[rms <= threshold]
+    if not len(silence_starts):
+        return []
+
+    # Uma nova faixa começa quando há um buraco maior que a janela
+    steps = np.diff(silence_starts)
+    breaks = np.flatnonzero((steps != seek_step) & (steps > min_silence_len))
+    range_starts = np.concatenate(([silence_starts[0]], silence_starts[breaks + 1]))
+    range_ends = np.concatenate((silence_starts[breaks], [silence_starts[-1]])) + min_silence_len
+    return [[int(start), int(end)] for start, end in zip(range_starts, range_ends)]
+
+
+def detect_nonsilent(audio: PcmAudio, min_silence_len: int = 1000, silence_thresh: float = -16,
+                     seek_step: int = 1) -> List[List[int]]:
+    """Trechos com som [início, fim] em milissegundos (como no pydub)."""
+    silent_ranges = detect_silence(audio, min_silence_len, silence_thresh, seek_step)
+    len_seg = len(audio)
+
+    if not silent_ranges:
+        return [[0, len_seg]]
+    if silent_ranges[0][0] == 0 and silent_ranges[0][1] == len_seg:
+        return []
+
+    nonsilent_ranges = []
+    prev_end = 0
+    for start, end in silent_ranges:
+        nonsilent_ranges.append([prev_end, start])
+        prev_end = end
+    if silent_ranges[-1][1] != len_seg:
+        nonsilent_ranges.append([prev_end, len_seg])
+    if nonsilent_ranges[0] == [0, 0]:
+        nonsilent_ranges.pop(0)
+    return nonsilent_ranges
+
+
+def split_long_ranges(audio: PcmAudio, ranges: List[List[int]], max_len_ms: int,
+                      window_ms: int = QUIET_WINDOW_MS) -> List[List[int]]:
+    """
+    Divide os trechos mais longos que `max_len_ms` no ponto de menor energia
+    (janela de `window_ms`) da segunda metade de cada pedaço: numa fala
+    contínua, o corte cai na pausa mais curta entre as palavras em vez de
+    num limite fixo.
+    """
+    prefix = None
+    half = window_ms // 2
+    result = []
+    for start, end in ranges:
+        while end - start > max_len_ms:
+            if prefix is None:
+                prefix = _energy_prefix(audio)
+            points = np.arange(start + max(max_len_ms // 2, 1), start + max_len_ms + 1)
+            low = np.clip(points - half, 0, len(prefix) - 1)
+            high = np.clip(points + half, 0, len(prefix) - 1)
+            cut = int(points[np.argmin(prefix[high] - prefix[low])])
+            result.append([start, cut])
+            start = cut
+        result.append([start, end])
+    return result
+
+
+def split_ranges(audio: PcmAudio, min_silence_len: int = 1000, silence_thresh: float = -16,
+                 keep_silence=100, seek_step: int = 1) -> List[List[int]]:
+    """
+    Trechos [início, fim] em milissegundos que `pydub.silence.split_on_silence`
+    devolveria, já com a margem de silêncio (`keep_silence`) aplicada.
+    """
+    len_seg = len(audio)
+    if isinstance(keep_silence, bool):
+        keep_silence = len_seg if keep_silence else 0
+
+    ranges = np.array(
+        detect_nonsilent(audio, min_silence_len, silence_thresh, seek_step), dtype=np.int64
+    ).reshape(-1, 2)
+    starts = ranges[:, 0] - keep_silence
+    ends = ranges[:, 1] + keep_silence
+
+    # Margens que se sobrepõem dividem o silêncio entre os dois trechos
+    overlap = np.flatnonzero(starts[1:] < ends[:-1])
+    middle = (ends[overlap] + starts[overlap + 1]) // 2
+    ends[overlap] = middle
+    starts[overlap + 1] = middle
+
+    return [[int(max(start, 0)), int(min(end, len_seg))] for start, end in zip(starts, ends)]
+
+
+# Formato bruto do FFmpeg para cada largura de amostra
+_RAW_FORMATS = {1: 's8', 2: 's16le', 3: 's32le', 4: 's32le'}
+
+# Codec do WAV de saída pela profundidade da origem (senão o FFmpeg usa 16 bits)
+_WAV_CODECS = {8: 'pcm_u8', 16: 'pcm_s16le', 24: 'pcm_s24le', 32: 'pcm_s32le'}
+
+# Quadros enviados ao FFmpeg por escrita
+WRITE_BLOCK_FRAMES = 1 << 16
+
+
+def write_ranges(audio: PcmAudio, ranges: List[List[int]], output_file: str,
+                 ffmpeg_path: str = 'ffmpeg', progress_callback=None):
+    """
+    Grava em `output_file` só os trechos [início, fim] (ms) do áudio, um
+    atrás do outro, direto do buffer de origem para o FFmpeg. Nenhum trecho
+    é concatenado em memória: o uso de RAM não depende do tamanho do áudio.
+    """
+    frame_ranges = [(int(audio.frame_index(start)), int(audio.frame_index(end))) for start, end in ranges]
+    total_frames = sum(end - start for start, end in frame_ranges) or 1
+
+    command = [
+        ffmpeg_path, '-hide_banner', '-v', 'error', '-y',
+        '-f', _RAW_FORMATS[audio.sample_width],
+        '-ar', str(audio.frame_rate),
+        '-ac', str(audio.channels),
+        '-i', 'pipe:0',
+        output_file
+    ]
+    if output_file.lower().endswith('.wav'):
+        bits = audio.bits_per_sample or audio.sample_width * 8
+        command[-1:-1] = ['-acodec', _WAV_CODECS[bits]]
+    with tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=stderr_file)
+        written = 0
+        last_percent = -1
+        try:
+            for start, end in frame_ranges:
+                for block_start in range(start, end, WRITE_BLOCK_FRAMES):
+                    block_end = min(block_start + WRITE_BLOCK_FRAMES, end)
+                    block = audio.samples[block_start:block_end]
+                    if audio.sample_width == 3:
+                        block = block << 8  # 24 bits vão como 32 bits
+                    process.stdin.write(memoryview(np.ascontiguousarray(block)).cast('B'))
+
+                    # O pydub completa com silêncio o fim que passa do áudio
+                    missing = (block_end - block_start) - len(block)
+                    if missing:
+                        process.stdin.write(bytes(missing * audio.channels * block.itemsize))
+
+                    written += block_end - block_start
+                    percent = written * 100 // total_frames
+                    if progress_callback and percent != last_percent:
+                        progress_callback(percent)
+                        last_percent = percent
+        except BrokenPipeError:
+            pass  # O FFmpeg encerrou antes: o erro aparece no código de saída
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            returncode = process.wait()
+
+        if returncode != 0:
+            stderr_file.seek(0)
+            message = stderr_file.read().decode('utf-8', errors='replace').strip()
+            raise RuntimeError(f"FFmpeg falhou ao gravar {output_file}: {message}")
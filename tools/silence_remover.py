@@ -3,16 +3,80 @@ from datetime import datetime
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QPushButton, QFileDialog, QProgressBar,
-    QFrame, QSpinBox, QMessageBox, QDoubleSpinBox
+    QFrame, QSpinBox, QMessageBox, QDoubleSpinBox,
+    QListWidget
 )
 from PyQt6.QtCore import Qt
 import subprocess
+from typing import Optional
+from tools.silence_cutlist import CutList, analyze, apply_cutlist
+from tools.job_runner import JobCancelled, JobContext, get_job_runner
+
+
+def _format_time(seconds: float) -> str:
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}"
+
+
+def silence_removal_job(ctx: JobContext, input_file: str, threshold_db: float, min_duration: float,
+                        output_file: Optional[str] = None) -> str:
+    """
+    Tarefa: remove o silêncio em duas etapas — análise (lista de trechos com
+    som, em cache ao lado do vídeo) e aplicação dos cortes em uma codificação.
+    Com `output_file=None`, apenas analisa. Emite 'interval' (início, fim) e
+    'cutlist' (CutList).
+    """
+    # A análise ocupa metade da barra quando também vamos aplicar os cortes
+    scale = 0.5 if output_file else 1.0
+
+    ctx.status("Analisando o áudio...")
+    cutlist = analyze(
+        input_file,
+        threshold_db,
+        min_duration,
+        progress_callback=lambda value: ctx.progress(value * scale),
+        interval_callback=lambda start, end: ctx.emit('interval', (start, end)),
+        should_stop=ctx.cancelled
+    )
+    if cutlist is None:
+        raise JobCancelled()
+    ctx.emit('cutlist', cutlist)
+
+    if output_file:
+        ctx.status("Removendo o silêncio...")
+        done = apply_cutlist(
+            input_file,
+            output_file,
+            cutlist,
+            progress_callback=lambda value: ctx.progress(50 + value // 2),
+            should_stop=ctx.cancelled
+        )
+        if not done:
+            raise JobCancelled()
+
+    return output_file or ''
+
+
+def remove_silence(file_path: str, threshold_db: float = -30, min_duration: float = 1.0,
+                   output_file: Optional[str] = None) -> str:
+    """Remove o silêncio do vídeo sem interface (usado pela API web)."""
+    if output_file is None:
+        base, ext = os.path.splitext(file_path)
+        output_file = f"{base}_sem_silencio{ext or '.mp4'}"
+
+    cutlist = analyze(file_path, threshold_db, min_duration)
+    apply_cutlist(file_path, output_file, cutlist)
+    return output_file
+
 
 class SilenceRemover(QWidget):
     def __init__(self):
         super().__init__()
         self.input_file = None
         self.output_dir = None
+        self.output_file = None
+        self.processor = None
         self.setup_ui()
         
         # Verifica se o FFmpeg está instalado
@@ -153,6 +217,26 @@ class SilenceRemover(QWidget):
 
         # Botões de ação
         actions_layout = QHBoxLayout()
+
+        self.analyze_btn = QPushButton("Analisar")
+        self.analyze_btn.setEnabled(False)
+        self.analyze_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #3d3d3d;
+                color: white;
+                border: none;
+                padding: 8px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #4d4d4d;
+            }
+            QPushButton:disabled {
+                background-color: #666666;
+            }
+        """)
+        self.analyze_btn.clicked.connect(self.start_analysis)
+        actions_layout.addWidget(self.analyze_btn)
         
         self.process_btn = QPushButton("Processar Vídeo")
         self.process_btn.setEnabled(False)
@@ -198,7 +282,18 @@ class SilenceRemover(QWidget):
         self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(self.status_label)
 
-        layout.addStretch()
+        # Prévia dos trechos com som que serão mantidos
+        self.intervals_list = QListWidget()
+        self.intervals_list.setStyleSheet("""
+            QListWidget {
+                background-color: #2d2d2d;
+                color: white;
+                border: none;
+                border-radius: 5px;
+                padding: 5px;
+            }
+        """)
+        layout.addWidget(self.intervals_list)
 
     def select_video(self):
         file_name, _ = QFileDialog.getOpenFileName(
@@ -212,6 +307,8 @@ class SilenceRemover(QWidget):
             self.input_file = file_name
             self.file_label.setText(f"Arquivo: {os.path.basename(file_name)}")
             self.process_btn.setEnabled(True)
+            self.analyze_btn.setEnabled(True)
+            self.intervals_list.clear()
             
             # Se ainda não tiver pasta de destino, usa a pasta do vídeo
             if not self.output_dir:
@@ -229,15 +326,52 @@ class SilenceRemover(QWidget):
             self.output_dir = dir_name
             self.file_label.setText(f"Pasta de destino: {dir_name}")
 
-    def start_processing(self):
-        if not self.input_file:
-            return
-            
+    def set_busy(self, busy: bool):
+        self.process_btn.setEnabled(not busy)
+        self.analyze_btn.setEnabled(not busy)
+        self.select_video_btn.setEnabled(not busy)
+        if busy:
+            self.intervals_list.clear()
+            self.progress_bar.setValue(0)
+            self.progress_bar.show()
+            self.status_label.setStyleSheet("color: #4a90e2;")
+        else:
+            self.progress_bar.hide()
+
+    def start_thread(self, output_file: Optional[str]):
         # Verifica se o FFmpeg está disponível
         if not self.check_ffmpeg():
             QMessageBox.critical(self, "Erro", "FFmpeg não encontrado! Por favor, instale o FFmpeg primeiro.")
             return
 
+        self.output_file = output_file
+        self.set_busy(True)
+
+        action = "Remover silêncio" if output_file else "Analisar silêncio"
+        self.processor = get_job_runner().submit(
+            f"{action}: {os.path.basename(self.input_file)}",
+            silence_removal_job,
+            self.input_file,
+            self.silence_spin.value(),
+            self.duration_spin.value(),
+            output_file
+        )
+        self.processor.progress.connect(self.progress_bar.setValue)
+        self.processor.status_changed.connect(self.status_label.setText)
+        self.processor.event.connect(self.on_job_event)
+        self.processor.finished.connect(self.processing_finished)
+        self.processor.error.connect(self.show_error)
+        self.processor.cancelled.connect(self.processing_cancelled)
+
+    def start_analysis(self):
+        if not self.input_file:
+            return
+        self.start_thread(None)
+
+    def start_processing(self):
+        if not self.input_file:
+            return
+
         try:
             # Cria pasta para o vídeo processado
             output_folder = os.path.join(
@@ -245,51 +379,51 @@ class SilenceRemover(QWidget):
                 f"sem_silencio_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             )
             os.makedirs(output_folder, exist_ok=True)
-            
-            # Nome do arquivo de saída
-            output_file = os.path.join(
-                output_folder,
-                f"video_sem_silencio.mp4"
-            )
-            
-            # Configura a interface
-            self.process_btn.setEnabled(False)
-            self.select_video_btn.setEnabled(False)
-            self.progress_bar.setValue(0)
-            self.progress_bar.show()
-            self.status_label.setText("Processando vídeo...")
-            self.status_label.setStyleSheet("color: #4a90e2;")
-            
-            # Executa o FFmpeg para detectar e remover silêncio
-            silence_level = self.silence_spin.value()
-            min_duration = self.duration_spin.value()
-            
-            subprocess.run([
-                'ffmpeg',
-                '-i', self.input_file,
-                '-af', f'silenceremove=stop_periods=-1:stop_duration={min_duration}:stop_threshold={silence_level}dB',
-                '-c:v', 'copy',
-                output_file
-            ], check=True)
-            
-            # Finaliza
-            self.process_btn.setEnabled(True)
-            self.select_video_btn.setEnabled(True)
-            self.status_label.setText("Processamento concluído!")
-            self.status_label.setStyleSheet("color: #2ecc71; font-weight: bold;")
-            self.progress_bar.hide()
-            
-            QMessageBox.information(
-                self,
-                "Sucesso",
-                f"Processamento concluído!\nO vídeo foi salvo em:\n{output_file}"
-            )
-            
-        except subprocess.CalledProcessError as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao processar vídeo: {str(e)}")
-            self.process_btn.setEnabled(True)
-            self.select_video_btn.setEnabled(True)
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro inesperado: {str(e)}")
-            self.process_btn.setEnabled(True)
-            self.select_video_btn.setEnabled(True)
+        except OSError as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao criar pasta de destino: {str(e)}")
+            return
+
+        self.start_thread(os.path.join(output_folder, "video_sem_silencio.mp4"))
+
+    def on_job_event(self, kind: str, value):
+        if kind == 'interval':
+            self.add_interval_to_list(*value)
+        elif kind == 'cutlist':
+            self.show_cutlist(value)
+
+    def add_interval_to_list(self, start: float, end: float):
+        self.intervals_list.addItem(f"{_format_time(start)} → {_format_time(end)}")
+
+    def show_cutlist(self, cutlist: CutList):
+        # Lista completa (também quando veio do cache, sem emitir os trechos)
+        self.intervals_list.clear()
+        for start, end in cutlist.intervals:
+            self.add_interval_to_list(start, end)
+        removed = cutlist.duration - cutlist.kept_duration
+        self.status_label.setText(
+            f"{len(cutlist.intervals)} trechos com som • "
+            f"{_format_time(removed)} de silêncio removido"
+        )
+
+    def processing_finished(self, output_file: str):
+        self.set_busy(False)
+        if not output_file:
+            return  # Só análise: a prévia já está na lista
+
+        self.status_label.setText("Processamento concluído!")
+        self.status_label.setStyleSheet("color: #2ecc71; font-weight: bold;")
+        QMessageBox.information(
+            self,
+            "Sucesso",
+            f"Processamento concluído!\nO vídeo foi salvo em:\n{output_file}"
+        )
+
+    def processing_cancelled(self):
+        self.set_busy(False)
+        self.status_label.setText("Processamento cancelado.")
+
+    def show_error(self, message: str):
+        self.set_busy(False)
+        self.status_label.setText("Erro no processamento")
+        self.status_label.setStyleSheet("color: #e74c3c;")
+        QMessageBox.critical(self, "Erro", f"Erro ao processar vídeo: {message}")
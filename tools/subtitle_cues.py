@@ -0,0 +1,151 @@
+import textwrap
+from typing import List, Optional
+
+import numpy as np
+
+from tools.silence_detector import PcmAudio, split_long_ranges
+from tools.transcription import RecognitionResult, Word
+
+# Limites de legibilidade das legendas
+MAX_LINE_LENGTH = 42
+MAX_LINES = 2
+MAX_CHARS_PER_SECOND = 17
+MIN_GAP = 0.08           # segundos entre uma legenda e a próxima
+MAX_CUE_DURATION = 7.0   # segundos
+MAX_PAUSE = 1.0          # pausa (segundos) que sempre encerra a legenda
+
+# Tamanho máximo de cada trecho enviado ao reconhecedor
+MAX_BATCH_MS = 30 * 1000
+
+# Pausa máxima (ms) entre falas juntadas no mesmo trecho
+MAX_BATCH_GAP_MS = 2000
+
+
+def plan_batches(ranges: List[List[int]], max_batch_ms: int = MAX_BATCH_MS,
+                 max_gap_ms: int = MAX_BATCH_GAP_MS,
+                 audio: Optional[PcmAudio] = None) -> List[List[int]]:
+    """
+    Junta as falas detectadas (VAD) em trechos de até `max_batch_ms` para o
+    reconhecedor: menos requisições, e as falas curtas nunca são cortadas.
+    Falas mais longas que o limite são divididas no ponto mais silencioso
+    do áudio (`audio`); sem ele, o corte é fixo a cada `max_batch_ms` e pode
+    cair no meio de uma palavra.
+    """
+    if audio is not None:
+        ranges = split_long_ranges(audio, ranges, max_batch_ms)
+    batches = []
+    for start, end in ranges:
+        if batches and end - batches[-1][0] <= max_batch_ms and start - batches[-1][1] <= max_gap_ms:
+            batches[-1][1] = end
+            continue
+        while end - start > max_batch_ms:
+            batches.append([start, start + max_batch_ms])
+            start += max_batch_ms
+        batches.append([start, end])
+    return batches
+
+
+def spread_words(text: str, start: float, end: float, speech_ranges: np.ndarray) -> List[Word]:
+    """
+    Tempo estimado de cada palavra quando o reconhecedor não informa:
+    distribui a fala pelo número de caracteres, só dentro dos trechos com
+    som (as pausas entre as falas não recebem palavras).
+    """
+    words = text.split()
+    if not words:
+        return []
+
+    ranges = np.clip(speech_ranges, start, end) if len(speech_ranges) else np.empty((0, 2))
+    ranges = ranges[ranges[:, 1] > ranges[:, 0]]
+    if not len(ranges):
+        ranges = np.array([[start, end]])
+
+    speech = np.concatenate(([0.0], np.cumsum(ranges[:, 1] - ranges[:, 0])))
+    weights = np.array([len(word) + 1 for word in words], dtype=np.float64)
+    positions = np.concatenate(([0.0], np.cumsum(weights))) / weights.sum() * speech[-1]
+
+    def to_time(position, side):
+        index = np.clip(np.searchsorted(speech, position, side=side) - 1, 0, len(ranges) - 1)
+        return ranges[index, 0] + (position - speech[index])
+
+    # Início cai no trecho seguinte e fim no anterior quando exatamente na divisa
+    starts = to_time(positions[:-1], 'right')
+    ends = to_time(positions[1:], 'left')
+    return [(word, float(s), float(e)) for word, s, e in zip(words, starts, ends)]
+
+
+def _wrap(text: str, max_line_length: int) -> List[str]:
+    return textwrap.wrap(text, width=max_line_length, break_long_words=False, break_on_hyphens=False)
+
+
+def group_words(words: List[Word], max_line_length: int = MAX_LINE_LENGTH,
+                max_lines: int = MAX_LINES) -> List[dict]:
+    """Agrupa as palavras em legendas que cabem em `max_lines` linhas."""
+    cues = []
+    current = []
+
+    def flush():
+        if current:
+            text = " ".join(word for word, _, _ in current)
+            cues.append({
+                'start': current[0][1],
+                'end': current[-1][2],
+                'text': "\n".join(_wrap(text, max_line_length))
+            })
+            current.clear()
+
+    for word in words:
+        if current:
+            text = " ".join(w for w, _, _ in current + [word])
+            too_long = len(_wrap(text, max_line_length)) > max_lines
+            paused = word[1] - current[-1][2] > MAX_PAUSE
+            too_slow = word[2] - current[0][1] > MAX_CUE_DURATION
+            if too_long or paused or too_slow:
+                flush()
+        current.append(word)
+    flush()
+    return cues
+
+
+def fit_timings(cues: List[dict], max_cps: float = MAX_CHARS_PER_SECOND,
+                min_gap: float = MIN_GAP) -> List[dict]:
+    """
+    Estende as legendas curtas demais para o texto (caracteres por segundo)
+    e garante um intervalo mínimo antes da próxima legenda.
+    """
+    if not cues:
+        return cues
+
+    starts = np.array([cue['start'] for cue in cues])
+    ends = np.array([cue['end'] for cue in cues])
+    chars = np.array([len(cue['text'].replace("\n", "")) for cue in cues])
+
+    # Limite: começo da próxima legenda menos o intervalo (a última não tem limite)
+    limits = np.append(starts[1:] - min_gap, np.inf)
+    ends = np.maximum(ends, starts + chars / max_cps)
+    ends = np.minimum(ends, limits)
+    # Nunca termina antes de começar (falas coladas demais)
+    ends = np.maximum(ends, starts + min(min_gap, 0.01))
+
+    return [dict(cue, start=float(s), end=float(e)) for cue, s, e in zip(cues, starts, ends)]
+
+
+def build_subtitles(results: List[RecognitionResult], speech_ranges_ms: List[List[int]],
+                    max_line_length: int = MAX_LINE_LENGTH, max_lines: int = MAX_LINES,
+                    max_cps: float = MAX_CHARS_PER_SECOND, min_gap: float = MIN_GAP) -> List[dict]:
+    """
+    Monta as legendas ({'start', 'end', 'text'}) a partir dos resultados do
+    reconhecimento, usando o tempo de cada palavra quando disponível ou, se
+    não, distribuindo o texto pelas falas detectadas em cada trecho.
+    """
+    speech_ranges = np.array(speech_ranges_ms, dtype=np.float64).reshape(-1, 2) / 1000
+
+    words = []
+    for result in results:
+        if result.words:
+            words += result.words
+        elif result.text:
+            words += spread_words(result.text, result.start, result.end, speech_ranges)
+
+    cues = group_words(words, max_line_length, max_lines)
+    return fit_timings(cues, max_cps, min_gap)
@@ -7,16 +7,142 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt
 import subprocess
-import speech_recognition as sr
-from pydub import AudioSegment
-import json
+from typing import List, Optional, Tuple
+from tools.silence_detector import decode_pcm, detect_nonsilent
+from tools.subtitle_cues import build_subtitles, plan_batches
+from tools.transcription import GoogleBackend, VoskBackend, RecognitionResult, make_chunks, transcribe
+from tools.transcription_cache import TranscriptionCache
+from tools.job_runner import CPU, NETWORK, JobCancelled, JobContext, get_job_runner
+
+# Detecção de fala: pausas a partir de 700 ms abaixo de -40 dBFS
+VAD_MIN_SILENCE_MS = 700
+VAD_THRESHOLD_DB = -40
+
+# Requisições simultâneas ao serviço de reconhecimento
+RECOGNITION_WORKERS = 6
+
+LANGUAGES = {
+    "Português": "pt-BR",
+    "English": "en-US",
+    "Español": "es-ES"
+}
+
+
+def _format_time(seconds):
+    """Formata tempo em segundos para o formato HH:MM:SS,mmm"""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    seconds = seconds % 60
+    return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}".replace(".", ",")
+
+
+def save_srt(subtitles, output_file):
+    """Salva legendas no formato SRT"""
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for i, subtitle in enumerate(subtitles, 1):
+            f.write(f"{i}\n")
+            f.write(f"{_format_time(subtitle['start'])} --> {_format_time(subtitle['end'])}\n")
+            f.write(f"{subtitle['text']}\n\n")
+
+
+def save_vtt(subtitles, output_file):
+    """Salva legendas no formato VTT"""
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write("WEBVTT\n\n")
+        for subtitle in subtitles:
+            start = _format_time(subtitle['start']).replace(",", ".")
+            end = _format_time(subtitle['end']).replace(",", ".")
+            f.write(f"{start} --> {end}\n")
+            f.write(f"{subtitle['text']}\n\n")
+
+
+def transcribe_video(video_path: str, language: str, backend=None,
+                     progress_callback=None,
+                     should_stop=None) -> Tuple[List[RecognitionResult], List[List[int]]]:
+    """
+    Extrai o áudio do vídeo (16 kHz, mono, 16 bits), detecta as falas e reconhece os
+    trechos em paralelo, sem gravar nenhum trecho em disco. Retorna os
+    resultados e as falas detectadas (ms).
+    """
+    backend = backend or GoogleBackend()
+    with decode_pcm(video_path, frame_rate=16000, channels=1, sample_width=2) as audio:
+        speech_ranges = detect_nonsilent(audio, VAD_MIN_SILENCE_MS, VAD_THRESHOLD_DB)
+        # Trechos cortados nas pausas, nunca no meio de uma palavra
+        ranges = plan_batches(speech_ranges, audio=audio)
+        results = transcribe(
+            make_chunks(audio, ranges),
+            backend,
+            language,
+            # Reconhecedores locais: quantos processos o modelo e a memória permitirem
+            workers=None if getattr(backend, 'use_processes', False) else RECOGNITION_WORKERS,
+            total=len(ranges),
+            progress_callback=progress_callback,
+            should_stop=should_stop,
+            # Trechos já reconhecidos (mesmo áudio, idioma e reconhecedor) vêm do cache
+            cache=TranscriptionCache()
+        )
+    return results, speech_ranges
+
+
+def generate_srt(video_path: str, language: str = "pt-BR", output_file: Optional[str] = None,
+                 vosk_model_path: Optional[str] = None) -> str:
+    """
+    Gera as legendas (SRT) ao lado do vídeo, sem interface (usado pela API
+    web). Com `vosk_model_path`, o reconhecimento é local, sem rede.
+    """
+    if output_file is None:
+        output_file = os.path.splitext(video_path)[0] + ".srt"
+    backend = VoskBackend(vosk_model_path) if vosk_model_path else GoogleBackend()
+    results, speech_ranges = transcribe_video(video_path, language, backend)
+    save_srt(build_subtitles(results, speech_ranges), output_file)
+    return output_file
+
+
+def subtitle_job(ctx: JobContext, input_file: str, output_file: str, language: str,
+                 format: str, vosk_model_path: Optional[str] = None) -> str:
+    """
+    Tarefa: gera as legendas do vídeo (emite 'warning' se algum trecho
+    falhar). Com `vosk_model_path`, o reconhecimento é local.
+    """
+    backend = VoskBackend(vosk_model_path) if vosk_model_path else GoogleBackend()
+    def on_progress(value: int):
+        ctx.progress(value)
+        ctx.status(f"Processando áudio... {value}%")
+
+    ctx.status("Extraindo áudio...")
+    results, speech_ranges = transcribe_video(
+        input_file,
+        language,
+        backend,
+        progress_callback=on_progress,
+        should_stop=ctx.cancelled
+    )
+    if ctx.cancelled():
+        raise JobCancelled()
+
+    failed = [result for result in results if result.error]
+    if failed:
+        ctx.emit('warning',
+            f"{len(failed)} trecho(s) não foram reconhecidos por erro no serviço "
+            f"de reconhecimento: {failed[0].error}"
+        )
+
+    # Salva legendas no formato escolhido
+    subtitles = build_subtitles(results, speech_ranges)
+    if format == "SRT":
+        save_srt(subtitles, output_file)
+    else:  # VTT
+        save_vtt(subtitles, output_file)
+    return output_file
+
 
 class SubtitleGenerator(QWidget):
     def __init__(self):
         super().__init__()
         self.input_file = None
         self.output_dir = None
-        self.recognizer = sr.Recognizer()
+        self.vosk_model_path = None
+        self.processor = None
         self.setup_ui()
         
         # Verifica se o FFmpeg está instalado
@@ -167,6 +293,18 @@ class SubtitleGenerator(QWidget):
         format_layout.addWidget(self.format_combo)
         config_layout.addLayout(format_layout)
 
+        # Mecanismo de reconhecimento
+        engine_layout = QHBoxLayout()
+        engine_label = QLabel("Reconhecimento:")
+        engine_label.setStyleSheet("color: white;")
+        engine_layout.addWidget(engine_label)
+
+        self.engine_combo = QComboBox()
+        self.engine_combo.addItems(["Google (online)", "Vosk (offline)"])
+        self.engine_combo.setStyleSheet(self.format_combo.styleSheet())
+        engine_layout.addWidget(self.engine_combo)
+        config_layout.addLayout(engine_layout)
+
         layout.addWidget(config_frame)
 
         # Botões de ação
@@ -263,137 +401,85 @@ class SubtitleGenerator(QWidget):
                 f"legendas_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             )
             os.makedirs(output_folder, exist_ok=True)
-            
-            # Configura a interface
-            self.process_btn.setEnabled(False)
-            self.select_video_btn.setEnabled(False)
-            self.progress_bar.setValue(0)
-            self.progress_bar.show()
-            self.status_label.setText("Extraindo áudio...")
-            self.status_label.setStyleSheet("color: #4a90e2;")
-            
-            # Extrai o áudio do vídeo
-            audio_file = os.path.join(output_folder, "audio.wav")
-            subprocess.run([
-                'ffmpeg',
-                '-i', self.input_file,
-                '-vn',  # Sem vídeo
-                '-acodec', 'pcm_s16le',  # Formato WAV
-                '-ar', '16000',  # Sample rate
-                '-ac', '1',  # Mono
-                audio_file
-            ], check=True)
-            
-            # Carrega o áudio
-            audio = AudioSegment.from_wav(audio_file)
-            
-            # Configura o idioma
-            language_map = {
-                "Português": "pt-BR",
-                "English": "en-US",
-                "Español": "es-ES"
-            }
-            language = language_map[self.language_combo.currentText()]
-            
-            # Processa o áudio em chunks de 30 segundos
-            chunk_length = 30 * 1000  # 30 segundos em milissegundos
-            chunks = len(audio) // chunk_length
-            subtitles = []
-            
-            for i, chunk_start in enumerate(range(0, len(audio), chunk_length)):
-                # Atualiza progresso
-                progress = int((i / chunks) * 100)
-                self.progress_bar.setValue(progress)
-                self.status_label.setText(f"Processando áudio... {progress}%")
-                
-                # Extrai chunk
-                chunk = audio[chunk_start:chunk_start + chunk_length]
-                chunk_file = os.path.join(output_folder, f"chunk_{i}.wav")
-                chunk.export(chunk_file, format="wav")
-                
-                # Reconhece fala
-                with sr.AudioFile(chunk_file) as source:
-                    audio_data = self.recognizer.record(source)
-                    try:
-                        text = self.recognizer.recognize_google(audio_data, language=language)
-                        if text:
-                            start_time = chunk_start / 1000  # Converte para segundos
-                            end_time = (chunk_start + len(chunk)) / 1000
-                            subtitles.append({
-                                'start': start_time,
-                                'end': end_time,
-                                'text': text
-                            })
-                    except sr.UnknownValueError:
-                        pass  # Silêncio ou fala não reconhecida
-                    except sr.RequestError as e:
-                        QMessageBox.warning(
-                            self,
-                            "Aviso",
-                            f"Erro ao acessar o serviço de reconhecimento: {str(e)}"
-                        )
-                
-                # Remove arquivo temporário
-                os.remove(chunk_file)
-            
-            # Remove arquivo de áudio
-            os.remove(audio_file)
-            
-            # Salva legendas no formato escolhido
-            format = self.format_combo.currentText()
-            output_file = os.path.join(
-                output_folder,
-                f"legendas.{format.lower()}"
-            )
-            
-            if format == "SRT":
-                self._save_srt(subtitles, output_file)
-            else:  # VTT
-                self._save_vtt(subtitles, output_file)
-            
-            # Finaliza
-            self.process_btn.setEnabled(True)
-            self.select_video_btn.setEnabled(True)
-            self.status_label.setText("Processamento concluído!")
-            self.status_label.setStyleSheet("color: #2ecc71; font-weight: bold;")
-            self.progress_bar.hide()
-            
-            QMessageBox.information(
+        except OSError as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao criar pasta de destino: {str(e)}")
+            return
+
+        format = self.format_combo.currentText()
+        output_file = os.path.join(output_folder, f"legendas.{format.lower()}")
+
+        backend = self.selected_backend()
+        if backend is None:
+            return
+
+        # Configura a interface
+        self.process_btn.setEnabled(False)
+        self.select_video_btn.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.status_label.setStyleSheet("color: #4a90e2;")
+
+        self.processor = get_job_runner().submit(
+            f"Legendas: {os.path.basename(self.input_file)}",
+            subtitle_job,
+            self.input_file,
+            output_file,
+            LANGUAGES[self.language_combo.currentText()],
+            format,
+            getattr(backend, 'model_path', None),
+            # Google usa a rede; o Vosk, os núcleos da máquina
+            resource=CPU if getattr(backend, 'use_processes', False) else NETWORK
+        )
+        self.processor.progress.connect(self.progress_bar.setValue)
+        self.processor.status_changed.connect(self.status_label.setText)
+        self.processor.event.connect(self.on_job_event)
+        self.processor.finished.connect(self.processing_finished)
+        self.processor.error.connect(self.show_error)
+        self.processor.cancelled.connect(self.processing_cancelled)
+
+    def selected_backend(self):
+        """Reconhecedor escolhido (None se o usuário cancelar a escolha do modelo)."""
+        if self.engine_combo.currentText().startswith("Google"):
+            return GoogleBackend()
+
+        if not self.vosk_model_path:
+            # O modelo do Vosk define o idioma (ex.: vosk-model-small-pt-0.3)
+            self.vosk_model_path = QFileDialog.getExistingDirectory(
                 self,
-                "Sucesso",
-                f"Processamento concluído!\nAs legendas foram salvas em:\n{output_file}"
-            )
-            
-        except subprocess.CalledProcessError as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao processar vídeo: {str(e)}")
-            self.process_btn.setEnabled(True)
-            self.select_video_btn.setEnabled(True)
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro inesperado: {str(e)}")
-            self.process_btn.setEnabled(True)
-            self.select_video_btn.setEnabled(True)
-            
-    def _format_time(self, seconds):
-        """Formata tempo em segundos para o formato HH:MM:SS,mmm"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        seconds = seconds % 60
-        return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}".replace(".", ",")
-    
-    def _save_srt(self, subtitles, output_file):
-        """Salva legendas no formato SRT"""
-        with open(output_file, 'w', encoding='utf-8') as f:
-            for i, subtitle in enumerate(subtitles, 1):
-                f.write(f"{i}\n")
-                f.write(f"{self._format_time(subtitle['start'])} --> {self._format_time(subtitle['end'])}\n")
-                f.write(f"{subtitle['text']}\n\n")
-    
-    def _save_vtt(self, subtitles, output_file):
-        """Salva legendas no formato VTT"""
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("WEBVTT\n\n")
-            for subtitle in subtitles:
-                start = self._format_time(subtitle['start']).replace(",", ".")
-                end = self._format_time(subtitle['end']).replace(",", ".")
-                f.write(f"{start} --> {end}\n")
-                f.write(f"{subtitle['text']}\n\n")
+                "Selecionar Pasta do Modelo Vosk",
+                ""
+            ) or None
+        if not self.vosk_model_path:
+            return None
+        return VoskBackend(self.vosk_model_path)
+
+    def on_job_event(self, kind: str, value):
+        if kind == 'warning':
+            QMessageBox.warning(self, "Aviso", value)
+
+    def processing_finished(self, output_file: str):
+        self.process_btn.setEnabled(True)
+        self.select_video_btn.setEnabled(True)
+        self.status_label.setText("Processamento concluído!")
+        self.status_label.setStyleSheet("color: #2ecc71; font-weight: bold;")
+        self.progress_bar.hide()
+
+        QMessageBox.information(
+            self,
+            "Sucesso",
+            f"Processamento concluído!\nAs legendas foram salvas em:\n{output_file}"
+        )
+
+    def processing_cancelled(self):
+        self.process_btn.setEnabled(True)
+        self.select_video_btn.setEnabled(True)
+        self.progress_bar.hide()
+        self.status_label.setText("Processamento cancelado.")
+
+    def show_error(self, message: str):
+        self.process_btn.setEnabled(True)
+        self.select_video_btn.setEnabled(True)
+        self.progress_bar.hide()
+        self.status_label.setText("Erro no processamento")
+        self.status_label.setStyleSheet("color: #e74c3c;")
+        QMessageBox.critical(self, "Erro", f"Erro ao processar vídeo: {message}")
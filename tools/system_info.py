@@ -0,0 +1,77 @@
+import os
+import sys
+from typing import Optional
+
+# Limite de trabalhos simultâneos em discos mecânicos (evita busca excessiva da agulha)
+ROTATIONAL_DISK_WORKERS = 2
+
+
+def is_rotational(path: str) -> Optional[bool]:
+    """
+    Informa se o arquivo/pasta está em um disco mecânico (HDD).
+    Retorna None quando não é possível descobrir (ex.: Windows, macOS).
+    """
+    if not sys.platform.startswith('linux'):
+        return None
+
+    try:
+        device = os.stat(path).st_dev
+        block_dir = os.path.realpath(
+            f"/sys/dev/block/{os.major(device)}:{os.minor(device)}"
+        )
+        # Partições não têm "queue"; a informação fica no disco pai
+        for directory in (block_dir, os.path.dirname(block_dir)):
+            rotational_file = os.path.join(directory, "queue", "rotational")
+            if os.path.exists(rotational_file):
+                with open(rotational_file, 'r') as f:
+                    return f.read().strip() == "1"
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def default_worker_count(path: str) -> int:
+    """
+    Quantidade padrão de processos simultâneos para trabalhar com arquivos
+    em `path`: um por núcleo em SSD, poucos em disco mecânico.
+    """
+    cpu_count = os.cpu_count() or 1
+    if is_rotational(path):
+        return min(cpu_count, ROTATIONAL_DISK_WORKERS)
+    return cpu_count
+
+
+def available_memory() -> Optional[int]:
+    """
+    Memória livre para novos processos (bytes). Retorna None quando não é
+    possível descobrir (ex.: macOS).
+    """
+    try:
+        if sys.platform.startswith('linux'):
+            with open("/proc/meminfo", 'r') as f:
+                for line in f:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) * 1024
+        elif sys.platform == 'win32':
+            import ctypes
+
+            class MemoryStatus(ctypes.Structure):
+                _fields_ = [
+                    ("dwLength", ctypes.c_ulong),
+                    ("dwMemoryLoad", ctypes.c_ulong),
+                    ("ullTotalPhys", ctypes.c_ulonglong),
+                    ("ullAvailPhys", ctypes.c_ulonglong),
+                    ("ullTotalPageFile", ctypes.c_ulonglong),
+                    ("ullAvailPageFile", ctypes.c_ulonglong),
+                    ("ullTotalVirtual", ctypes.c_ulonglong),
+                    ("ullAvailVirtual", ctypes.c_ulonglong),
+                    ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+                ]
+
+            status = MemoryStatus()
+            status.dwLength = ctypes.sizeof(MemoryStatus)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return status.ullAvailPhys
+    except (OSError, ValueError, AttributeError):
+        pass
+    return None
@@ -0,0 +1,279 @@
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from tools.silence_detector import PcmAudio
+from tools.system_info import available_memory
+
+# Tentativas extras quando o serviço de reconhecimento falha (rede, cota)
+DEFAULT_RETRIES = 3
+
+# Espera inicial entre tentativas (dobra a cada nova falha)
+DEFAULT_BACKOFF = 1.0
+
+# Trechos enviados juntos a cada processo nos reconhecedores locais
+LOCAL_BATCH_SIZE = 4
+
+# Processos do reconhecedor local: cada um carrega sua própria cópia do
+# modelo (um modelo completo do Vosk tem ~2 GB), então poucos
+MAX_LOCAL_WORKERS = 4
+
+# Parte da memória livre que os modelos carregados podem ocupar
+LOCAL_MEMORY_FRACTION = 0.75
+
+Word = Tuple[str, float, float]  # palavra, início, fim (segundos)
+
+# Modelos do Vosk já carregados neste processo (caminho -> modelo)
+_VOSK_MODELS = {}
+
+
+class TransientRecognitionError(Exception):
+    """Falha temporária do reconhecedor (rede, limite de requisições): vale tentar de novo."""
+
+
+@dataclass
+class AudioChunk:
+    index: int
+    start_ms: int
+    end_ms: int
+    pcm: bytes         # PCM mono/estéreo intercalado, inteiros com sinal
+    frame_rate: int
+    sample_width: int
+    channels: int = 1
+
+
+@dataclass
+class RecognitionResult:
+    index: int
+    start: float       # segundos
+    end: float
+    text: str
+    words: List[Word] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+class GoogleBackend:
+    """Reconhecimento pela API gratuita do Google (via SpeechRecognition)."""
+    name = 'google'
+
+    def recognize(self, chunk: AudioChunk, language: str) -> Tuple[str, List[Word]]:
+        import speech_recognition as sr
+
+        recognizer = sr.Recognizer()
+        audio = sr.AudioData(chunk.pcm, chunk.frame_rate, chunk.sample_width)
+        try:
+            return recognizer.recognize_google(audio, language=language), []
+        except sr.UnknownValueError:
+            return "", []  # Silêncio ou fala não reconhecida
+        except sr.RequestError as e:
+            raise TransientRecognitionError(str(e))
+
+
+class VoskBackend:
+    """
+    Reconhecimento local (offline) com o Vosk. Roda em processos separados,
+    cada um com sua cópia do modelo, e devolve o tempo de cada palavra.
+    O idioma é o do modelo escolhido. `workers` fixa o número de processos;
+    sem ele, cabem quantos o tamanho do modelo e a memória livre permitirem
+    (até MAX_LOCAL_WORKERS).
+    """
+    use_processes = True
+
+    def __init__(self, model_path: str, workers: Optional[int] = None):
+        self.model_path = model_path
+        self.workers = workers
+        self.name = f"vosk:{os.path.basename(os.path.normpath(model_path))}"
+
+    def worker_count(self) -> int:
+        if self.workers:
+            return self.workers
+        count = min(MAX_LOCAL_WORKERS, os.cpu_count() or 1)
+        model_size = sum(
+            os.path.getsize(os.path.join(folder, name))
+            for folder, _, names in os.walk(self.model_path) for name in names
+        )
+        memory = available_memory()
+        if memory and model_size:
+            count = min(count, int(memory * LOCAL_MEMORY_FRACTION // model_size))
+        return max(1, count)
+
+    def _model(self):
+        from vosk import Model, SetLogLevel
+
+        if self.model_path not in _VOSK_MODELS:
+            SetLogLevel(-1)
+            _VOSK_MODELS[self.model_path] = Model(self.model_path)
+        return _VOSK_MODELS[self.model_path]
+
+    def recognize(self, chunk: AudioChunk, language: str) -> Tuple[str, List[Word]]:
+        from vosk import KaldiRecognizer
+
+        recognizer = KaldiRecognizer(self._model(), chunk.frame_rate)
+        recognizer.SetWords(True)
+        recognizer.AcceptWaveform(chunk.pcm)
+        result = json.loads(recognizer.FinalResult())
+        words = [(item['word'], item['start'], item['end']) for item in result.get('result', [])]
+        return result.get('text', ""), words
+
+
+class StubBackend:
+    """Reconhecedor local falso, para testar o fluxo sem rede."""
+    name = 'stub'
+
+    def __init__(self, text: Callable[[AudioChunk], str] = None, delay: float = 0.0):
+        self.text = text
+        self.delay = delay
+
+    def recognize(self, chunk: AudioChunk, language: str) -> Tuple[str, List[Word]]:
+        if self.delay:
+            time.sleep(self.delay)
+        if self.text is None:
+            return f"trecho {chunk.index + 1}", []
+        return self.text(chunk), []
+
+
+def make_chunks(audio: PcmAudio, ranges: List[List[int]]):
+    """Gera os trechos [início, fim] (ms) do áudio como blocos PCM em memória."""
+    for index, (start, end) in enumerate(ranges):
+        first, last = audio.frame_index(start), audio.frame_index(end)
+        yield AudioChunk(
+            index=index,
+            start_ms=int(start),
+            end_ms=int(end),
+            pcm=audio.samples[first:last].tobytes(),
+            frame_rate=audio.frame_rate,
+            sample_width=audio.sample_width,
+            channels=audio.channels
+        )
+
+
+def _make_result(chunk: AudioChunk, text: str, words: List[Word]) -> RecognitionResult:
+    """Resultado do trecho, com os tempos das palavras convertidos para o áudio todo."""
+    offset = chunk.start_ms / 1000
+    return RecognitionResult(
+        index=chunk.index,
+        start=offset,
+        end=chunk.end_ms / 1000,
+        text=text or "",
+        words=[(word, offset + start, offset + end) for word, start, end in words]
+    )
+
+
+def recognize_chunk(backend, chunk: AudioChunk, language: str,
+                    retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF) -> RecognitionResult:
+    """Reconhece um trecho, tentando de novo com espera crescente em falhas temporárias."""
+    error = None
+    for attempt in range(retries + 1):
+        try:
+            text, words = backend.recognize(chunk, language)
+            return _make_result(chunk, text, words)
+        except TransientRecognitionError as e:
+            error = str(e)
+            if attempt < retries:
+                # Espera exponencial com uma pequena variação aleatória
+                time.sleep(backoff * (2 ** attempt) * random.uniform(1.0, 1.25))
+
+    return RecognitionResult(chunk.index, chunk.start_ms / 1000, chunk.end_ms / 1000, "", error=error)
+
+
+def recognize_batch(backend, batch: List[AudioChunk], language: str,
+                    retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF) -> List[RecognitionResult]:
+    return [recognize_chunk(backend, chunk, language, retries, backoff) for chunk in batch]
+
+
+def _batches(chunks, size: int):
+    batch = []
+    for chunk in chunks:
+        batch.append(chunk)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def transcribe(chunks, backend, language: str, workers: Optional[int] = None,
+               retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF,
+               total: Optional[int] = None,
+               progress_callback: Optional[Callable[[int], None]] = None,
+               should_stop: Optional[Callable[[], bool]] = None,
+               cache=None) -> List[RecognitionResult]:
+    """
+    Reconhece os trechos em paralelo e devolve os resultados em ordem de
+    tempo. Serviços remotos usam threads (uma requisição por trecho);
+    reconhecedores locais usam processos (`backend.worker_count()`, cada um
+    com seu modelo em memória), com trechos em lotes.
+    Só alguns trechos ficam em memória por vez: novos trechos são gerados
+    conforme os anteriores terminam. Com `cache` (TranscriptionCache), trechos
+    já reconhecidos não são enviados de novo.
+    """
+    if getattr(backend, 'use_processes', False):
+        if not workers:
+            worker_count = getattr(backend, 'worker_count', None)
+            workers = worker_count() if worker_count else min(MAX_LOCAL_WORKERS, os.cpu_count() or 1)
+        executor = ProcessPoolExecutor(max_workers=workers)
+        batch_size = LOCAL_BATCH_SIZE
+    else:
+        workers = workers or 4
+        executor = ThreadPoolExecutor(max_workers=workers)
+        batch_size = 1
+
+    results = []
+    pending = set()
+    cache_keys = {}  # índice do trecho -> chave no cache
+
+    def uncached(chunks):
+        for chunk in chunks:
+            if cache is not None:
+                key = cache.key(chunk, language, backend.name)
+                cached = cache.get(key)
+                if cached is not None:
+                    results.append(_make_result(chunk, *cached))
+                    continue
+                cache_keys[chunk.index] = key
+            yield chunk
+
+    batches = _batches(uncached(chunks), batch_size)
+
+    def submit_next() -> bool:
+        batch = next(batches, None)
+        if batch is None:
+            return False
+        pending.add(executor.submit(recognize_batch, backend, batch, language, retries, backoff))
+        return True
+
+    with executor:
+        # Mantém no máximo o dobro de lotes em andamento
+        while len(pending) < workers * 2 and submit_next():
+            pass
+
+        while pending:
+            if should_stop and should_stop():
+                for future in pending:
+                    future.cancel()
+                break
+
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                for result in future.result():
+                    results.append(result)
+                    if cache is not None and not result.error:
+                        # Palavras guardadas com o tempo relativo ao trecho
+                        cache.put(cache_keys.pop(result.index), result.text, [
+                            (word, start - result.start, end - result.start)
+                            for word, start, end in result.words
+                        ])
+                submit_next()
+
+            if progress_callback and total:
+                progress_callback(int(len(results) / total * 100))
+
+    if progress_callback and total and not pending:
+        progress_callback(100)
+
+    results.sort(key=lambda result: result.start)
+    return results
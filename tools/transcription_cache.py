@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import List, Optional, Tuple
+
+# Local padrão do cache (compartilhado por todas as ferramentas de legenda)
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".webdark_studio", "transcriptions.sqlite")
+
+# Tamanho máximo do texto guardado; acima disso os menos usados são apagados
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class TranscriptionCache:
+    """
+    Cache persistente (SQLite) dos textos reconhecidos. A chave é o hash do
+    áudio PCM do trecho + idioma + reconhecedor, então refazer as legendas
+    (outro formato, outra quebra de linha) não envia nada de novo.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    text TEXT,
+                    words TEXT,
+                    size INTEGER,
+                    last_used REAL
+                )
+            """)
+            db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+
+    def _connect(self):
+        # Uma conexão por operação, como no diário de renderização
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def key(chunk, language: str, backend_name: str) -> str:
+        hasher = hashlib.blake2b(digest_size=20)
+        hasher.update(f"{backend_name}|{language}|{chunk.frame_rate}|"
+                      f"{chunk.sample_width}|{chunk.channels}|".encode('utf-8'))
+        hasher.update(chunk.pcm)
+        return hasher.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[str, List[tuple]]]:
+        """Texto e palavras (tempos relativos ao trecho) já reconhecidos, ou None."""
+        with self._connect() as db:
+            row = db.execute("SELECT text, words FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row[0], [tuple(word) for word in json.loads(row[1])]
+
+    def put(self, key: str, text: str, words: List[tuple]):
+        words_json = json.dumps(words)
+        size = len(key) + len(text.encode('utf-8')) + len(words_json)
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, text, words_json, size, time.time())
+            )
+        self.evict()
+
+    def evict(self):
+        """Apaga os trechos usados há mais tempo até o cache caber no limite."""
+        with self._connect() as db:
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+
+            # Libera um pouco além do necessário para não limpar a cada inserção
+            target = self.max_bytes * 0.9
+            expired = []
+            for key, size in db.execute("SELECT key, size FROM entries ORDER BY last_used"):
+                if total <= target:
+                    break
+                expired.append((key,))
+                total -= size
+            db.executemany("DELETE FROM entries WHERE key = ?", expired)
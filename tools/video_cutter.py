@@ -1,5 +1,6 @@
 import os
 from datetime import datetime
+from typing import List
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QPushButton, QFileDialog, QProgressBar,
@@ -8,12 +9,38 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt
 import subprocess
+from tools.video_segmenter import segment_video
+from tools.keyframe_index import load_keyframe_index
+from tools.job_runner import JobContext, get_job_runner
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov')
+
+def segment_job(ctx: JobContext, input_file: str, output_folder: str, segment_duration: int,
+                ffprobe_path: str = 'ffprobe') -> str:
+    """Tarefa: corta o vídeo em segmentos (emite 'segment' a cada arquivo pronto)."""
+    # Índice de keyframes (em cache na pasta do usuário após a primeira leitura)
+    ctx.status("Indexando keyframes...")
+    index = load_keyframe_index(input_file, ffprobe_path)
+
+    ctx.status("Processando segmentos...")
+    segment_video(
+        input_file,
+        output_folder,
+        segment_duration,
+        duration=index.duration,
+        progress_callback=ctx.progress,
+        segment_callback=lambda path: ctx.emit('segment', path),
+        should_stop=ctx.cancelled,
+        segment_times=index.segment_times(segment_duration)
+    )
+    return output_folder
 
 class VideoCutter(QWidget):
     def __init__(self):
         super().__init__()
         self.input_file = None
         self.output_dir = None
+        self.output_folder = None
         self.processor = None
         self.ffprobe_path = '/opt/homebrew/bin/ffprobe'
         
@@ -244,75 +271,38 @@ class VideoCutter(QWidget):
             return
 
         try:
-            # Obtém informações do vídeo usando ffprobe
-            result = subprocess.run(
-                [self.ffprobe_path, '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', self.input_file],
-                capture_output=True,
-                text=True
-            )
-            duration = float(result.stdout.strip())
-            
-            # Calcula os segmentos
-            segment_duration = self.duration_spin.value()
             # Configura a interface
             self.process_btn.setEnabled(False)
             self.select_video_btn.setEnabled(False)
+            self.segments_list.clear()
             self.progress_bar.setValue(0)
             self.progress_bar.show()
-            
-            # Prepara os parâmetros
-            segment_duration = self.duration_spin.value()
-            current_time = 0
-            segment_number = 1
+            self.status_label.setText("Processando segmentos...")
+            self.status_label.setStyleSheet("color: #4a90e2;")
             
             # Cria pasta para os cortes
-            output_folder = os.path.join(
+            self.output_folder = os.path.join(
                 self.output_dir,
                 f"cortes_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             )
-            os.makedirs(output_folder, exist_ok=True)
-            
-            # Processa cada segmento
-            while current_time < duration:
-                # Nome do arquivo de saída
-                output_file = os.path.join(
-                    output_folder,
-                    f"segmento_{segment_number:03d}.mp4"
-                )
-                
-                # Atualiza a interface
-                self.status_label.setText(f"Processando segmento {segment_number}...")
-                self.status_label.setStyleSheet("color: #4a90e2;")
-                
-                # Executa o FFmpeg para cortar o vídeo
-                subprocess.run([
-                    'ffmpeg',
-                    '-i', self.input_file,
-                    '-ss', str(current_time),
-                    '-t', str(segment_duration),
-                    '-c', 'copy',
-                    output_file
-                ], check=True)
-                
-                # Atualiza o progresso
-                progress = int((current_time / duration) * 100)
-                self.progress_bar.setValue(progress)
-                
-                current_time += segment_duration
-                segment_number += 1
+            os.makedirs(self.output_folder, exist_ok=True)
             
-            # Finaliza
-            self.process_btn.setEnabled(True)
-            self.select_video_btn.setEnabled(True)
-            self.status_label.setText("Processamento concluído!")
-            self.status_label.setStyleSheet("color: #2ecc71; font-weight: bold;")
-            self.progress_bar.hide()
-            
-            QMessageBox.information(
-                self,
-                "Sucesso",
-                f"Processamento concluído!\nOs segmentos foram salvos em:\n{output_folder}"
+            # Todos os segmentos saem de uma única leitura do vídeo,
+            # com os cortes alinhados aos keyframes
+            self.processor = get_job_runner().submit(
+                f"Cortar {os.path.basename(self.input_file)}",
+                segment_job,
+                self.input_file,
+                self.output_folder,
+                self.duration_spin.value(),
+                self.ffprobe_path
             )
+            self.processor.progress.connect(self.update_progress)
+            self.processor.status_changed.connect(self.update_status)
+            self.processor.event.connect(self.on_job_event)
+            self.processor.finished.connect(self.processing_finished)
+            self.processor.error.connect(self.show_error)
+            self.processor.cancelled.connect(self.processing_cancelled)
 
         except Exception as e:
             self.show_error(f"Erro ao iniciar processamento: {str(e)}")
@@ -331,13 +321,18 @@ class VideoCutter(QWidget):
         self.process_btn.setEnabled(True)
         self.select_video_btn.setEnabled(True)
 
+    def on_job_event(self, kind, value):
+        if kind == 'segment':
+            self.add_segment_to_list(value)
+
     def add_segment_to_list(self, filename):
         item = QListWidgetItem(os.path.basename(filename))
         item.setIcon(self.style().standardIcon(self.style().StandardPixmap.SP_MediaPlay))
         self.segments_list.addItem(item)
         self.segments_list.scrollToBottom()
+        self.status_label.setText(f"Segmento concluído: {os.path.basename(filename)}")
 
-    def processing_finished(self):
+    def processing_finished(self, output_folder):
         self.process_btn.setEnabled(True)
         self.select_video_btn.setEnabled(True)
         self.status_label.setText("Processamento concluído!")
@@ -347,5 +342,42 @@ class VideoCutter(QWidget):
         QMessageBox.information(
             self,
             "Sucesso",
-            f"Processamento concluído!\nOs segmentos foram salvos em:\n{self.output_dir}"
+            f"Processamento concluído!\nOs segmentos foram salvos em:\n{output_folder}"
+        )
+
+    def processing_cancelled(self):
+        self.process_btn.setEnabled(True)
+        self.select_video_btn.setEnabled(True)
+        self.status_label.setText("Processamento cancelado.")
+        self.progress_bar.hide()
+
+def cut_videos(path: str, duration: int = 10) -> List[str]:
+    """
+    Corta um vídeo (ou todos os vídeos de uma pasta) em segmentos de
+    `duration` segundos, sem interface gráfica.
+    """
+    if os.path.isdir(path):
+        input_files = [
+            os.path.join(path, f) for f in sorted(os.listdir(path))
+            if f.lower().endswith(VIDEO_EXTENSIONS)
+        ]
+    else:
+        input_files = [path]
+
+    output_folders = []
+    for input_file in input_files:
+        base_name = os.path.splitext(os.path.basename(input_file))[0]
+        output_folder = os.path.join(
+            os.path.dirname(input_file),
+            f"cortes_{base_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        )
+        index = load_keyframe_index(input_file)
+        segment_video(
+            input_file,
+            output_folder,
+            duration,
+            duration=index.duration,
+            segment_times=index.segment_times(duration)
         )
+        output_folders.append(output_folder)
+    return output_folders
@@ -0,0 +1,106 @@
+import os
+import subprocess
+import tempfile
+from typing import Callable, List, Optional
+
+# Padrão de nome dos segmentos gerados (segmento_001.mp4, segmento_002.mp4, ...)
+SEGMENT_PATTERN = "segmento_%03d.mp4"
+
+# Margem (s) antes de cada ponto de corte: o muxer corta no primeiro keyframe
+# com tempo >= ao pedido, e um tempo arredondado para cima pularia o GOP todo
+SEGMENT_TIME_EPSILON = 0.001
+
+
+def build_segment_command(input_file: str, output_folder: str, segment_duration: float,
+                          start_number: int = 1,
+                          segment_times: Optional[List[float]] = None) -> List[str]:
+    """
+    Monta o comando do FFmpeg que divide o vídeo em uma única leitura,
+    usando o muxer de segmentos. A lista de segmentos concluídos é escrita
+    em CSV na saída padrão (arquivo,inicio,fim) para acompanhar o progresso.
+    """
+    command = [
+        'ffmpeg',
+        '-hide_banner',
+        '-v', 'error',
+        '-i', input_file,
+        '-map', '0:v?',
+        '-map', '0:a?',
+        '-c', 'copy',
+        '-f', 'segment',
+    ]
+
+    # Pontos de corte explícitos têm prioridade sobre a duração fixa
+    if segment_times:
+        command += ['-segment_times', ",".join(
+            f"{max(t - SEGMENT_TIME_EPSILON, 0):.6f}" for t in segment_times
+        )]
+    else:
+        command += ['-segment_time', str(segment_duration)]
+
+    command += [
+        '-segment_start_number', str(start_number),
+        '-reset_timestamps', '1',
+        '-segment_list', 'pipe:1',
+        '-segment_list_type', 'csv',
+        '-y',
+        os.path.join(output_folder, SEGMENT_PATTERN)
+    ]
+    return command
+
+
+def segment_video(input_file: str, output_folder: str, segment_duration: float,
+                  duration: Optional[float] = None,
+                  progress_callback: Optional[Callable[[int], None]] = None,
+                  segment_callback: Optional[Callable[[str], None]] = None,
+                  should_stop: Optional[Callable[[], bool]] = None,
+                  segment_times: Optional[List[float]] = None) -> List[str]:
+    """
+    Corta o vídeo em segmentos com uma única execução do FFmpeg.
+
+    Os cortes acontecem sempre em keyframes (cópia sem reencode), então cada
+    segmento começa em um quadro completo. Retorna a lista de arquivos gerados.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    command = build_segment_command(
+        input_file, output_folder, segment_duration, segment_times=segment_times
+    )
+
+    segments = []
+    # stderr vai para um arquivo temporário para não travar o pipe de saída
+    with tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=stderr_file,
+            text=True
+        )
+        try:
+            for line in process.stdout:
+                if should_stop and should_stop():
+                    process.terminate()
+                    break
+
+                # Cada linha: nome_do_arquivo,inicio,fim
+                parts = line.strip().split(",")
+                if len(parts) < 3:
+                    continue
+
+                output_file = os.path.join(output_folder, parts[0])
+                segments.append(output_file)
+                if segment_callback:
+                    segment_callback(output_file)
+
+                if progress_callback and duration:
+                    end_time = float(parts[2])
+                    progress_callback(min(int((end_time / duration) * 100), 100))
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+
+        if returncode != 0 and not (should_stop and should_stop()):
+            stderr_file.seek(0)
+            message = stderr_file.read().decode('utf-8', errors='replace').strip()
+            raise RuntimeError(f"FFmpeg falhou ao segmentar o vídeo: {message}")
+
+    return segments
@@ -1,5 +1,6 @@
 import sys
 import os
+import multiprocessing
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QPushButton, 
     QVBoxLayout, QHBoxLayout, QLabel, QStackedWidget,
@@ -8,6 +9,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtGui import QIcon, QFont, QScreen
 from PyQt6.QtCore import Qt, QSize
 from auth_web.login_web import show_auth_window
+from tools.job_runner import JobQueueView, get_job_runner
 
 class ToolButton(QPushButton):
     def __init__(self, text, icon_path=None, parent=None):
@@ -120,6 +122,11 @@ class WebDarkStudio(QMainWindow):
         content_layout.setContentsMargins(20, 20, 20, 20)
         content_layout.addWidget(self.stacked_widget)
 
+        # Fila de tarefas em segundo plano (todas as ferramentas)
+        self.job_queue = JobQueueView()
+        self.job_queue.setMaximumHeight(200)
+        content_layout.addWidget(self.job_queue)
+
         # Adiciona sidebar e área de conteúdo ao layout principal
         main_layout.addWidget(sidebar)
         main_layout.addWidget(content_area)
@@ -260,6 +267,11 @@ class WebDarkStudio(QMainWindow):
             print("Detalhes do erro:")
             traceback.print_exc()
 
+    def closeEvent(self, event):
+        # Cancela as tarefas em andamento antes de fechar
+        get_job_runner().shutdown()
+        super().closeEvent(event)
+
 # Variável global para manter referência à janela principal
 main_window = None
 
@@ -308,4 +320,6 @@ def main():
         return 1
 
 if __name__ == "__main__":
+    # Necessário para os pools de processos no executável (PyInstaller)
+    multiprocessing.freeze_support()
     main()